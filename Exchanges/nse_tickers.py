@@ -1,3 +1,4 @@
+import threading
 import numpy as np
 import pandas as pd
 from commons import *
@@ -10,11 +11,32 @@ from datetime import datetime, timedelta
 
 class NSETickers(IndexLoader):
     __abbreviation = "NSE"
+    __session: Union[Session, None] = None
+    __lock = threading.Lock()
 
     @staticmethod
     def get_url_dict() -> Dict[str, str]:
         return {index.name: index.value for index in NSE_URL}
 
+    @staticmethod
+    def __get_session() -> Session:
+        """
+        Session shared by all downloads, the NSE's cookies are fetched once when it is created.
+        """
+        with NSETickers.__lock:
+            if NSETickers.__session is None:
+                session = Session()
+                # Emulate browser
+                session.headers.update(
+                    {
+                        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.61 Safari/537.36"
+                    }
+                )
+                # Get the cookies from the main page (will update automatically in headers)
+                session.get("https://www.nseindia.com/")
+                NSETickers.__session = session
+            return NSETickers.__session
+
     @staticmethod
     def get_tickers(index: str) -> Dict[str, str]:
         """Downloads the index's current constituents from the NSE's website."""
@@ -24,24 +46,25 @@ class NSETickers(IndexLoader):
             )
 
         try:
-            session = Session()
-            # Emulate browser
-            session.headers.update(
-                {
-                    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.61 Safari/537.36"
-                }
+            response = NSETickers.__get_session().get(NSETickers.get_url_dict()[index])
+            if response.status_code in (401, 403):
+                # the cookies expired, they are fetched again on the next call
+                with NSETickers.__lock:
+                    NSETickers.__session = None
+                response = NSETickers.__get_session().get(
+                    NSETickers.get_url_dict()[index]
+                )
+            response.raise_for_status()
+            df = pd.read_csv(StringIO(response.text), sep=",")
+            df.columns = df.columns.str.strip()
+            # the full equity list has no Industry column and upper case headers
+            symbols = df["Symbol"] if "Symbol" in df.columns else df["SYMBOL"]
+            industries = (
+                df["Industry"].where(df["Industry"].notna(), None)
+                if "Industry" in df.columns
+                else [None] * df.shape[0]
             )
-            # Get the cookies from the main page (will update automatically in headers)
-            session.get("https://www.nseindia.com/")
-            # Get the API data
-            data = session.get(NSETickers.get_url_dict()[index]).text
-            data = StringIO(data)
-            df = pd.read_csv(data, sep=",")
-            n = df.shape[0]
-            tickers_sector: Dict[str, str] = {}
-            for i in range(n):
-                tickers_sector[df["Symbol"][i]] = df["Industry"][i]
-            return tickers_sector
+            return dict(zip(symbols, industries))
         except Exception as e:
             raise e
 
@@ -1,15 +1,168 @@
+import time
+import threading
 import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
-from typing import Union, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Dict, List, Tuple
 from datetime import datetime, timedelta
+from VendorsApiManagers.response_cache import ResponseCache
+from VendorsApiManagers.request_scheduler import RequestScheduler
 
 
 class APIManager(ABC):
     _login_credentials: Dict[str, str]
+    _response_cache: Union[ResponseCache, None]
+    # default request budget of a vendor, overridden by each vendor's class
+    _requests_per_second: float = 5
+    _burst: int = 10
+    _max_in_flight: int = 4
+    _max_retries: int = 3
+    _request_scheduler: Union[RequestScheduler, None] = None
+    __scheduler_lock = threading.Lock()
+    # details such as the sector rarely change, they are kept for a week
+    _ticker_detail_ttl: float = 7 * 24 * 3600
+    __ticker_details: Dict[Tuple[str, str, str], Tuple[float, Dict[str, str]]] = {}
+    __ticker_details_lock = threading.Lock()
 
-    def __init__(self, login_credentials: Dict[str, str]) -> None:
+    def __init__(
+        self,
+        login_credentials: Dict[str, str],
+        response_cache: Union[ResponseCache, None] = None,
+    ) -> None:
         self._login_credentials = login_credentials
+        self._response_cache = response_cache
+
+    def set_response_cache(self, response_cache: Union[ResponseCache, None]) -> None:
+        """
+        Serves this instance's vendor lookups from response_cache, None disables caching.
+        """
+        self._response_cache = response_cache
+
+    @classmethod
+    def get_request_scheduler(cls) -> RequestScheduler:
+        """
+        Returns the scheduler pacing the vendor's requests, each vendor class gets its own
+        on first use so that vendors do not share a budget.
+        """
+        if cls.__dict__.get("_request_scheduler") is None:
+            with APIManager.__scheduler_lock:
+                if cls.__dict__.get("_request_scheduler") is None:
+                    cls._request_scheduler = RequestScheduler(
+                        requests_per_second=cls._requests_per_second,
+                        burst=cls._burst,
+                        max_in_flight=cls._max_in_flight,
+                        max_retries=cls._max_retries,
+                    )
+        return cls._request_scheduler
+
+    @classmethod
+    def set_request_scheduler(cls, request_scheduler: RequestScheduler) -> None:
+        cls._request_scheduler = request_scheduler
+
+    @classmethod
+    def get_request_stats(cls) -> Dict[str, Union[int, float]]:
+        return cls.get_request_scheduler().get_stats()
+
+    @classmethod
+    def set_ticker_details(
+        cls, exchange: str, ticker_details: Dict[str, Dict[str, str]]
+    ) -> None:
+        """
+        Caches details that are already known, such as those stored in the Symbol table,
+        so that they are not fetched from the vendor.
+        """
+        now = time.monotonic()
+        with APIManager.__ticker_details_lock:
+            for ticker, details in ticker_details.items():
+                key = (cls.__name__, ticker, exchange)
+                cached = APIManager.__ticker_details.get(key)
+                known = {} if cached is None else cached[1]
+                APIManager.__ticker_details[key] = (now, {**known, **details})
+
+    def get_ticker_details(
+        self, tickers: List[str], exchange: str, details: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Returns the details of each of tickers, keyed by ticker and then detail.
+        Cached values are used for up to _ticker_detail_ttl seconds, then those in the response
+        cache, the remaining tickers are fetched together, concurrently within the vendor's
+        in-flight budget. Tickers whose fetch failed get None values that are not cached.
+        In offline mode a ticker missing from the response cache raises.
+        """
+        cls = type(self)
+        now = time.monotonic()
+        res_dict: Dict[str, Dict[str, str]] = {}
+        missing: List[str] = []
+        with APIManager.__ticker_details_lock:
+            for ticker in tickers:
+                cached = APIManager.__ticker_details.get(
+                    (cls.__name__, ticker, exchange)
+                )
+                if (
+                    cached is not None
+                    and now - cached[0] < cls._ticker_detail_ttl
+                    and all(detail in cached[1] for detail in details)
+                ):
+                    res_dict[ticker] = {detail: cached[1][detail] for detail in details}
+                else:
+                    missing.append(ticker)
+
+        record_key = "|".join([exchange, ",".join(details)])
+        if len(missing) > 0 and self._response_cache is not None:
+            stored: Dict[str, Dict[str, str]] = {}
+            for ticker in missing:
+                record = self._response_cache.get_record(
+                    cls.__name__, "ticker_details", f"{ticker}|{record_key}"
+                )
+                if record is not None:
+                    stored[ticker] = record
+            cls.set_ticker_details(exchange, stored)
+            res_dict.update(stored)
+            missing = [ticker for ticker in missing if ticker not in stored]
+
+        if len(missing) > 0:
+            with ThreadPoolExecutor(
+                max_workers=min(len(missing), cls._max_in_flight)
+            ) as executor:
+                futures = {
+                    ticker: executor.submit(
+                        self.fetch_ticker_details, ticker, exchange, details
+                    )
+                    for ticker in missing
+                }
+            fetched: Dict[str, Dict[str, str]] = {}
+            for ticker in missing:
+                try:
+                    fetched[ticker] = futures[ticker].result()
+                except Exception:
+                    res_dict[ticker] = {detail: None for detail in details}
+            cls.set_ticker_details(exchange, fetched)
+            res_dict.update(fetched)
+            if self._response_cache is not None:
+                for ticker, ticker_details in fetched.items():
+                    self._response_cache.put_record(
+                        cls.__name__,
+                        "ticker_details",
+                        f"{ticker}|{record_key}",
+                        ticker_details,
+                    )
+
+        return {ticker: res_dict[ticker] for ticker in tickers}
+
+    @staticmethod
+    def failed_response(error: str) -> pd.DataFrame:
+        """
+        Empty frame returned for a ticker whose request failed, unlike a plain empty frame
+        it does not mean the vendor has no data for the range.
+        """
+        df = pd.DataFrame()
+        df.attrs["error"] = error
+        return df
+
+    @staticmethod
+    def is_failed_response(dataframe: pd.DataFrame) -> bool:
+        return dataframe is not None and "error" in dataframe.attrs
 
     @staticmethod
     def __search(search_list: list, columns: pd.Index) -> Union[str, None]:
@@ -83,9 +236,9 @@ class APIManager(ABC):
                 df["close"] = df["adj close"].values
         return df
 
-    @staticmethod
     @abstractmethod
     def get_data(
+        self,
         interval: int,
         exchange: str,
         start_datetime: datetime,
@@ -102,7 +255,16 @@ class APIManager(ABC):
     def get_vendor_ticker(ticker: str, exchange: str) -> str:
         pass
 
-    @staticmethod
     @abstractmethod
-    def get_ticker_detail(ticker: str, exchange: str, detail: str) -> str:
+    def get_ticker_detail(self, ticker: str, exchange: str, detail: str) -> str:
+        pass
+
+    @abstractmethod
+    def fetch_ticker_details(
+        self, ticker: str, exchange: str, details: List[str]
+    ) -> Dict[str, str]:
+        """
+        Fetches all of details for ticker from the vendor in a single request, details the
+        vendor does not have are None.
+        """
         pass
@@ -0,0 +1,141 @@
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Union
+
+
+class RetryableError(Exception):
+    """
+    Raised by a vendor request that failed for a transient reason (rate limit, timeout,
+    connection error) and can be sent again. retry_after is the delay the vendor asked for.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RequestScheduler:
+    """
+    Paces the requests sent to one vendor.
+    A token bucket refilled at requests_per_second (holding at most burst tokens) limits
+    the request rate, at most max_in_flight requests run at the same time and requests
+    raising RetryableError are retried up to max_retries times with exponential backoff
+    and jitter.
+    """
+
+    __requests_per_second: float
+    __burst: float
+    __max_retries: int
+    __base_delay: float
+    __max_delay: float
+
+    def __init__(
+        self,
+        requests_per_second: float = 5,
+        burst: int = 10,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        base_delay: float = 1,
+        max_delay: float = 60,
+    ) -> None:
+        if requests_per_second <= 0:
+            raise Exception(
+                f"requests_per_second({requests_per_second}) must be greater than 0"
+            )
+        if burst < 1 or max_in_flight < 1:
+            raise Exception("burst and max_in_flight must be at least 1")
+        self.__requests_per_second = requests_per_second
+        self.__burst = burst
+        self.__max_retries = max_retries
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+        self.__in_flight_slots = threading.BoundedSemaphore(max_in_flight)
+        self.__stats: Dict[str, Union[int, float]] = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "throttled": 0,
+            "throttle_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+        }
+
+    def __acquire_tokens(self, cost: float) -> None:
+        """
+        Reserves cost tokens, the balance may go negative and the caller then sleeps until
+        it is repaid, so callers are served in the order they arrived.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(
+                self.__burst,
+                self.__tokens + (now - self.__updated) * self.__requests_per_second,
+            )
+            self.__updated = now
+            self.__tokens -= cost
+            wait = max(0.0, -self.__tokens / self.__requests_per_second)
+            if wait > 0:
+                self.__stats["throttled"] += 1
+                self.__stats["throttle_wait_seconds"] += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Delay before retry number attempt + 1, half of it fixed and half random so that
+        concurrent callers do not retry in lockstep.
+        """
+        delay = min(self.__max_delay, self.__base_delay * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def call(self, func: Callable, *args, cost: float = 1, **kwargs) -> Any:
+        """
+        Runs func(*args, **kwargs) within the rate limit and in-flight budget, cost is the
+        number of vendor requests the call makes. RetryableError is retried, the last one
+        and any other exception are raised to the caller.
+        """
+        attempt = 0
+        while True:
+            self.__acquire_tokens(cost)
+            with self.__in_flight_slots:
+                with self.__lock:
+                    self.__stats["requests"] += 1
+                    self.__stats["in_flight"] += 1
+                    self.__stats["peak_in_flight"] = max(
+                        self.__stats["peak_in_flight"], self.__stats["in_flight"]
+                    )
+                try:
+                    result = func(*args, **kwargs)
+                    with self.__lock:
+                        self.__stats["successes"] += 1
+                    return result
+                except RetryableError as e:
+                    if attempt >= self.__max_retries:
+                        with self.__lock:
+                            self.__stats["failures"] += 1
+                        raise e
+                    retry_after = e.retry_after
+                except Exception as e:
+                    with self.__lock:
+                        self.__stats["failures"] += 1
+                    raise e
+                finally:
+                    with self.__lock:
+                        self.__stats["in_flight"] -= 1
+            # the in-flight slot is released while waiting
+            delay = max(retry_after, self.get_backoff(attempt))
+            with self.__lock:
+                self.__stats["retries"] += 1
+                self.__stats["backoff_seconds"] += delay
+            time.sleep(delay)
+            attempt += 1
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        with self.__lock:
+            return dict(self.__stats)
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Union
+
+
+class ResponseCache:
+    """
+    On-disk cache of vendor responses, one Parquet file per (vendor, ticker, interval,
+    date range) request, named by the SHA-256 of that key.
+    Responses whose range ends within recent_window of today can still change at the
+    vendor and expire after ttl seconds, older ones never expire.
+    Other lookups such as ticker details and index constituents are kept as JSON records
+    that expire after ttl seconds.
+    In offline mode entries never expire and a miss raises instead of going to the network.
+    """
+
+    __directory: str
+    __ttl: float
+    __recent_window: timedelta
+    __offline: bool
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = 3600,
+        recent_window: timedelta = timedelta(days=3),
+        offline: bool = False,
+    ) -> None:
+        self.__directory = directory
+        self.__ttl = ttl
+        self.__recent_window = recent_window
+        self.__offline = offline
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def offline(self) -> bool:
+        return self.__offline
+
+    def __get_path(
+        self,
+        vendor: str,
+        ticker: str,
+        interval: int,
+        start_date: str,
+        end_date: str,
+        variant: str,
+    ) -> str:
+        key = "|".join([vendor, ticker, str(interval), start_date, end_date, variant])
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.__directory, vendor, digest[:2], f"{digest}.parquet")
+
+    def __get_record_path(self, vendor: str, kind: str, key: str) -> str:
+        digest = hashlib.sha256("|".join([vendor, kind, key]).encode()).hexdigest()
+        return os.path.join(self.__directory, vendor, digest[:2], f"{digest}.json")
+
+    @staticmethod
+    def __write(path: str, write: Callable[[str], None]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written to a temporary file first so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(temp_path)
+        os.replace(temp_path, path)
+
+    def __count(self, hit: bool) -> None:
+        with self.__lock:
+            if hit:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+
+    def __is_fresh(self, path: str, end_date: str) -> bool:
+        if self.__offline:
+            return True
+        if (
+            datetime.strptime(end_date, "%Y-%m-%d")
+            < datetime.now() - self.__recent_window
+        ):
+            return True
+        return time.time() - os.path.getmtime(path) < self.__ttl
+
+    def get(
+        self,
+        vendor: str,
+        ticker: str,
+        interval: int,
+        start_date: str,
+        end_date: str,
+        variant: str = "",
+    ) -> Union[pd.DataFrame, None]:
+        """
+        Returns the stored response, None when it is missing or expired.
+        variant separates responses of the same range that were processed differently.
+        """
+        path = self.__get_path(vendor, ticker, interval, start_date, end_date, variant)
+        if os.path.exists(path) and self.__is_fresh(path, end_date):
+            try:
+                data = pd.read_parquet(path)
+                self.__count(True)
+                return data
+            except Exception:
+                # a partially written or corrupt file is treated as a miss
+                pass
+        self.__count(False)
+        if self.__offline:
+            raise Exception(
+                f"{vendor} {ticker} {interval} {start_date} to {end_date} is not in the offline cache"
+            )
+        return None
+
+    def put(
+        self,
+        vendor: str,
+        ticker: str,
+        interval: int,
+        start_date: str,
+        end_date: str,
+        data: pd.DataFrame,
+        variant: str = "",
+    ) -> None:
+        """
+        Stores a response, empty frames are not stored as they are usually failed requests.
+        """
+        if data is None or data.empty:
+            return
+        path = self.__get_path(vendor, ticker, interval, start_date, end_date, variant)
+        ResponseCache.__write(path, data.to_parquet)
+
+    def get_record(self, vendor: str, kind: str, key: str) -> Union[Any, None]:
+        """
+        Returns the record stored under (kind, key), None when it is missing or expired.
+        """
+        path = self.__get_record_path(vendor, kind, key)
+        if os.path.exists(path) and (
+            self.__offline or time.time() - os.path.getmtime(path) < self.__ttl
+        ):
+            try:
+                with open(path, "r") as file:
+                    record = json.load(file)
+                self.__count(True)
+                return record
+            except Exception:
+                pass
+        self.__count(False)
+        if self.__offline:
+            raise Exception(f"{vendor} {kind} {key} is not in the offline cache")
+        return None
+
+    def put_record(self, vendor: str, kind: str, key: str, record: Any) -> None:
+        """
+        Stores a JSON serialisable record under (kind, key).
+        """
+
+        def write(temp_path: str) -> None:
+            with open(temp_path, "w") as file:
+                json.dump(record, file)
+
+        ResponseCache.__write(self.__get_record_path(vendor, kind, key), write)
+
+    def load_record(
+        self, vendor: str, kind: str, key: str, load: Callable[[], Any]
+    ) -> Any:
+        """
+        Returns the record stored under (kind, key), otherwise the result of load(), which is
+        stored. In offline mode load is never called.
+        """
+        record = self.get_record(vendor, kind, key)
+        if record is None:
+            record = load()
+            self.put_record(vendor, kind, key, record)
+        return record
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {"hits": self.__hits, "misses": self.__misses}
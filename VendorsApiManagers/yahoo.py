@@ -3,14 +3,19 @@ import time
 import numpy as np
 import pandas as pd
 import yfinance as yf
-import importlib
+import threading
 from commons import INTERVAL
 from Exchanges.nse_tickers import NSETickers
 from VendorsApiManagers.api_manager import APIManager
-from typing import Union, Dict, List
+from typing import Union, Dict, List, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 from Exchanges.index_loader import IndexLoader
+from VendorsApiManagers.request_scheduler import RetryableError
+from VendorsApiManagers.response_cache import ResponseCache
+from requests import Session
+from requests.adapters import HTTPAdapter
+from vendor_registry import get_vendor_registry
 from commons import EXCHANGE, VENDOR, INTERVAL
 
 
@@ -40,8 +45,30 @@ class YFINANCE_BENCHMARK_INDEX(Enum):
 
 
 class YahooData(APIManager):
-    def __init__(self, login_credentials: Dict[str, str]) -> None:
-        super().__init__(login_credentials)
+    # yf.download keeps its results in module level state, so concurrent calls from
+    # SecuritiesMaster.get_prices workers must not overlap
+    __download_lock = threading.Lock()
+    __session: Union[Session, None] = None
+    __session_lock = threading.Lock()
+    # yf.download sends one request per ticker, so a batch costs len(batch) tokens
+    _requests_per_second: float = 2
+    _burst: int = 50
+    __transient_errors = [
+        "status_code",
+        "429",
+        "Too Many Requests",
+        "timed out",
+        "Timeout",
+        "Connection",
+        "CURRENTLY DOWN",
+    ]
+
+    def __init__(
+        self,
+        login_credentials: Dict[str, str],
+        response_cache: Union[ResponseCache, None] = None,
+    ) -> None:
+        super().__init__(login_credentials, response_cache)
 
     @staticmethod
     def __get_valid_interval(interval: int) -> str:
@@ -63,7 +90,70 @@ class YahooData(APIManager):
         return valid_intervals[interval]
 
     @staticmethod
+    def __split_batch(
+        data: pd.DataFrame, formatted_ticker: str, batch_length: int
+    ) -> pd.DataFrame:
+        """
+        Extracts a single ticker's frame from the combined result of a batched yf.download call,
+        columns are grouped by ticker when more than one ticker was requested.
+        """
+        if data is None or data.empty:
+            return pd.DataFrame()
+        if isinstance(data.columns, pd.MultiIndex):
+            if formatted_ticker not in data.columns.get_level_values(0):
+                return pd.DataFrame()
+            df = data[formatted_ticker]
+        elif batch_length == 1:
+            df = data
+        else:
+            return pd.DataFrame()
+        return df.dropna(how="all")
+
+    @staticmethod
+    def __is_transient(error: str) -> bool:
+        return any(marker in error for marker in YahooData.__transient_errors)
+
+    @staticmethod
+    def __download_batch(
+        formatted_tickers: List[str],
+        start_date: str,
+        end_date: str,
+        interval: str,
+        progress: bool,
+    ) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        Single yf.download call, returns the combined data and the error of each ticker that failed.
+        Raises RetryableError when every ticker failed for a transient reason.
+        """
+        with YahooData.__download_lock:
+            try:
+                data = yf.download(
+                    tickers=formatted_tickers,
+                    start=start_date,
+                    end=end_date,
+                    interval=interval,
+                    group_by="ticker",
+                    progress=progress,
+                )
+            except Exception as e:
+                if YahooData.__is_transient(repr(e)):
+                    raise RetryableError(repr(e))
+                raise e
+            # yfinance reports per ticker failures here instead of raising
+            errors: Dict[str, str] = dict(yf.shared._ERRORS)
+        errors = {
+            ticker: errors[ticker.upper()]
+            for ticker in formatted_tickers
+            if ticker.upper() in errors
+        }
+        if len(errors) == len(formatted_tickers) and all(
+            YahooData.__is_transient(error) for error in errors.values()
+        ):
+            raise RetryableError(f"{formatted_tickers}: {list(errors.values())[0]}")
+        return data, errors
+
     def __download_data(
+        self,
         tickers: list,
         exchange: str,
         interval: int,
@@ -71,20 +161,31 @@ class YahooData(APIManager):
         end_datetime: datetime,
         replace_close=False,
         progress=False,
+        batch_size: int = 50,
+        retries: int = 2,
     ) -> Dict[str, pd.DataFrame]:
-        if len(tickers) < 0:
+        """
+        Downloads the tickers in groups of batch_size per vendor call and splits the combined result
+        back into per-ticker frames. Calls are paced by the vendor's request scheduler, tickers that
+        fail for a transient reason are retried up to retries times. Tickers yfinance reports an
+        error for are returned as failed responses, tickers it returns no rows for without an error
+        as empty DataFrames.
+        """
+        if len(tickers) == 0:
             raise Exception("tickers list is empty")
         if end_datetime < start_datetime:
             raise Exception(
                 f"start_datetime({start_datetime}) must be before end_datetime({end_datetime})"
             )
+        if batch_size < 1:
+            raise Exception(f"batch_size({batch_size}) must be at least 1")
         interval = YahooData.__get_valid_interval(interval)
 
         start_date, end_date = start_datetime.strftime(
             "%Y-%m-%d"
         ), end_datetime.strftime("%Y-%m-%d")
 
-        res_dict: Dict[str, str] = {}
+        res_dict: Dict[str, pd.DataFrame] = {}
 
         index_names = [index.name for index in YFINANCE_BENCHMARK_INDEX]
         formatted_tickers = list(
@@ -96,34 +197,90 @@ class YahooData(APIManager):
             )
         )
 
-        if len(tickers) == 1:
-            res_dict[tickers[0]] = yf.download(
-                tickers=formatted_tickers,
-                start=start_date,
-                end=end_date,
-                interval=interval,
-                progress=progress,
+        response_cache = self._response_cache
+        # processed frames are cached, so the key includes how they were processed
+        variant = f"replace_close={replace_close}"
+        pending: List[int] = []
+        for i, ticker in enumerate(tickers):
+            cached = (
+                None
+                if response_cache is None
+                else response_cache.get(
+                    VENDOR.YAHOO.name, ticker, interval, start_date, end_date, variant
+                )
             )
-        else:
-            for i, ticker in enumerate(tickers):
+            if cached is None:
+                pending.append(i)
+            else:
+                res_dict[ticker] = cached
+
+        scheduler = YahooData.get_request_scheduler()
+        errors: Dict[str, str] = {}
+        attempt = 0
+        while len(pending) > 0 and attempt <= retries:
+            failed: List[int] = []
+            for batch_start in range(0, len(pending), batch_size):
+                batch = pending[batch_start : batch_start + batch_size]
                 try:
-                    df = yf.download(
-                        tickers=formatted_tickers[i],
-                        start=start_date,
-                        end=end_date,
-                        interval=interval,
-                        progress=False,
+                    data, batch_errors = scheduler.call(
+                        YahooData.__download_batch,
+                        [formatted_tickers[i] for i in batch],
+                        start_date,
+                        end_date,
+                        interval,
+                        progress,
+                        cost=len(batch),
                     )
-                    res_dict[ticker] = APIManager.process_OHLC_dataframe(
-                        dataframe=df, replace_close=replace_close
-                    )
-                except:
-                    res_dict[ticker] = pd.DataFrame()
+                except RetryableError as e:
+                    # the scheduler has already retried the batch with backoff
+                    for i in batch:
+                        errors[tickers[i]] = str(e)
+                    continue
 
-        return res_dict
+                for i in batch:
+                    # history() swallows HTTP and JSON errors and reports them as messages like
+                    # "No data found for this date range, symbol may be delisted", so every
+                    # reported ticker is a failure, only the known transient ones are retried
+                    error = batch_errors.get(formatted_tickers[i])
+                    if error is not None:
+                        errors[tickers[i]] = error
+                        if YahooData.__is_transient(error):
+                            failed.append(i)
+                        continue
+                    errors.pop(tickers[i], None)
+                    df = YahooData.__split_batch(data, formatted_tickers[i], len(batch))
+                    if not df.empty:
+                        res_dict[tickers[i]] = APIManager.process_OHLC_dataframe(
+                            dataframe=df, replace_close=replace_close
+                        )
+                        if response_cache is not None:
+                            response_cache.put(
+                                VENDOR.YAHOO.name,
+                                tickers[i],
+                                interval,
+                                start_date,
+                                end_date,
+                                res_dict[tickers[i]],
+                                variant,
+                            )
+            pending = failed
+            if len(pending) > 0 and attempt < retries:
+                time.sleep(scheduler.get_backoff(attempt))
+            attempt += 1
+
+        return {
+            ticker: res_dict[ticker]
+            if ticker in res_dict
+            else (
+                APIManager.failed_response(errors[ticker])
+                if ticker in errors
+                else pd.DataFrame()
+            )
+            for ticker in tickers
+        }
 
-    @staticmethod
     def get_data(
+        self,
         interval: int,
         start_datetime: datetime,
         end_datetime: datetime,
@@ -132,25 +289,28 @@ class YahooData(APIManager):
         index: str = None,
         replace_close=False,
         progress=False,
+        batch_size: int = 50,
+        retries: int = 2,
     ) -> Dict[str, pd.DataFrame]:
         """Gets the tickers in the index, downloads the data, for each of them and processes those that are not empty before returning"""
         if tickers is None and index is None:
             raise Exception("Either 'tickers' of 'index' must be given")
         if index is not None and tickers is None:
-            exchange_obj: IndexLoader = getattr(
-                importlib.import_module(
-                    name=f"Exchanges.{EXCHANGE(exchange).name.lower()}_tickers"
-                ),  # module name
-                f"{EXCHANGE(exchange).name}Tickers",  # class name
-            )
-            tickers = list(
-                map(
-                    lambda ticker: f"{ticker}.{getattr(EXCHANGE_SUFFIX, EXCHANGE(exchange).name).value}",
-                    exchange_obj.get_tickers(index=index).keys(),
+            exchange_obj: IndexLoader = get_vendor_registry().get_index_loader(exchange)
+            constituents: Dict[str, str] = (
+                exchange_obj.get_tickers(index=index)
+                if self._response_cache is None
+                else self._response_cache.load_record(
+                    EXCHANGE(exchange).name,
+                    "index_constituents",
+                    index,
+                    lambda: exchange_obj.get_tickers(index=index),
                 )
             )
+            # __download_data adds the exchange suffix
+            tickers = list(constituents.keys())
 
-        return YahooData.__download_data(
+        return self.__download_data(
             tickers=tickers,
             exchange=exchange,
             interval=interval,
@@ -158,6 +318,8 @@ class YahooData(APIManager):
             end_datetime=end_datetime,
             replace_close=replace_close,
             progress=progress,
+            batch_size=batch_size,
+            retries=retries,
         )
 
     @staticmethod
@@ -165,5 +327,38 @@ class YahooData(APIManager):
         return f"{ticker}.{getattr(EXCHANGE_SUFFIX, EXCHANGE(exchange).name).value}"
 
     @staticmethod
-    def get_ticker_detail(ticker: str, exchange: str, detail: str) -> str:
-        return yf.Ticker(YahooData.get_vendor_ticker(ticker, exchange)).info[detail]
+    def __get_session() -> Session:
+        """
+        Session shared by the metadata requests, so connections to Yahoo are pooled
+        instead of opened per request.
+        """
+        with YahooData.__session_lock:
+            if YahooData.__session is None:
+                session = Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=YahooData._max_in_flight
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                YahooData.__session = session
+            return YahooData.__session
+
+    @staticmethod
+    def __get_ticker_info(vendor_ticker: str) -> Dict[str, str]:
+        try:
+            return yf.Ticker(vendor_ticker, session=YahooData.__get_session()).info
+        except Exception as e:
+            if YahooData.__is_transient(repr(e)):
+                raise RetryableError(repr(e))
+            raise e
+
+    def fetch_ticker_details(
+        self, ticker: str, exchange: str, details: List[str]
+    ) -> Dict[str, str]:
+        info = YahooData.get_request_scheduler().call(
+            YahooData.__get_ticker_info, YahooData.get_vendor_ticker(ticker, exchange)
+        )
+        return {detail: info.get(detail) for detail in details}
+
+    def get_ticker_detail(self, ticker: str, exchange: str, detail: str) -> str:
+        return self.get_ticker_details([ticker], exchange, [detail])[ticker][detail]
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Union,
+)
+
+from database import POOL_SETTINGS
+
+# only needed for annotations, so that importing this module does not load pandas
+if TYPE_CHECKING:
+    import pandas as pd
+    from securities_master import SecuritiesMaster
+
+
+class AsyncSecuritiesMaster:
+    """
+    Awaitable facade over SecuritiesMaster for use from an event loop.
+    Database calls run on an executor sized to the connection pool and vendor
+    downloads run on a separate, smaller executor, so neither blocks the loop
+    and a burst of get_prices requests cannot starve the row and table calls.
+    The SecuritiesMaster can be given as a factory, it is then built on an executor
+    thread the first time it is needed.
+    """
+
+    __securities_master: Union[SecuritiesMaster, None]
+    __factory: Union[Callable[[], SecuritiesMaster], None]
+    __db_executor: ThreadPoolExecutor
+    __vendor_executor: ThreadPoolExecutor
+
+    def __init__(
+        self,
+        securities_master: Union[SecuritiesMaster, Callable[[], SecuritiesMaster]],
+        db_workers: Union[int, None] = None,
+        vendor_workers: Union[int, None] = None,
+    ) -> None:
+        """
+        db_workers should not exceed the pool's pool_size + max_overflow, which is its
+        default, vendor_workers defaults to one less than pool_size so that downloads
+        leave a pooled connection to the database calls. Requests beyond db_workers and
+        vendor_workers wait in their executor's queue.
+        """
+        if db_workers is None:
+            db_workers = POOL_SETTINGS["pool_size"] + max(
+                POOL_SETTINGS["max_overflow"], 0
+            )
+        if vendor_workers is None:
+            vendor_workers = max(POOL_SETTINGS["pool_size"] - 1, 1)
+        if db_workers < 1 or vendor_workers < 1:
+            raise Exception("db_workers and vendor_workers must be at least 1")
+        if callable(securities_master):
+            self.__securities_master = None
+            self.__factory = securities_master
+        else:
+            self.__securities_master = securities_master
+            self.__factory = None
+        self.__build_lock = threading.Lock()
+        self.__db_executor = ThreadPoolExecutor(
+            max_workers=db_workers, thread_name_prefix="securities-master-db"
+        )
+        self.__vendor_executor = ThreadPoolExecutor(
+            max_workers=vendor_workers, thread_name_prefix="securities-master-vendor"
+        )
+
+    def __get_securities_master(self) -> SecuritiesMaster:
+        if self.__securities_master is None:
+            with self.__build_lock:
+                if self.__securities_master is None:
+                    self.__securities_master = self.__factory()
+        return self.__securities_master
+
+    @property
+    def securities_master(self) -> SecuritiesMaster:
+        return self.__get_securities_master()
+
+    async def preload(self) -> None:
+        """
+        Builds the SecuritiesMaster ahead of the first request that needs it.
+        """
+        await self.__run(self.__db_executor, self.__get_securities_master)
+
+    @staticmethod
+    async def __run(
+        executor: ThreadPoolExecutor, func: Callable, *args, **kwargs
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def __call(self, method: str, *args, **kwargs) -> Any:
+        return getattr(self.__get_securities_master(), method)(*args, **kwargs)
+
+    async def __run_db(self, method: str, *args, **kwargs) -> Any:
+        """
+        Calls the SecuritiesMaster method named method on the database executor.
+        """
+        return await self.__run(
+            self.__db_executor, self.__call, method, *args, **kwargs
+        )
+
+    async def get_all_tables(self) -> List[str]:
+        return await self.__run_db("get_all_tables")
+
+    async def get_table(self, table_name: str, **kwargs) -> pd.DataFrame:
+        return await self.__run_db("get_table", table_name, **kwargs)
+
+    async def get_table_key(self, table_name: str) -> List[str]:
+        return await self.__run_db("get_table_key", table_name)
+
+    async def stream_table(
+        self, table_name: str, chunk_size: int = 10_000, **kwargs
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Async iterator over SecuritiesMaster.stream_table, each chunk is fetched on the
+        database executor. The arguments are checked before this returns.
+        """
+        chunks = await self.__run_db("stream_table", table_name, chunk_size, **kwargs)
+        return self.__iterate_chunks(chunks)
+
+    async def __iterate_chunks(
+        self, chunks: Iterator[List[Dict[str, Any]]]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        in_flight: Union[asyncio.Future, None] = None
+        try:
+            while True:
+                in_flight = loop.run_in_executor(self.__db_executor, next, chunks, None)
+                # shielded so that a cancelled request leaves next() running to completion
+                chunk = await asyncio.shield(in_flight)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            # closing the generator while next() runs on the executor would fail and leak
+            # its connection, so the in-flight call is waited for first
+            if in_flight is not None and not in_flight.done():
+                await asyncio.wait([in_flight])
+            await self.__run(self.__db_executor, chunks.close)
+
+    async def get_table_columns(self, table_name: str) -> List[str]:
+        return await self.__run_db("get_table_columns", table_name)
+
+    async def get_primary_key(self, table_name: str) -> List[str]:
+        return await self.__run_db("get_primary_key", table_name)
+
+    async def add_row(self, table_name: str, row_data: Dict[str, str]) -> None:
+        await self.__run_db("add_row", table_name, row_data)
+
+    async def get_row(
+        self, table_name: str, primary_key_values: Dict[str, str]
+    ) -> Dict[str, str]:
+        return await self.__run_db("get_row", table_name, primary_key_values)
+
+    async def edit_row(
+        self,
+        table_name: str,
+        old_row_data: Dict[str, str],
+        new_row_data: Dict[str, str],
+    ) -> None:
+        await self.__run_db("edit_row", table_name, old_row_data, new_row_data)
+
+    async def delete_row(self, table_name: str, row_data: Dict[str, str]) -> None:
+        await self.__run_db("delete_row", table_name, row_data)
+
+    async def delete_table(self, table_name: str) -> None:
+        await self.__run_db("delete_table", table_name)
+
+    async def bulk_load_prices(
+        self, data: pd.DataFrame, table_name: str, **kwargs
+    ) -> Dict[str, float]:
+        return await self.__run_db("bulk_load_prices", data, table_name, **kwargs)
+
+    async def get_pool_stats(self) -> Dict[str, Union[int, float, str]]:
+        return await self.__run_db("get_pool_stats")
+
+    async def get_prices(
+        self,
+        interval: int,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        vendor: str,
+        exchange: str,
+        instrument: str,
+        **kwargs,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Runs SecuritiesMaster.get_prices on the vendor executor, accepts the same
+        keyword arguments.
+        """
+        return await self.__run(
+            self.__vendor_executor,
+            self.__call,
+            "get_prices",
+            interval=interval,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            vendor=vendor,
+            exchange=exchange,
+            instrument=instrument,
+            **kwargs,
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.__db_executor.shutdown(wait=wait)
+        self.__vendor_executor.shutdown(wait=wait)
@@ -0,0 +1,86 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from securities_master import SecuritiesMaster
+from credentials import psql_credentials
+from commons import COPY_FORMAT, READ_MODE
+from response_formats import encode_prices_json
+
+dm = SecuritiesMaster(
+    psql_credentials["host"],
+    psql_credentials["port"],
+    psql_credentials["username"],
+    psql_credentials["password"],
+)
+
+
+def make_price_frame(rows: int) -> pd.DataFrame:
+    index = pd.date_range(datetime(2000, 1, 1), periods=rows, freq="T", name="Datetime")
+    close = 100 + np.cumsum(np.random.standard_normal(rows))
+    return pd.DataFrame(
+        {
+            "Open": close + np.random.standard_normal(rows),
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": np.random.randint(0, 1_000_000, rows),
+        },
+        index=index,
+    )
+
+
+def benchmark_read_modes(rows: int = 1_000_000, table_name: str = "benchmark_prices"):
+    data = make_price_frame(rows)
+    data.head(0).to_sql(
+        name=table_name,
+        con=f'postgresql+psycopg2://{psql_credentials["username"]}:{psql_credentials["password"]}@{psql_credentials["host"]}:{psql_credentials["port"]}/securities_master',
+        if_exists="replace",
+        index=True,
+    )
+    try:
+        print(
+            f"COPY load: {dm.bulk_load_prices(data, table_name, COPY_FORMAT.CSV.value)}"
+        )
+        for read_mode in READ_MODE:
+            t1 = time.time()
+            table = dm.get_table(table_name, read_mode=read_mode.value)
+            t2 = time.time()
+            print(
+                f"{read_mode.value}: {table.shape[0]} rows in {t2 - t1:.3f}s, {table.shape[0] / (t2 - t1):.0f} rows/s"
+            )
+    finally:
+        dm.delete_table(table_name)
+
+
+def encode_records_json(data: dict) -> bytes:
+    """
+    The default records encoding of /get-prices, one dict per bar.
+    """
+    records = {}
+    for ticker in data:
+        table = data[ticker].copy(deep=True)
+        table.index = table.index.to_series().dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        records[ticker] = table.reset_index(drop=False).to_dict(orient="records")
+    return json.dumps(records).encode()
+
+
+def benchmark_price_serializers(rows: int = 1_000_000):
+    data = {"BENCHMARK": make_price_frame(rows)}
+    for name, encoder in (
+        ("records", encode_records_json),
+        ("columns", encode_prices_json),
+    ):
+        t1 = time.time()
+        content = encoder(data)
+        t2 = time.time()
+        print(
+            f"{name}: {rows} bars, {len(content) / 1e6:.1f} MB in {t2 - t1:.3f}s, {rows / (t2 - t1):.0f} bars/s"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_read_modes()
+    benchmark_price_serializers()
@@ -12,6 +12,21 @@ class EXCHANGE(Enum):
     BSE = "Bombay Stock Exchange"
 
 
+class EXCHANGE_TIME_ZONE(Enum):
+    NSE = "Asia/Kolkata"
+    BSE = "Asia/Kolkata"
+
+
+class EXCHANGE_SESSION_START(Enum):
+    NSE = "09:15"
+    BSE = "09:15"
+
+
+class EXCHANGE_SESSION_END(Enum):
+    NSE = "15:30"
+    BSE = "15:30"
+
+
 class INSTRUMENT(Enum):
     STOCK = "Stock"
     ETF = "Exchange Traded Fund"
@@ -44,6 +59,32 @@ class INTERVAL(Enum):
     y1 = 31104000000
 
 
+class STORAGE(Enum):
+    TABLE = "Table Per Series"
+    CONSOLIDATED = "Consolidated Prices Table"
+
+
+class COPY_FORMAT(Enum):
+    CSV = "csv"
+    BINARY = "binary"
+
+
+class READ_MODE(Enum):
+    PANDAS = "pandas"
+    COPY = "copy"
+
+
+class RESPONSE_FORMAT(Enum):
+    JSON = "application/json"
+    ARROW = "application/vnd.apache.arrow.stream"
+    PARQUET = "application/vnd.apache.parquet"
+
+
+class JSON_LAYOUT(Enum):
+    RECORDS = "records"
+    COLUMNS = "columns"
+
+
 class NSE_URL(Enum):
     ALL_TICKERS = "https://nsearchives.nseindia.com/content/equities/EQUITY_L.csv"
     NIFTY50 = "https://archives.nseindia.com/content/indices/ind_nifty50list.csv"
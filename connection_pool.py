@@ -0,0 +1,100 @@
+import time
+import threading
+import sqlalchemy
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from typing import Dict, Union
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection,
+    how many checkouts timed out and the peak number of connections in use.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.__stats_lock = threading.Lock()
+        self.__checkouts = 0
+        self.__timeouts = 0
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+        self.__peak_checked_out = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self.__stats_lock:
+                self.__timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        with self.__stats_lock:
+            self.__checkouts += 1
+            self.__wait_total += waited
+            self.__wait_max = max(self.__wait_max, waited)
+            self.__peak_checked_out = max(self.__peak_checked_out, self.checkedout())
+        return conn
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns the current pool occupancy along with the checkout wait statistics,
+        saturation is the fraction of pool_size + max_overflow currently checked out.
+        """
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        with self.__stats_lock:
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": checked_out,
+                "checked_in": self.checkedin(),
+                "overflow": self.overflow(),
+                "saturation": checked_out / capacity if capacity > 0 else 0.0,
+                "peak_checked_out": self.__peak_checked_out,
+                "checkouts": self.__checkouts,
+                "timeouts": self.__timeouts,
+                "wait_seconds_total": self.__wait_total,
+                "wait_seconds_avg": (
+                    self.__wait_total / self.__checkouts
+                    if self.__checkouts > 0
+                    else 0.0
+                ),
+                "wait_seconds_max": self.__wait_max,
+            }
+
+
+def create_pooled_engine(
+    url: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_recycle: int = 1800,
+    pool_pre_ping: bool = True,
+    pool_timeout: float = 30,
+    **kwargs,
+) -> sqlalchemy.engine.Engine:
+    """
+    Creates an engine backed by an InstrumentedQueuePool. pool_recycle replaces
+    connections older than that many seconds and pool_pre_ping tests each connection
+    on checkout so that ones dropped by the server are never handed out.
+    """
+    return sqlalchemy.create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        pool_timeout=pool_timeout,
+        **kwargs,
+    )
+
+
+def get_pool_stats(
+    engine: sqlalchemy.engine.Engine,
+) -> Dict[str, Union[int, float, str]]:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.get_stats()
+    return {"status": pool.status()}
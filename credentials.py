@@ -0,0 +1,8 @@
+psql_credentials = {
+    "host": "127.0.0.1",
+    "port": 5432,
+    "username": "postgres",
+    "password": "pw",
+}
+JWT_SECRET_KEY = "x"
+JWT_REFRESH_SECRET_KEY = "y"
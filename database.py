@@ -1,12 +1,46 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from connection_pool import create_pooled_engine
 from credentials import psql_credentials
+from commons import STORAGE
 
 DATABASE_URL = f'postgresql+psycopg2://{psql_credentials["username"]}:{psql_credentials["password"]}@{psql_credentials["host"]}:{psql_credentials["port"]}/securities_master'
 
-engine = create_engine(DATABASE_URL)
+# shared by the auth tables and SecuritiesMaster, override any of these
+# with a "pool" dict in psql_credentials
+POOL_SETTINGS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+    "pool_timeout": 30,
+}
+POOL_SETTINGS.update(psql_credentials.get("pool", {}))
+
+# where SecuritiesMaster keeps cached prices, a STORAGE value, migrations.py and the
+# API workers must agree on it
+PRICE_STORAGE = psql_credentials.get("storage", STORAGE.TABLE.value)
+
+engine = create_pooled_engine(DATABASE_URL, **POOL_SETTINGS)
 
 Base = declarative_base()
 
 local_session = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@contextmanager
+def session_scope() -> Session:
+    """
+    Yields a session that is committed on success, rolled back on error
+    and always closed so its connection goes back to the pool.
+    """
+    session = local_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -81,6 +81,10 @@ def add_nse_indices():
         )
 
 
+def migrate_price_tables():
+    dm.migrate_price_tables(drop_tables=False)
+
+
 def temp_script():
     dm.temp()
 
@@ -1,14 +1,23 @@
+from startup_timer import StartupTimer
+
+# created first so that the imports below are timed as well
+startup_timer = StartupTimer()
+
 import jwt
+import json
+import base64
+import asyncio
+import logging
 import schemas
 import models
-import pandas as pd
 
 from models import User
-from database import Base, engine, local_session
-from fastapi import FastAPI, Depends, HTTPException, status
+from database import engine, session_scope, PRICE_STORAGE
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 from auth_bearer import JWTBearer
 from functools import wraps
@@ -21,32 +30,87 @@ from utils import (
     JWT_REFRESH_SECRET_KEY,
     ALGORITHM,
 )
-from typing import Dict, List
-from securities_master import SecuritiesMaster
+from typing import Any, AsyncIterator, Dict, List, Union
+from async_securities_master import AsyncSecuritiesMaster
 from credentials import psql_credentials
-from datetime import datetime
+from commons import RESPONSE_FORMAT, JSON_LAYOUT, EXCHANGE, EXCHANGE_TIME_ZONE
+from migrations import migrate
+from datetime import datetime, date
+from decimal import Decimal
 
+startup_timer.mark("imports")
 
-Base.metadata.create_all(engine)
+logger = logging.getLogger(__name__)
+
+# the schema is applied by running migrations.py once per deploy, set
+# "migrate_on_startup" in psql_credentials to apply it on every worker boot instead
+if psql_credentials.get("migrate_on_startup", False):
+    with startup_timer.phase("migrate"):
+        migrate()
 
 
 def get_session() -> None:
-    session = local_session()
-    try:
+    with session_scope() as session:
         yield session
-    finally:
-        session.close()
 
 
-securities_master = SecuritiesMaster(
-    psql_credentials["host"],
-    psql_credentials["port"],
-    psql_credentials["username"],
-    psql_credentials["password"],
-)
+def build_securities_master():
+    """
+    SecuritiesMaster pulls in pandas, numpy and the vendor libraries, so it is imported
+    and built on first use instead of when the worker boots.
+    """
+    with startup_timer.phase("securities_master"):
+        from securities_master import SecuritiesMaster
+
+        return SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=engine,
+            storage=PRICE_STORAGE,
+            create_schema=False,
+        )
+
+
+securities_master = AsyncSecuritiesMaster(build_securities_master)
 
 app = FastAPI()
 
+startup_timer.mark("app")
+
+
+@app.on_event("startup")
+async def preload_securities_master() -> None:
+    startup_timer.mark("ready")
+    # built in the background, the worker serves requests in the meantime, the task is
+    # kept on app.state so that it is not garbage collected before it completes
+    app.state.preload_task = asyncio.get_running_loop().create_task(
+        securities_master.preload()
+    )
+    app.state.preload_task.add_done_callback(log_preload_failure)
+
+
+def log_preload_failure(task: asyncio.Task) -> None:
+    """
+    A failed preload is only logged, the first request that needs the SecuritiesMaster
+    builds it again and receives the error if it still fails.
+    """
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error(
+            "Preloading the SecuritiesMaster failed",
+            exc_info=(type(error), error, error.__traceback__),
+        )
+
+
+@app.on_event("shutdown")
+def shutdown_securities_master() -> None:
+    securities_master.shutdown()
+
+
 origins = ["*"]
 
 app.add_middleware(
@@ -55,11 +119,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
 @app.post("/register")
-async def register_user(
+def register_user(
     user: schemas.UserCreate, session: Session = Depends(get_session)
 ) -> Dict:
     existing_user = session.query(User).filter_by(username=user.username).first()
@@ -78,9 +143,7 @@ async def register_user(
 
 
 @app.post("/login", response_model=schemas.TokenSchema)
-async def login(
-    request: schemas.RequestDetails, db: Session = Depends(get_session)
-) -> Dict:
+def login(request: schemas.RequestDetails, db: Session = Depends(get_session)) -> Dict:
     user: User = db.query(User).filter(User.username == request.username).first()
     if user is None:
         raise HTTPException(
@@ -110,7 +173,7 @@ async def login(
 
 
 @app.post("/change-password")
-async def change_password(
+def change_password(
     request: schemas.ChangePassword,
     dependencies=Depends(JWTBearer()),
     db: Session = Depends(get_session),
@@ -191,43 +254,166 @@ def token_required(func):
     return wrapper
 
 
+@app.get("/pool-stats")
+async def get_pool_stats(dependencies=Depends(JWTBearer())):
+    try:
+        return await securities_master.get_pool_stats()
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@app.get("/startup-stats")
+async def get_startup_stats(dependencies=Depends(JWTBearer())):
+    return startup_timer.get_phases()
+
+
 @app.get("/get-all-tables")
 async def get_all_tables(dependencies=Depends(JWTBearer())):
     try:
-        tables: List[str] = securities_master.get_all_tables()
+        tables: List[str] = await securities_master.get_all_tables()
         return {"tables": tables}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e)
 
 
+def json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Opaque keyset cursor holding the key values of the last row of a page.
+    """
+    content = json.dumps(
+        values,
+        default=lambda value: (
+            value.isoformat() if isinstance(value, (datetime, date)) else str(value)
+        ),
+    )
+    return base64.urlsafe_b64encode(content.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+
+def parse_where(where: List[str]) -> Dict[str, str]:
+    filters: Dict[str, str] = {}
+    for predicate in where:
+        column, separator, value = predicate.partition("=")
+        if separator == "":
+            raise Exception(f"{predicate} is not of the form column=value")
+        filters[column] = value
+    return filters
+
+
+async def ndjson_rows(
+    chunks: AsyncIterator[List[Dict[str, Any]]]
+) -> AsyncIterator[str]:
+    async for chunk in chunks:
+        yield "".join(json.dumps(row, default=json_default) + "\n" for row in chunk)
+
+
 @app.get("/{table_name}/get-table")
-async def get_table(table_name: str, dependencies=Depends(JWTBearer())):
+async def get_table(
+    table_name: str,
+    stream: bool = False,
+    chunk_size: int = 10_000,
+    columns: Union[List[str], None] = Query(default=None),
+    where: List[str] = Query(default=[]),
+    start_datetime: str = "",
+    end_datetime: str = "",
+    limit: Union[int, None] = None,
+    cursor: str = "",
+    descending: bool = False,
+    accept: Union[str, None] = Header(default=None),
+    dependencies=Depends(JWTBearer()),
+):
+    """
+    columns projects the table, where takes column=value equality filters and
+    start_datetime / end_datetime bound the Datetime column. With a limit the rows are
+    returned in key order and the X-Next-Cursor header, passed back as cursor, fetches
+    the next page. descending=true with a limit returns the last rows.
+    """
+    # imported on first use so that workers boot without pandas and pyarrow
+    import pandas as pd
+    from response_formats import negotiate_format, encode_frame
+
     try:
-        if table_name not in securities_master.get_all_tables():
+        if table_name not in await securities_master.get_all_tables():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Table not found"
             )
 
-        table = securities_master.get_table(table_name)
+        filters = parse_where(where)
+        table_columns = await securities_master.get_table_columns(table_name)
+        for column in (columns or []) + list(filters.keys()):
+            if column not in table_columns:
+                raise Exception(f"{column} is not a column of {table_name}")
+        query: Dict[str, Any] = {
+            "columns": columns,
+            "filters": filters if len(filters) > 0 else None,
+            "start_datetime": None
+            if start_datetime == ""
+            else datetime.strptime(start_datetime, "%Y-%m-%d %H:%M:%S"),
+            "end_datetime": None
+            if end_datetime == ""
+            else datetime.strptime(end_datetime, "%Y-%m-%d %H:%M:%S"),
+            "after": None if cursor == "" else decode_cursor(cursor),
+            "limit": limit,
+            "descending": descending,
+        }
+
+        if stream:
+            # one JSON object per line, read through a server-side cursor. The
+            # statement is built before the response starts so bad arguments are a 400
+            chunks = await securities_master.stream_table(
+                table_name, chunk_size, **query
+            )
+            return StreamingResponse(
+                ndjson_rows(chunks), media_type="application/x-ndjson"
+            )
+
+        table = await securities_master.get_table(table_name, **query)
+
+        headers: Dict[str, str] = {}
+        if limit is not None and len(table) == limit:
+            key_columns = await securities_master.get_table_key(table_name)
+            headers["X-Next-Cursor"] = encode_cursor(
+                table.iloc[-1][key_columns].tolist()
+            )
+
+        response_format = negotiate_format(accept)
+        if response_format != RESPONSE_FORMAT.JSON:
+            content = await run_in_threadpool(encode_frame, table, response_format)
+            return Response(
+                content=content, media_type=response_format.value, headers=headers
+            )
 
         if pd.api.types.is_datetime64_any_dtype(table.index.to_series()):
             table.index = table.index.to_series().dt.strftime("%Y-%m-%d %H:%M:%S.%f")
         for column in table.columns:
             if pd.api.types.is_datetime64_any_dtype(table[column]):
                 table[column] = table[column].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
-        return JSONResponse(content=table.to_dict(orient="records"))
+        return JSONResponse(content=table.to_dict(orient="records"), headers=headers)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @app.delete("/{table_name}/delete-table")
 async def delete_table(table_name: str):
-    if table_name not in securities_master.get_all_tables():
+    if table_name not in await securities_master.get_all_tables():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Table not found"
         )
     try:
-        securities_master.delete_table(table_name)
+        await securities_master.delete_table(table_name)
         return {"message": "table deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -235,16 +421,13 @@ async def delete_table(table_name: str):
 
 @app.post("/{table_name}/add-row")
 async def add_rows(table_name: str, row_data: Dict[str, int | float | str | None]):
-    if table_name not in securities_master.get_all_tables():
+    if table_name not in await securities_master.get_all_tables():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Table not found"
         )
-    if (
-        list(row_data.keys())
-        == securities_master.get_table(table_name).columns.to_list()
-    ):
+    if list(row_data.keys()) == await securities_master.get_table_columns(table_name):
         try:
-            securities_master.add_row(table_name, row_data)
+            await securities_master.add_row(table_name, row_data)
             return {"message": "Added a new row successfully"}
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -260,15 +443,15 @@ async def edit_row(
     old_row_data: Dict[str, int | float | str | None],
     new_row_data: Dict[str, int | float | str | None],
 ):
-    if table_name not in securities_master.get_all_tables():
+    if table_name not in await securities_master.get_all_tables():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Table not found"
         )
     if set(new_row_data.keys()).issubset(
-        set(securities_master.get_table(table_name).columns.to_list())
+        set(await securities_master.get_table_columns(table_name))
     ):
         try:
-            securities_master.edit_row(table_name, old_row_data, new_row_data)
+            await securities_master.edit_row(table_name, old_row_data, new_row_data)
             return {"message": "Edited a row successfully"}
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -280,12 +463,12 @@ async def edit_row(
 
 @app.delete("/{table_name}/delete-row")
 async def delete_row(table_name: str, row_data: Dict):
-    if table_name not in securities_master.get_all_tables():
+    if table_name not in await securities_master.get_all_tables():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Table not found"
         )
     try:
-        securities_master.delete_row(table_name, row_data)
+        await securities_master.delete_row(table_name, row_data)
         return {"message": "Row deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -303,9 +486,21 @@ async def get_prices(
     index: str = "",
     vendor_login_credentials: Dict[str, str] = {},
     cache_data=False,
+    layout: str = JSON_LAYOUT.RECORDS.value,
+    accept: Union[str, None] = Header(default=None),
 ):
+    # imported on first use so that workers boot without pandas and pyarrow
+    import pandas as pd
+    from response_formats import (
+        negotiate_format,
+        prices_to_frame,
+        get_errors,
+        encode_frame,
+        encode_prices_json,
+    )
+
     try:
-        data: Dict[str, pd.DataFrame] = securities_master.get_prices(
+        data: Dict[str, pd.DataFrame] = await securities_master.get_prices(
             interval=interval,
             start_datetime=datetime.strptime(start_datetime, "%Y-%m-%d %H:%M:%S"),
             end_datetime=datetime.strptime(end_datetime, "%Y-%m-%d %H:%M:%S"),
@@ -317,8 +512,39 @@ async def get_prices(
             vendor_login_credentials=vendor_login_credentials,
             cache_data=cache_data,
         )
+        # failed tickers do not stop the others, the request only fails when all of them did
+        errors = get_errors(data)
+        if len(errors) > 0 and len(errors) == len(data):
+            raise Exception(
+                "; ".join(f"{ticker}: {error}" for ticker, error in errors.items())
+            )
+
+        response_format = negotiate_format(accept)
+        if response_format != RESPONSE_FORMAT.JSON:
+            # one long frame with a ticker column instead of a dict of frames, on the
+            # exchange's clock, the errors go in the schema metadata
+            time_zone = EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value
+            content = await run_in_threadpool(
+                lambda: encode_frame(
+                    prices_to_frame(data, time_zone), response_format, errors
+                )
+            )
+            return Response(content=content, media_type=response_format.value)
+
+        if JSON_LAYOUT(layout) == JSON_LAYOUT.COLUMNS:
+            # column arrays with epoch millisecond timestamps, naive bars are on the
+            # exchange's clock
+            content = await run_in_threadpool(
+                encode_prices_json,
+                data,
+                EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value,
+            )
+            return Response(content=content, media_type=RESPONSE_FORMAT.JSON.value)
 
         for ticker in data:
+            if ticker in errors:
+                data[ticker] = {"error": errors[ticker]}
+                continue
             table = data[ticker].copy(deep=True)
             if pd.api.types.is_datetime64_any_dtype(table.index.to_series()):
                 table.index = table.index.to_series().dt.strftime(
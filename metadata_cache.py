@@ -0,0 +1,42 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class MetadataCache:
+    """
+    Thread safe cache of small, rarely changing lookups (vendors, exchanges, symbols,
+    the table list). Values expire after ttl seconds and can be invalidated explicitly
+    whenever the underlying table is written.
+    """
+
+    __ttl: float
+    __values: Dict[str, Tuple[float, Any]]
+
+    def __init__(self, ttl: float) -> None:
+        self.__ttl = ttl
+        self.__values = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for key, calling loader when it is missing or expired.
+        """
+        with self.__lock:
+            cached = self.__values.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.__ttl:
+                return cached[1]
+        value = loader()
+        if self.__ttl > 0:
+            with self.__lock:
+                self.__values[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        with self.__lock:
+            for key in keys:
+                self.__values.pop(key, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__values.clear()
@@ -0,0 +1,40 @@
+import time
+import models
+
+from typing import Dict
+from database import Base, engine, PRICE_STORAGE
+from credentials import psql_credentials
+
+
+def migrate(storage: str = PRICE_STORAGE) -> Dict[str, float]:
+    """
+    Creates the API's auth tables and the securities master schema, every step skips
+    objects that already exist. Run once per deploy before starting the API workers,
+    which do not check the schema themselves. Returns the seconds taken by each step.
+    """
+    # imported here as main imports this module and must not load pandas
+    from securities_master import SecuritiesMaster
+
+    timings: Dict[str, float] = {}
+    start_time = time.perf_counter()
+    Base.metadata.create_all(engine)
+    timings["auth_tables"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    SecuritiesMaster(
+        psql_credentials["host"],
+        psql_credentials["port"],
+        psql_credentials["username"],
+        psql_credentials["password"],
+        engine=engine,
+        storage=storage,
+        create_schema=False,
+    ).create_tables()
+    timings["securities_master"] = time.perf_counter() - start_time
+    return timings
+
+
+if __name__ == "__main__":
+    # the storage is set by "storage" in psql_credentials, as for the API workers
+    for step, seconds in migrate().items():
+        print(f"{step}: {seconds:.3f}s")
@@ -0,0 +1,142 @@
+import threading
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple, Union
+from commons import EXCHANGE, EXCHANGE_TIME_ZONE
+
+
+class PriceCache:
+    """
+    In-memory LRU cache of price series keyed by (ticker, vendor, exchange, interval).
+    Each entry keeps the time ranges its frame fully covers, so sub-range requests are
+    answered by slicing and overlapping ranges are merged into a single frame.
+    Entries are evicted in least recently used order to stay within max_bytes.
+    """
+
+    __max_bytes: int
+    __entries: "OrderedDict[Tuple, Dict]"
+
+    def __init__(self, max_bytes: int) -> None:
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __frame_bytes(frame: pd.DataFrame) -> int:
+        return int(frame.memory_usage(index=True, deep=True).sum())
+
+    @staticmethod
+    def __slice(
+        frame: pd.DataFrame,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        exchange: str,
+    ) -> pd.DataFrame:
+        """
+        Naive bounds are on the exchange's wall clock, timezone aware frames (e.g. stored
+        in UTC) are sliced at those instants.
+        """
+        if frame.empty:
+            return frame.copy()
+        start, end = pd.Timestamp(start_datetime), pd.Timestamp(end_datetime)
+        if getattr(frame.index, "tz", None) is not None:
+            time_zone = EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value
+            if start.tz is None:
+                start = start.tz_localize(time_zone)
+            if end.tz is None:
+                end = end.tz_localize(time_zone)
+            start, end = start.tz_convert(frame.index.tz), end.tz_convert(
+                frame.index.tz
+            )
+        return frame.loc[start:end].copy()
+
+    def get(
+        self, key: Tuple, start_datetime: datetime, end_datetime: datetime
+    ) -> Union[pd.DataFrame, None]:
+        """
+        Returns the cached bars between start_datetime and end_datetime, or None when
+        the range is not fully covered by the entry.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                for covered_start, covered_end in entry["ranges"]:
+                    if covered_start <= start_datetime and end_datetime <= covered_end:
+                        self.__entries.move_to_end(key)
+                        self.__hits += 1
+                        # keys are (ticker, vendor, exchange, interval)
+                        return self.__slice(
+                            entry["frame"], start_datetime, end_datetime, key[2]
+                        )
+            self.__misses += 1
+            return None
+
+    def put(
+        self,
+        key: Tuple,
+        frame: pd.DataFrame,
+        start_datetime: datetime,
+        end_datetime: datetime,
+    ) -> None:
+        """
+        Stores frame as covering start_datetime to end_datetime, merging it with the
+        entry's existing bars and ranges.
+        """
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            ranges: List[Tuple[datetime, datetime]] = [(start_datetime, end_datetime)]
+            if entry is not None:
+                self.__size -= entry["bytes"]
+                ranges += entry["ranges"]
+                frames = [data for data in (entry["frame"], frame) if not data.empty]
+                if len(frames) > 0:
+                    frame = pd.concat(frames)
+                    frame = frame[~frame.index.duplicated(keep="first")].sort_index()
+
+            merged: List[Tuple[datetime, datetime]] = []
+            for start, end in sorted(ranges):
+                if len(merged) > 0 and start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+
+            frame_bytes = self.__frame_bytes(frame)
+            if frame_bytes > self.__max_bytes:
+                return
+            self.__entries[key] = {
+                "frame": frame.copy(),
+                "ranges": merged,
+                "bytes": frame_bytes,
+            }
+            self.__size += frame_bytes
+            while self.__size > self.__max_bytes:
+                _, evicted = self.__entries.popitem(last=False)
+                self.__size -= evicted["bytes"]
+                self.__evictions += 1
+
+    def invalidate(self, key: Tuple) -> None:
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is not None:
+                self.__size -= entry["bytes"]
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "entries": len(self.__entries),
+                "bytes": self.__size,
+                "max_bytes": self.__max_bytes,
+            }
@@ -0,0 +1,154 @@
+import orjson
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from typing import Dict, List, Tuple, Union
+from commons import RESPONSE_FORMAT, JSON_LAYOUT
+
+# media types some clients send for the same formats
+MEDIA_TYPE_ALIASES: Dict[str, RESPONSE_FORMAT] = {
+    "application/x-parquet": RESPONSE_FORMAT.PARQUET,
+    "application/vnd.apache.arrow": RESPONSE_FORMAT.ARROW,
+}
+
+
+def negotiate_format(accept: Union[str, None]) -> RESPONSE_FORMAT:
+    """
+    Returns the supported format with the highest q value in the Accept header,
+    JSON when the header is missing or names none of the supported formats.
+    """
+    if not accept:
+        return RESPONSE_FORMAT.JSON
+    candidates: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in MEDIA_TYPE_ALIASES:
+            return MEDIA_TYPE_ALIASES[media_type]
+        try:
+            return RESPONSE_FORMAT(media_type)
+        except ValueError:
+            continue
+    return RESPONSE_FORMAT.JSON
+
+
+def prices_to_frame(
+    data: Dict[str, pd.DataFrame], time_zone: str = "UTC"
+) -> pd.DataFrame:
+    """
+    Stacks the per ticker frames returned by get_prices into one long frame with the
+    ticker as its first column and the datetime index as a "Datetime" column in time_zone.
+    Stored and freshly downloaded tickers come back with differently named indexes in
+    different time zones, naive indexes are taken to be in time_zone already.
+    Empty frames, such as failed responses, add no rows.
+    """
+    frames: List[pd.DataFrame] = []
+    for ticker, frame in data.items():
+        if frame.empty:
+            continue
+        index = frame.index
+        if isinstance(index, pd.DatetimeIndex):
+            index = (
+                index.tz_localize(time_zone)
+                if index.tz is None
+                else index.tz_convert(time_zone)
+            )
+        frame = frame.set_axis(index.rename("Datetime")).reset_index(drop=False)
+        frame.insert(0, "ticker", ticker)
+        frames.append(frame)
+    if len(frames) == 0:
+        return pd.DataFrame(columns=["ticker"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_errors(data: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+    """
+    Returns the error of each ticker get_prices returned a failed response for.
+    """
+    return {
+        ticker: frame.attrs["error"]
+        for ticker, frame in data.items()
+        if "error" in frame.attrs
+    }
+
+
+def encode_frame(
+    frame: pd.DataFrame,
+    response_format: RESPONSE_FORMAT,
+    errors: Union[Dict[str, str], None] = None,
+) -> bytes:
+    """
+    Serializes frame as an Arrow IPC stream or a Parquet file, clients can read
+    either back with pyarrow without parsing any text. errors, keyed by ticker, are
+    written as JSON to the "errors" entry of the schema metadata.
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if errors:
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b"errors": orjson.dumps(errors)}
+        )
+    sink = pa.BufferOutputStream()
+    if response_format == RESPONSE_FORMAT.ARROW:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif response_format == RESPONSE_FORMAT.PARQUET:
+        pq.write_table(table, sink)
+    else:
+        raise Exception(f"{response_format.value} is not a binary response format")
+    return sink.getvalue().to_pybytes()
+
+
+def column_to_array(values: Union[pd.Index, pd.Series]) -> Union[np.ndarray, list]:
+    """
+    Converts a column to something orjson can write directly, datetimes become epoch
+    milliseconds and missing numeric values become NaN, which orjson writes as null.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = pd.DatetimeIndex(values)
+        milliseconds = values.asi8 // 1_000_000
+        if values.hasnans:
+            return np.where(values.isna(), np.nan, milliseconds)
+        return milliseconds
+    if pd.api.types.is_bool_dtype(values.dtype) and not pd.isna(values).any():
+        return np.ascontiguousarray(values.to_numpy(dtype=bool))
+    if pd.api.types.is_integer_dtype(values.dtype) and not pd.isna(values).any():
+        return np.ascontiguousarray(values.to_numpy(dtype=np.int64))
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return np.ascontiguousarray(values.to_numpy(dtype=np.float64, na_value=np.nan))
+    return [None if pd.isna(value) else value for value in values.tolist()]
+
+
+def encode_prices_json(data: Dict[str, pd.DataFrame], time_zone: str = "UTC") -> bytes:
+    """
+    Encodes the frames returned by get_prices column by column as
+    {ticker: {"Datetime": [epoch ms, ...], "Open": [...], ...}}, the NumPy arrays are
+    written by orjson without creating a Python object per bar. Failed tickers are
+    encoded as {ticker: {"error": message}}. As in prices_to_frame, naive indexes are
+    taken to be in time_zone.
+    """
+    payload: Dict[str, Dict[str, Union[np.ndarray, list, str]]] = {}
+    for ticker, frame in data.items():
+        if "error" in frame.attrs:
+            payload[ticker] = {"error": frame.attrs["error"]}
+            continue
+        index = frame.index
+        if isinstance(index, pd.DatetimeIndex) and index.tz is None:
+            index = index.tz_localize(time_zone)
+        columns = {"Datetime": column_to_array(index)}
+        for column in frame.columns:
+            columns[column] = column_to_array(frame[column])
+        payload[ticker] = columns
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
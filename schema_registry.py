@@ -0,0 +1,67 @@
+import threading
+import sqlalchemy
+from typing import Dict, List, Union
+
+
+class SchemaRegistry:
+    """
+    Reflects each table once into a shared MetaData and serves the Table objects,
+    column names and primary keys from memory until the table is refreshed.
+    """
+
+    __engine: sqlalchemy.engine.Engine
+    __metadata: sqlalchemy.MetaData
+    __tables: Dict[str, sqlalchemy.Table]
+
+    def __init__(self, engine: sqlalchemy.engine.Engine) -> None:
+        self.__engine = engine
+        self.__metadata = sqlalchemy.MetaData()
+        self.__tables = {}
+        self.__lock = threading.Lock()
+
+    def get_table(
+        self,
+        table_name: str,
+        conn: Union[sqlalchemy.engine.Connection, None] = None,
+    ) -> sqlalchemy.Table:
+        """
+        Returns the reflected table, conn is used for the reflection when the table may
+        only be visible inside that connection's transaction. A reflection made inside a
+        transaction is not cached, as the transaction may still roll back, the first one
+        made after it is.
+        """
+        with self.__lock:
+            table = self.__tables.get(table_name)
+            if table is not None:
+                return table
+            if conn is not None and conn.in_transaction():
+                return sqlalchemy.Table(
+                    table_name, sqlalchemy.MetaData(), autoload_with=conn
+                )
+            table = sqlalchemy.Table(
+                table_name,
+                self.__metadata,
+                autoload_with=self.__engine if conn is None else conn,
+            )
+            self.__tables[table_name] = table
+            return table
+
+    def get_column_names(self, table_name: str) -> List[str]:
+        return [column.name for column in self.get_table(table_name).columns]
+
+    def get_primary_key(self, table_name: str) -> List[str]:
+        return [column.name for column in self.get_table(table_name).primary_key]
+
+    def refresh(self, table_name: str = None) -> None:
+        """
+        Drops the reflected table, or every table when table_name is None, so that it is
+        reflected again on next use.
+        """
+        with self.__lock:
+            if table_name is None:
+                self.__tables.clear()
+                self.__metadata.clear()
+                return
+            table = self.__tables.pop(table_name, None)
+            if table is not None:
+                self.__metadata.remove(table)
@@ -1,21 +1,47 @@
+import io
+import time
 import random
 import string
-import importlib
+import threading
 import sqlalchemy
 import numpy as np
 import pandas as pd
 
 
 from sqlalchemy import sql, exc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime, timedelta
-from sql_commands import commands
-from typing import Union, Dict, List
+from sql_commands import (
+    commands,
+    consolidated_commands,
+    partition_commands,
+    price_table_commands,
+)
+from typing import Any, Union, Dict, Iterator, List, Tuple
 from credentials import psql_credentials
 from custom_types import PandasAssetData
 from Exchanges.index_loader import IndexLoader
 from VendorsApiManagers.api_manager import APIManager
-from commons import INTERVAL, VENDOR, EXCHANGE, INSTRUMENT
+from VendorsApiManagers.response_cache import ResponseCache
+from price_cache import PriceCache
+from metadata_cache import MetadataCache
+from schema_registry import SchemaRegistry
+from single_flight import SingleFlight
+from vendor_registry import VendorRegistry, get_vendor_registry
+from connection_pool import create_pooled_engine, get_pool_stats
+from commons import (
+    INTERVAL,
+    VENDOR,
+    EXCHANGE,
+    EXCHANGE_TIME_ZONE,
+    EXCHANGE_SESSION_START,
+    EXCHANGE_SESSION_END,
+    INSTRUMENT,
+    STORAGE,
+    COPY_FORMAT,
+    READ_MODE,
+)
 
 
 class SecuritiesMaster:
@@ -23,33 +49,211 @@ class SecuritiesMaster:
     User can create an instance of this class to obtain data
     """
 
+    __consolidated_table_name = "prices"
+    __price_columns = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    # coverage gaps at most this far apart are fetched in a single vendor request
+    __gap_merge_tolerance = timedelta(days=5)
+    # how each column of finer bars is combined into a coarser bar
+    __resample_rules = {
+        "Open": "first",
+        "High": "max",
+        "Low": "min",
+        "Close": "last",
+        "Adj Close": "last",
+        "Volume": "sum",
+    }
+    __calendar_intervals = [INTERVAL.w1.value, INTERVAL.mo1.value, INTERVAL.y1.value]
+    # roll-up series kept up to date whenever bars of the key interval are cached
+    __rollup_intervals = {
+        INTERVAL.m1.value: [INTERVAL.h1.value, INTERVAL.d1.value],
+        INTERVAL.m5.value: [INTERVAL.h1.value, INTERVAL.d1.value],
+    }
+    # written by COPY TO STDOUT for NULL, so that NULL and empty strings can be told apart
+    __copy_null = "\\N"
+
     def __init__(
-        self, host: str, port: int, username: str, password: str, progress=False
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        progress=False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        pool_timeout: float = 30,
+        engine: sqlalchemy.engine.Engine = None,
+        storage: str = STORAGE.TABLE.value,
+        price_cache_bytes: int = 0,
+        metadata_ttl: float = 60,
+        maintain_rollups: bool = True,
+        constituents_ttl: float = 24 * 3600,
+        vendor_cache_dir: str = None,
+        vendor_cache_ttl: float = 3600,
+        offline: bool = False,
+        vendor_registry: VendorRegistry = None,
+        create_schema: bool = True,
     ) -> None:
         """
         Creates the necessary database connection objects.
+        pool_size + max_overflow bounds the number of concurrent get_prices workers
+        that can hold a connection at the same time.
+        pool_recycle, pool_pre_ping and pool_timeout are passed on to the pool, when
+        engine is given its pool is shared instead and the pool arguments are ignored.
+        storage selects where cached prices are kept, either a table per series or
+        the single partitioned prices table.
+        price_cache_bytes > 0 enables the in-memory price cache with that byte budget.
+        metadata_ttl is how many seconds vendors, exchanges, symbols and the table list
+        are cached for, 0 disables the metadata cache.
+        maintain_rollups keeps h1 and d1 roll-ups of cached m1 and m5 bars up to date.
+        constituents_ttl is how many seconds a stored index constituents list is used for
+        before it is downloaded again.
+        vendor_cache_dir enables the on-disk cache of vendor responses, responses for
+        recent dates expire after vendor_cache_ttl seconds. offline replays only from
+        that cache and fails on requests that are not in it.
+        vendor_registry resolves vendor and index loader implementations, the process wide
+        registry is used when it is not given.
+        create_schema runs the schema DDL, pass False when it was already applied with
+        create_tables, for instance by a migration step before the API workers start.
         """
         try:
+            self.__storage = STORAGE(storage)
+            self.__price_cache: PriceCache = (
+                PriceCache(price_cache_bytes) if price_cache_bytes > 0 else None
+            )
+            self.__metadata_cache = MetadataCache(metadata_ttl)
+            self.__constituents_ttl = constituents_ttl
+            self.__constituents_cache = MetadataCache(constituents_ttl)
+            self.__maintain_rollups = maintain_rollups
+            self.__vendor_registry = (
+                get_vendor_registry() if vendor_registry is None else vendor_registry
+            )
+            if offline and vendor_cache_dir is None:
+                raise Exception("offline mode requires vendor_cache_dir")
+            self.__vendor_cache: ResponseCache = (
+                ResponseCache(vendor_cache_dir, ttl=vendor_cache_ttl, offline=offline)
+                if vendor_cache_dir is not None
+                else None
+            )
+            self.__price_fetches = SingleFlight()
+            self.__prefetches = SingleFlight()
+            self.__price_partitions: set = set()
+            self.__partitions_lock = threading.Lock()
             self.__url = f"postgresql+psycopg2://{username}:{password}@{host}:{port}/securities_master"
-            self.__engine = sqlalchemy.create_engine(
-                self.__url, isolation_level="AUTOCOMMIT"
+            if engine is None:
+                engine = create_pooled_engine(
+                    self.__url,
+                    pool_size=pool_size,
+                    max_overflow=max_overflow,
+                    pool_recycle=pool_recycle,
+                    pool_pre_ping=pool_pre_ping,
+                    pool_timeout=pool_timeout,
+                )
+            # both share the pool of engine, only the isolation level differs
+            self.__engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+            self.__transaction_engine = engine.execution_options(
+                isolation_level="READ COMMITTED"
             )
-            self.__create_base_tables()
+            self.__schema_registry = SchemaRegistry(self.__engine)
+            if create_schema:
+                self.create_tables()
         except Exception as e:
             raise e
 
+    def create_tables(self) -> None:
+        """
+        Creates the base tables and, with consolidated storage, the prices table.
+        Every command checks for existing objects, so it can be run repeatedly.
+        """
+        self.__create_base_tables()
+        if self.__storage == STORAGE.CONSOLIDATED:
+            self.__create_consolidated_tables()
+
     def __create_base_tables(self) -> None:
         """
         Specifically for creating the base tables that are
         necessary for basic operations.
         """
         try:
-            for command in commands.values():
-                with self.__engine.connect() as conn:
+            with self.__engine.connect() as conn:
+                for command in commands.values():
+                    conn.execute(sql.text(command))
+            self.__schema_registry.refresh()
+        except Exception as e:
+            raise e
+
+    def __create_consolidated_tables(self) -> None:
+        """
+        Creates the partitioned prices table and the symbol_id key it references.
+        """
+        try:
+            with self.__engine.connect() as conn:
+                for command in consolidated_commands.values():
                     conn.execute(sql.text(command))
+            # Symbol gains the symbol_id column
+            self.__schema_registry.refresh("symbol")
         except Exception as e:
             raise e
 
+    def __create_price_partitions(
+        self, interval: int, start_datetime: datetime, end_datetime: datetime
+    ) -> None:
+        """
+        Creates the interval partition of the prices table and its time range partitions
+        covering start_datetime to end_datetime. Intraday intervals are partitioned by month,
+        the rest by year.
+        """
+        interval_name = INTERVAL(interval).name.lower()
+        parent_name = (
+            f"{SecuritiesMaster.__consolidated_table_name}_part_{interval_name}"
+        )
+        monthly = interval < INTERVAL.d1.value
+        # padded by a day so that timezone aware bounds never fall outside a partition
+        period_start = pd.Timestamp(start_datetime).tz_localize(None) - timedelta(
+            days=1
+        )
+        period_end = pd.Timestamp(end_datetime).tz_localize(None) + timedelta(days=1)
+        period_start = pd.Timestamp(
+            year=period_start.year, month=period_start.month if monthly else 1, day=1
+        )
+        offset = pd.DateOffset(months=1) if monthly else pd.DateOffset(years=1)
+
+        with self.__partitions_lock:
+            with self.__engine.connect() as conn:
+                if parent_name not in self.__price_partitions:
+                    conn.execute(
+                        sql.text(
+                            partition_commands["CreateIntervalPartition"].format(
+                                partition_name=parent_name, interval=int(interval)
+                            )
+                        )
+                    )
+                    self.__price_partitions.add(parent_name)
+                while period_start <= period_end:
+                    partition_name = f"{parent_name}_{period_start.strftime('%Y_%m' if monthly else '%Y')}"
+                    if partition_name not in self.__price_partitions:
+                        conn.execute(
+                            sql.text(
+                                partition_commands["CreateRangePartition"].format(
+                                    partition_name=partition_name,
+                                    parent_name=parent_name,
+                                    start=period_start.strftime("%Y-%m-%d"),
+                                    end=(period_start + offset).strftime("%Y-%m-%d"),
+                                )
+                            )
+                        )
+                        self.__price_partitions.add(partition_name)
+                    period_start = period_start + offset
+            self.__metadata_cache.invalidate("tables")
+
+    def __begin(self):
+        """
+        Returns a context manager over a connection in a real transaction,
+        the engine itself runs in AUTOCOMMIT mode.
+        """
+        return self.__transaction_engine.begin()
+
     # NOTE Delete in Final Revision, for testing purpose only
     def temp(self):
         try:
@@ -59,26 +263,208 @@ class SecuritiesMaster:
 
     def get_all_tables(self) -> List[str]:
         try:
-            tables = pd.read_sql_query(
-                sql="""select table_name from information_schema.tables where table_catalog = 'securities_master' and table_schema = 'public';""",
-                con=self.__engine,
-            )["table_name"].to_list()
-            try:
-                tables.remove("users")
-                tables.remove("token")
-            except:
-                pass
-            return tables
+            return list(self.__metadata_cache.get("tables", self.__load_all_tables))
         except Exception as e:
             raise e
 
-    def get_table(self, table_name: str) -> pd.DataFrame:
+    def __load_all_tables(self) -> List[str]:
+        tables = pd.read_sql_query(
+            sql="""select table_name from information_schema.tables where table_catalog = 'securities_master' and table_schema = 'public';""",
+            con=self.__engine,
+        )["table_name"].to_list()
+        try:
+            tables.remove("users")
+            tables.remove("token")
+        except:
+            pass
+        return tables
+
+    def get_table(
+        self,
+        table_name: str,
+        read_mode: str = READ_MODE.PANDAS.value,
+        columns: List[str] = None,
+        filters: Dict[str, Any] = None,
+        start_datetime: datetime = None,
+        end_datetime: datetime = None,
+        after: List[Any] = None,
+        limit: int = None,
+        descending: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Reads the table, optionally only the given columns and the rows matching filters
+        (column equality) and start_datetime <= "Datetime" <= end_datetime.
+        limit and after page through the table in get_table_key order, after being the
+        key values of the last row of the previous page, descending=True with a limit
+        returns the last rows. The key columns are always included when paging.
+        """
+        try:
+            if (
+                columns is None
+                and filters is None
+                and start_datetime is None
+                and end_datetime is None
+                and after is None
+                and limit is None
+            ):
+                if READ_MODE(read_mode) == READ_MODE.COPY:
+                    table = self.__get_table_object(table_name)
+                    with self.__engine.connect() as conn:
+                        # dates are parsed like pd.read_sql_table does
+                        return self.__copy_read(
+                            conn,
+                            f'SELECT * FROM "{table_name}"',
+                            columns=list(table.c),
+                            parse_dates=True,
+                        )
+                table = pd.read_sql_table(table_name=table_name, con=self.__engine)
+                return table
+
+            stmt = self.__select_table(
+                table_name,
+                columns,
+                filters,
+                start_datetime,
+                end_datetime,
+                after,
+                limit,
+                descending,
+            )
+            with self.__engine.connect() as conn:
+                if READ_MODE(read_mode) == READ_MODE.COPY:
+                    compiled = stmt.compile(dialect=conn.dialect)
+                    return self.__copy_read(
+                        conn,
+                        str(compiled),
+                        compiled.params,
+                        list(stmt.selected_columns),
+                    )
+                return pd.read_sql(stmt, conn)
+        except Exception as e:
+            raise e
+
+    def get_table_key(self, table_name: str) -> List[str]:
+        """
+        Returns the columns get_table pages by, the primary key or "Datetime" for the
+        price tables that only have a unique Datetime index.
+        """
+        try:
+            table = self.__get_table_object(table_name)
+            if len(table.primary_key) > 0:
+                return [column.name for column in table.primary_key]
+            if "Datetime" in table.c:
+                return ["Datetime"]
+            raise Exception(f"{table_name} has no primary key to page by")
+        except Exception as e:
+            raise e
+
+    def __select_table(
+        self,
+        table_name: str,
+        columns: List[str] = None,
+        filters: Dict[str, Any] = None,
+        start_datetime: datetime = None,
+        end_datetime: datetime = None,
+        after: List[Any] = None,
+        limit: int = None,
+        descending: bool = False,
+    ) -> sqlalchemy.sql.Select:
+        """
+        Builds the parameterized SELECT for get_table and stream_table.
+        """
+        table = self.__get_table_object(table_name)
+        filters = {} if filters is None else filters
+        for name in (columns or []) + list(filters.keys()):
+            if name not in table.c:
+                raise Exception(f"{name} is not a column of {table_name}")
+        if (start_datetime is not None or end_datetime is not None) and (
+            "Datetime" not in table.c
+        ):
+            raise Exception(f"{table_name} has no Datetime column")
+        if limit is not None and limit < 1:
+            raise Exception("limit must be at least 1")
+
+        paged = limit is not None or after is not None
+        key_columns = self.get_table_key(table_name) if paged else []
+        if columns is None:
+            stmt = sqlalchemy.select(table)
+        else:
+            selected = columns + [name for name in key_columns if name not in columns]
+            stmt = sqlalchemy.select(*[table.c[name] for name in selected])
+
+        for name, value in filters.items():
+            stmt = stmt.where(table.c[name] == value)
+        if start_datetime is not None:
+            stmt = stmt.where(table.c["Datetime"] >= start_datetime)
+        if end_datetime is not None:
+            stmt = stmt.where(table.c["Datetime"] <= end_datetime)
+
+        if paged:
+            keys = [table.c[name] for name in key_columns]
+            if after is not None:
+                if len(after) != len(keys):
+                    raise Exception(f"after needs a value for each of {key_columns}")
+                key = sqlalchemy.tuple_(*keys)
+                last_key = sqlalchemy.tuple_(
+                    *[
+                        sqlalchemy.literal(value, type_=column.type)
+                        for value, column in zip(after, keys)
+                    ]
+                )
+                stmt = stmt.where(key < last_key if descending else key > last_key)
+            stmt = stmt.order_by(
+                *[column.desc() if descending else column.asc() for column in keys]
+            )
+            if limit is not None:
+                stmt = stmt.limit(limit)
+        return stmt
+
+    def stream_table(
+        self,
+        table_name: str,
+        chunk_size: int = 10_000,
+        columns: List[str] = None,
+        filters: Dict[str, Any] = None,
+        start_datetime: datetime = None,
+        end_datetime: datetime = None,
+        after: List[Any] = None,
+        limit: int = None,
+        descending: bool = False,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Returns an iterator over the table's rows as lists of at most chunk_size dicts,
+        read through a server-side cursor so only one chunk is held in memory at a time.
+        Takes the same projection, filter and paging arguments as get_table, which are
+        checked here rather than on the first next().
+        """
         try:
-            table = pd.read_sql_table(table_name=table_name, con=self.__engine)
-            return table
+            if chunk_size < 1:
+                raise Exception("chunk_size must be at least 1")
+            stmt = self.__select_table(
+                table_name,
+                columns,
+                filters,
+                start_datetime,
+                end_datetime,
+                after,
+                limit,
+                descending,
+            )
+            return self.__stream_rows(stmt, chunk_size)
         except Exception as e:
             raise e
 
+    def __stream_rows(
+        self, stmt: sqlalchemy.sql.Select, chunk_size: int
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # named cursors need a transaction, the engine itself is in AUTOCOMMIT
+        with self.__begin() as conn:
+            result = conn.execution_options(
+                stream_results=True, max_row_buffer=chunk_size
+            ).execute(stmt)
+            for partition in result.partitions(chunk_size):
+                yield [dict(row._mapping) for row in partition]
+
     @staticmethod
     def __get_column_names(table: sqlalchemy.Table) -> List[str]:
         columns_list = []
@@ -87,10 +473,22 @@ class SecuritiesMaster:
 
         return columns_list
 
-    def __get_table_object(self, table_name: str) -> sqlalchemy.Table:
-        return sqlalchemy.Table(
-            table_name, sqlalchemy.MetaData(bind=self.__engine), autoload=True
-        )
+    def __get_table_object(
+        self, table_name: str, conn: sqlalchemy.engine.Connection = None
+    ) -> sqlalchemy.Table:
+        return self.__schema_registry.get_table(table_name, conn)
+
+    def get_table_columns(self, table_name: str) -> List[str]:
+        try:
+            return self.__schema_registry.get_column_names(table_name)
+        except Exception as e:
+            raise e
+
+    def get_primary_key(self, table_name: str) -> List[str]:
+        try:
+            return self.__schema_registry.get_primary_key(table_name)
+        except Exception as e:
+            raise e
 
     def add_row(self, table_name: str, row_data: Dict[str, str]) -> None:
         try:
@@ -102,6 +500,7 @@ class SecuritiesMaster:
             stmt = sqlalchemy.insert(table).values(row_data)
             with self.__engine.connect() as conn:
                 conn.execute(stmt)
+            self.__invalidate_caches(table_name)
         except Exception as e:
             raise e
 
@@ -110,8 +509,12 @@ class SecuritiesMaster:
     ) -> Dict[str, str]:
         try:
             table = self.__get_table_object(table_name)
-            session = sessionmaker(bind=self.__engine.connect())()
-            return dict(session.query(table).filter_by(**primary_key_values).first())
+            stmt = sqlalchemy.select(table).filter_by(**primary_key_values)
+            with self.__engine.connect() as conn:
+                row = conn.execute(stmt).first()
+            if row is None:
+                raise Exception(f"No row in {table_name} matches {primary_key_values}")
+            return dict(row._mapping)
         except Exception as e:
             raise e
 
@@ -149,6 +552,7 @@ class SecuritiesMaster:
             )
             with self.__engine.connect() as conn:
                 conn.execute(stmt)
+            self.__invalidate_caches(table_name)
         except Exception as e:
             raise e
 
@@ -168,28 +572,475 @@ class SecuritiesMaster:
             )
             with self.__engine.connect() as conn:
                 conn.execute(stmt)
+            self.__invalidate_caches(table_name)
         except Exception as e:
             raise e
 
     def delete_table(self, table_name: str) -> None:
         try:
             table = self.__get_table_object(table_name)
-            table.drop()
+            table.drop(bind=self.__engine)
+            self.__schema_registry.refresh(table_name)
+            self.__invalidate_caches(table_name)
         except Exception as e:
             raise e
 
+    def __invalidate_caches(self, table_name: str) -> None:
+        """
+        Called after every write that goes around __cache_data_to_db.
+        """
+        self.__metadata_cache.invalidate(table_name.lower(), "tables")
+        if table_name.lower() == "symbol":
+            self.__metadata_cache.invalidate("symbol_sector")
+        if self.__price_cache is not None:
+            self.__price_cache.clear()
+
+    def get_pool_stats(self) -> Dict[str, Union[int, float, str]]:
+        """
+        Returns the connection pool's occupancy, saturation and checkout wait times.
+        """
+        return get_pool_stats(self.__engine)
+
+    def get_price_fetch_stats(self) -> Dict[str, int]:
+        """
+        Returns how many ticker fetches and batched downloads ran and how many were served
+        by a concurrent identical one instead, the latter prefixed with "batch_".
+        """
+        return {
+            **self.__price_fetches.get_stats(),
+            **{
+                f"batch_{key}": value
+                for key, value in self.__prefetches.get_stats().items()
+            },
+        }
+
+    def get_price_cache_stats(self) -> Dict[str, int]:
+        """
+        Returns the in-memory price cache's hit, miss and eviction counters.
+        """
+        if self.__price_cache is None:
+            raise Exception("Price cache is disabled, set price_cache_bytes")
+        return self.__price_cache.get_stats()
+
+    @staticmethod
+    def __get_price_table_name(
+        ticker: str, vendor: str, exchange: str, interval: int
+    ) -> str:
+        return f"prices_{ticker.lower()}_{VENDOR(vendor).name.lower()}_{EXCHANGE(exchange).name.lower()}_{INTERVAL(interval).name.lower()}"
+
     def __verify_vendor(self, vendor: str) -> bool:
-        vendors = self.get_table("datavendor")["name"].to_list()
+        vendors = self.__metadata_cache.get(
+            "datavendor", lambda: set(self.get_table("datavendor")["name"].to_list())
+        )
         if vendor in vendors:
             return True
         return False
 
     def __verify_exchange(self, exchange: str) -> bool:
-        exchanges = self.get_table("exchange")["name"].to_list()
+        exchanges = self.__metadata_cache.get(
+            "exchange", lambda: set(self.get_table("exchange")["name"].to_list())
+        )
         if exchange in exchanges:
             return True
         return False
 
+    def __get_symbols(self) -> Dict[Tuple[str, str, str, int], str]:
+        """
+        Returns the linked table name of every stored series, keyed by (ticker, vendor, exchange, interval).
+        """
+
+        def load_symbols() -> Dict[Tuple[str, str, str, int], str]:
+            with self.__engine.connect() as conn:
+                rows = conn.execute(
+                    sql.text(
+                        "SELECT ticker, vendor, exchange, interval, linked_table_name FROM Symbol"
+                    )
+                ).fetchall()
+            return {(row[0], row[1], row[2], int(row[3])): row[4] for row in rows}
+
+        return self.__metadata_cache.get("symbol", load_symbols)
+
+    def __get_sectors(
+        self, tickers: List[str], vendor: str, exchange: str, vendor_obj: APIManager
+    ) -> Dict[str, str]:
+        """
+        Returns the sector of each of tickers, the ones already stored in the Symbol table are
+        reused and the rest are fetched from the vendor in one batch.
+        """
+
+        def load_sectors() -> Dict[Tuple[str, str, str], str]:
+            with self.__engine.connect() as conn:
+                rows = conn.execute(
+                    sql.text(
+                        "SELECT DISTINCT ticker, vendor, exchange, sector FROM Symbol WHERE sector IS NOT NULL"
+                    )
+                ).fetchall()
+            return {(row[0], row[1], row[2]): row[3] for row in rows}
+
+        stored = self.__metadata_cache.get("symbol_sector", load_sectors)
+        sectors: Dict[str, str] = {
+            ticker: stored[(ticker, vendor, exchange)]
+            for ticker in tickers
+            if (ticker, vendor, exchange) in stored
+        }
+        missing: List[str] = [ticker for ticker in tickers if ticker not in sectors]
+        if len(missing) > 0:
+            details = vendor_obj.get_ticker_details(missing, exchange, ["sector"])
+            for ticker in missing:
+                sectors[ticker] = details[ticker]["sector"]
+        return sectors
+
+    def get_index_constituents(
+        self,
+        index: str,
+        exchange: str,
+        as_of_date: datetime = None,
+        refresh: bool = False,
+    ) -> Dict[str, str]:
+        """
+        Returns the index's constituents mapped to their industry.
+        Without as_of_date the latest stored list is returned, it is downloaded again once it is
+        older than constituents_ttl. With as_of_date the last list stored on or before that date
+        is returned. Lists are kept in process for constituents_ttl seconds, refresh skips that
+        cache and downloads the latest list whatever its age.
+        """
+        if not self.__verify_exchange(exchange):
+            raise Exception(f"{exchange} not in Exchange table.")
+        key = f"constituents_{exchange}_{index}_{'latest' if as_of_date is None else as_of_date.date()}"
+        if refresh:
+            self.__constituents_cache.invalidate(key)
+        return dict(
+            self.__constituents_cache.get(
+                key,
+                lambda: self.__load_index_constituents(
+                    index, exchange, as_of_date, refresh
+                ),
+            )
+        )
+
+    def __load_index_constituents(
+        self,
+        index: str,
+        exchange: str,
+        as_of_date: datetime = None,
+        refresh: bool = False,
+    ) -> Dict[str, str]:
+        params = {
+            "exchange": exchange,
+            "index_name": index,
+            "as_of_date": (datetime.now() if as_of_date is None else as_of_date).date(),
+        }
+        with self.__engine.connect() as conn:
+            snapshot = conn.execute(
+                sql.text(
+                    """
+                    SELECT as_of_date, MAX(created_datetime) FROM IndexConstituent
+                    WHERE exchange = :exchange AND index_name = :index_name AND as_of_date <= :as_of_date
+                    GROUP BY as_of_date ORDER BY as_of_date DESC LIMIT 1
+                    """
+                ),
+                params,
+            ).first()
+
+        if as_of_date is None and (
+            refresh
+            or snapshot is None
+            or (datetime.now() - snapshot[1]).total_seconds() > self.__constituents_ttl
+        ):
+            loader = self.__vendor_registry.get_index_loader(exchange)
+            try:
+                # in offline mode the list must come from the response cache
+                tickers = (
+                    loader.get_tickers(index=index)
+                    if self.__vendor_cache is None
+                    else self.__vendor_cache.load_record(
+                        EXCHANGE(exchange).name,
+                        "index_constituents",
+                        index,
+                        lambda: loader.get_tickers(index=index),
+                    )
+                )
+                self.__store_index_constituents(index, exchange, tickers)
+                return tickers
+            except Exception as e:
+                # the stale list is used while the exchange's website is unreachable
+                if snapshot is None:
+                    raise e
+
+        if snapshot is None:
+            raise Exception(
+                f"No {index} constituents stored on or before {params['as_of_date']}"
+            )
+        with self.__engine.connect() as conn:
+            rows = conn.execute(
+                sql.text(
+                    """
+                    SELECT ticker, industry FROM IndexConstituent
+                    WHERE exchange = :exchange AND index_name = :index_name AND as_of_date = :as_of_date
+                    """
+                ),
+                {**params, "as_of_date": snapshot[0]},
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def __store_index_constituents(
+        self, index: str, exchange: str, tickers: Dict[str, str]
+    ) -> None:
+        """
+        Stores tickers as the index's list for today, replacing one stored earlier today.
+        """
+        now = datetime.now()
+        params = {"exchange": exchange, "index_name": index, "as_of_date": now.date()}
+        with self.__begin() as conn:
+            conn.execute(
+                sql.text(
+                    """
+                    DELETE FROM IndexConstituent
+                    WHERE exchange = :exchange AND index_name = :index_name AND as_of_date = :as_of_date
+                    """
+                ),
+                params,
+            )
+            if len(tickers) > 0:
+                conn.execute(
+                    sql.text(
+                        """
+                        INSERT INTO IndexConstituent (exchange, index_name, as_of_date, ticker, industry, created_datetime)
+                        VALUES (:exchange, :index_name, :as_of_date, :ticker, :industry, :created_datetime)
+                        """
+                    ),
+                    [
+                        {
+                            **params,
+                            "ticker": ticker,
+                            "industry": industry,
+                            "created_datetime": now,
+                        }
+                        for ticker, industry in tickers.items()
+                    ],
+                )
+        # today's as-of lookups read the list that was replaced
+        self.__constituents_cache.invalidate(
+            f"constituents_{exchange}_{index}_{now.date()}"
+        )
+
+    @staticmethod
+    def __conform_frame(frame: pd.DataFrame, table: sqlalchemy.Table) -> pd.DataFrame:
+        """
+        Checks the frame's column types against the target table's columns and casts float
+        columns holding whole numbers to integers where the table expects integers.
+        """
+        sql_types = {column.name: column.type for column in table.columns}
+        frame = frame.copy(deep=False)
+        mismatches: List[str] = []
+        for column in frame.columns:
+            if column not in sql_types:
+                mismatches.append(f"'{column}' is not a column")
+                continue
+            dtype, sql_type = frame[column].dtype, sql_types[column]
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                valid = isinstance(sql_type, (sqlalchemy.DateTime, sqlalchemy.Date))
+            elif pd.api.types.is_bool_dtype(dtype):
+                valid = isinstance(sql_type, sqlalchemy.Boolean)
+            elif pd.api.types.is_integer_dtype(dtype):
+                valid = isinstance(sql_type, (sqlalchemy.Integer, sqlalchemy.Numeric))
+            elif pd.api.types.is_float_dtype(dtype):
+                valid = isinstance(sql_type, sqlalchemy.Numeric)
+                if isinstance(sql_type, sqlalchemy.Integer):
+                    try:
+                        frame[column] = frame[column].astype("Int64")
+                        valid = True
+                    except (TypeError, ValueError):
+                        valid = False
+            else:
+                valid = isinstance(sql_type, (sqlalchemy.String, sqlalchemy.Text))
+            if not valid:
+                mismatches.append(f"'{column}' is {dtype}, table expects {sql_type}")
+        if len(mismatches) > 0:
+            raise Exception(
+                f"Column types do not match table '{table.name}': {', '.join(mismatches)}"
+            )
+        return frame
+
+    @staticmethod
+    def __to_copy_binary(
+        frame: pd.DataFrame, table: sqlalchemy.Table, time_zone: str = "UTC"
+    ) -> bytes:
+        """
+        Encodes the frame in PostgreSQL's binary COPY format with one structured NumPy record per row.
+        Only fixed width columns (floats, integers and timestamps) without nulls are supported.
+        Naive timestamps bound for timestamptz columns are read in time_zone, the session's
+        TimeZone, as PostgreSQL reads them in the csv format.
+        """
+        if frame.isna().to_numpy().any():
+            raise Exception(
+                "Binary COPY does not support null values, use the csv format"
+            )
+        sql_types = {column.name: column.type for column in table.columns}
+        fields = [("field_count", ">i2")]
+        values: Dict[str, np.ndarray] = {}
+        for i, column in enumerate(frame.columns):
+            sql_type, series = sql_types[column], frame[column]
+            if isinstance(sql_type, sqlalchemy.DateTime):
+                if series.dt.tz is None and sql_type.timezone:
+                    series = series.dt.tz_localize(time_zone)
+                if series.dt.tz is not None:
+                    if sql_type.timezone:
+                        series = series.dt.tz_convert("UTC")
+                    series = series.dt.tz_localize(None)
+                # microseconds since the PostgreSQL epoch, 2000-01-01
+                value = (
+                    series.to_numpy(dtype="datetime64[us]").astype(np.int64)
+                    - 946684800000000
+                )
+                code = ">i8"
+            elif isinstance(sql_type, postgresql.REAL):
+                value, code = series.to_numpy(dtype=np.float32), ">f4"
+            elif isinstance(sql_type, sqlalchemy.Float):
+                value, code = series.to_numpy(dtype=np.float64), ">f8"
+            elif isinstance(sql_type, sqlalchemy.SmallInteger):
+                value, code = series.to_numpy(dtype=np.int16), ">i2"
+            elif isinstance(sql_type, sqlalchemy.BigInteger):
+                value, code = series.to_numpy(dtype=np.int64), ">i8"
+            elif isinstance(sql_type, sqlalchemy.Integer):
+                value, code = series.to_numpy(dtype=np.int32), ">i4"
+            else:
+                raise Exception(
+                    f"Binary COPY does not support column '{column}' of type {sql_type}, use the csv format"
+                )
+            fields += [(f"length_{i}", ">i4"), (f"value_{i}", code)]
+            values[f"value_{i}"] = value
+            values[f"length_{i}"] = np.dtype(code).itemsize
+
+        rows = np.empty(len(frame), dtype=fields)
+        rows["field_count"] = len(frame.columns)
+        for field, value in values.items():
+            rows[field] = value
+        return (
+            b"PGCOPY\n\xff\r\n\x00"
+            + np.array([0, 0], dtype=">i4").tobytes()
+            + rows.tobytes()
+            + np.array([-1], dtype=">i2").tobytes()
+        )
+
+    def __copy_frame(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        frame: pd.DataFrame,
+        table_name: str,
+        copy_format: COPY_FORMAT,
+        conflict_columns: List[str] = None,
+    ) -> int:
+        """
+        Streams the frame into a staging table with COPY FROM STDIN and moves the rows that are not
+        stored yet into table_name. conn must be in a transaction, the staging table is dropped on commit.
+        When conflict_columns is given, rows already stored under the same key are overwritten instead.
+        Returns the number of rows inserted or updated.
+        """
+        if frame.empty:
+            return 0
+        table = self.__get_table_object(table_name, conn)
+        frame = self.__conform_frame(frame, table)
+        staging_name = (
+            f"staging_{''.join(random.choices(string.ascii_lowercase, k=12))}"
+        )
+        columns = ", ".join(f'"{column}"' for column in frame.columns)
+
+        conn.execute(
+            sql.text(
+                f'CREATE TEMP TABLE "{staging_name}" (LIKE "{table_name}" INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+        )
+        if copy_format == COPY_FORMAT.BINARY:
+            time_zone = conn.execute(sql.text("SHOW TimeZone")).scalar()
+            buffer = io.BytesIO(self.__to_copy_binary(frame, table, time_zone))
+        else:
+            buffer = io.StringIO()
+            frame.to_csv(buffer, index=False, header=False, na_rep="")
+            buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY "{staging_name}" ({columns}) FROM STDIN WITH (FORMAT {copy_format.value})',
+                buffer,
+            )
+        finally:
+            cursor.close()
+        on_conflict = "ON CONFLICT DO NOTHING"
+        if conflict_columns is not None:
+            updates = ", ".join(
+                f'"{column}" = EXCLUDED."{column}"'
+                for column in frame.columns
+                if column not in conflict_columns
+            )
+            keys = ", ".join(f'"{column}"' for column in conflict_columns)
+            on_conflict = f"ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+        return conn.execute(
+            sql.text(
+                f'INSERT INTO "{table_name}" ({columns}) SELECT {columns} FROM "{staging_name}" {on_conflict}'
+            )
+        ).rowcount
+
+    def __create_unique_key(
+        self, conn: sqlalchemy.engine.Connection, table_name: str
+    ) -> None:
+        """
+        Keys table_name on "Datetime" when it has neither a primary key nor a unique index,
+        ON CONFLICT DO NOTHING would not skip any row without one.
+        """
+        table = self.__get_table_object(table_name, conn)
+        if (
+            len(table.primary_key.columns) > 0
+            or any(index.unique for index in table.indexes)
+            or any(
+                isinstance(constraint, sqlalchemy.UniqueConstraint)
+                for constraint in table.constraints
+            )
+        ):
+            return
+        if "Datetime" not in table.columns:
+            raise Exception(
+                f"'{table_name}' has no primary key or unique index to skip stored rows on"
+            )
+        conn.execute(
+            sql.text(
+                price_table_commands["CreateDatetimeKey"].format(table_name=table_name)
+            )
+        )
+        self.__schema_registry.refresh(table_name)
+
+    def bulk_load_prices(
+        self,
+        data: pd.DataFrame,
+        table_name: str,
+        copy_format: str = COPY_FORMAT.CSV.value,
+    ) -> Dict[str, float]:
+        """
+        Loads a price frame into an existing table with COPY FROM STDIN, a named index
+        (e.g. "Datetime") is loaded as a column. Column types are checked against the table
+        and rows that are already stored are skipped, which needs a primary key or unique
+        index: a table without one is keyed on "Datetime" like the per-series tables, others
+        are rejected.
+        Returns the number of rows loaded, the time taken and the rows loaded per second.
+        """
+        try:
+            frame = data.reset_index() if data.index.name is not None else data
+            start_time = time.perf_counter()
+            with self.__begin() as conn:
+                self.__create_unique_key(conn, table_name)
+                rows = self.__copy_frame(
+                    conn, frame, table_name, COPY_FORMAT(copy_format)
+                )
+            self.__invalidate_caches(table_name)
+            seconds = time.perf_counter() - start_time
+            return {
+                "rows": rows,
+                "seconds": seconds,
+                "rows_per_second": rows / seconds if seconds > 0 else float(rows),
+            }
+        except Exception as e:
+            raise e
+
     def __cache_data_to_db(
         self,
         data: pd.DataFrame,
@@ -200,130 +1051,862 @@ class SecuritiesMaster:
         exchange: str,
         interval: int,
         instrument: str,
+        covered_ranges: List[Tuple[datetime, datetime]] = None,
     ) -> None:
-        data.to_sql(name=table_name, con=self.__engine, if_exists="replace", index=True)
-        try:
-            self.add_row(
-                table_name="symbol",
-                row_data={
-                    "ticker": ticker,
-                    "vendor_ticker": vendor_obj.get_vendor_ticker(ticker, exchange),
-                    "exchange": exchange,
-                    "vendor": vendor,
-                    "instrument": INSTRUMENT(instrument).name,
-                    "name": ticker,
-                    "sector": vendor_obj.get_ticker_detail(ticker, exchange, "sector"),
-                    "interval": interval,
-                    "linked_table_name": table_name,
-                    "created_datetime": (datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-                    "last_updated_datetime": (
-                        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    ),
-                },
+        """
+        Appends the bars in data that are not stored yet, upserts the ticker's Symbol row and
+        records covered_ranges in the Coverage table, all in a single transaction.
+        The roll-ups of the interval are updated in the same transaction.
+        """
+        rollup_intervals: List[int] = (
+            SecuritiesMaster.__rollup_intervals.get(interval, [])
+            if self.__maintain_rollups and not data.empty
+            else []
+        )
+        if self.__storage == STORAGE.CONSOLIDATED and not data.empty:
+            # partitions are created up front, DDL on the parent would wait on the transaction
+            for partition_interval in [interval] + rollup_intervals:
+                self.__create_price_partitions(
+                    partition_interval, data.index[0], data.index[-1]
+                )
+
+        symbol_row: Dict[str, str] = {
+            "ticker": ticker,
+            "vendor_ticker": vendor_obj.get_vendor_ticker(ticker, exchange),
+            "exchange": exchange,
+            "vendor": vendor,
+            "instrument": INSTRUMENT(instrument).name,
+            "name": ticker,
+            "sector": self.__get_sectors([ticker], vendor, exchange, vendor_obj)[
+                ticker
+            ],
+            "interval": interval,
+            "linked_table_name": table_name,
+            "created_datetime": datetime.now(),
+            "last_updated_datetime": datetime.now(),
+        }
+        with self.__begin() as conn:
+            self.__write_series(conn, data, symbol_row, covered_ranges)
+            for rollup_interval in rollup_intervals:
+                self.__update_rollup(
+                    conn, data, symbol_row, rollup_interval, vendor_obj
+                )
+        self.__metadata_cache.invalidate("symbol", "tables")
+        if self.__price_cache is not None:
+            for cached_interval in [interval] + rollup_intervals:
+                self.__price_cache.invalidate(
+                    (ticker, vendor, exchange, cached_interval)
+                )
+
+    def __write_series(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        data: pd.DataFrame,
+        symbol_row: Dict[str, str],
+        covered_ranges: List[Tuple[datetime, datetime]] = None,
+        overwrite: bool = False,
+    ) -> None:
+        """
+        Upserts symbol_row and stores data in the series' table, bars that are already
+        stored are kept unless overwrite is True. conn must be in a transaction.
+        """
+        ticker, vendor, exchange, interval = (
+            symbol_row["ticker"],
+            symbol_row["vendor"],
+            symbol_row["exchange"],
+            symbol_row["interval"],
+        )
+        # writers of the same series queue up until commit, row locks cannot serialize the
+        # first write of a series, which has no Coverage rows or table to lock yet
+        conn.execute(
+            sql.text("SELECT pg_advisory_xact_lock(hashtext(:series))"),
+            {"series": "|".join([ticker, vendor, exchange, str(interval)])},
+        )
+        consolidated: bool = self.__storage == STORAGE.CONSOLIDATED
+        table_name: str = (
+            SecuritiesMaster.__consolidated_table_name
+            if consolidated
+            else symbol_row["linked_table_name"]
+        )
+        symbol_row = {**symbol_row, "linked_table_name": table_name}
+        symbol_table = self.__get_table_object("symbol")
+        symbol_stmt = postgresql.insert(symbol_table).values(symbol_row)
+        symbol_stmt = symbol_stmt.on_conflict_do_update(
+            index_elements=["ticker", "vendor", "exchange", "interval"],
+            set_={
+                key: symbol_stmt.excluded[key]
+                for key in symbol_row
+                if key
+                not in ["ticker", "vendor", "exchange", "interval", "created_datetime"]
+            },
+        )
+
+        if consolidated:
+            symbol_id = conn.execute(
+                symbol_stmt.returning(symbol_table.c.symbol_id)
+            ).scalar()
+            if not data.empty:
+                columns = [
+                    column
+                    for column in SecuritiesMaster.__price_columns
+                    if column in data.columns
+                ]
+                # Prices."Datetime" holds the exchange's wall clock
+                frame = data[columns].set_axis(
+                    self.__to_exchange_clock(data.index, exchange)
+                )
+                frame = frame.rename_axis("Datetime").reset_index()
+                frame.insert(0, "symbol_id", symbol_id)
+                frame.insert(1, "interval", interval)
+                self.__copy_frame(
+                    conn,
+                    frame,
+                    table_name,
+                    COPY_FORMAT.CSV,
+                    ["symbol_id", "interval", "Datetime"] if overwrite else None,
+                )
+        else:
+            conn.execute(symbol_stmt)
+            if not data.empty:
+                # creates the table when it does not exist yet, then keys it on "Datetime"
+                data.head(0).to_sql(
+                    name=table_name, con=conn, if_exists="append", index=True
+                )
+                conn.execute(
+                    sql.text(
+                        price_table_commands["CreateDatetimeKey"].format(
+                            table_name=table_name
+                        )
+                    )
+                )
+                # vendors return naive daily and timezone aware intraday bars, a roll-up
+                # or a later download must land on the key the table already uses
+                timezone_aware = getattr(
+                    self.__get_table_object(table_name, conn).c["Datetime"].type,
+                    "timezone",
+                    False,
+                )
+                frame = data.set_axis(
+                    self.__to_column_clock(data.index, timezone_aware, exchange)
+                )
+                self.__copy_frame(
+                    conn,
+                    frame.rename_axis("Datetime").reset_index(),
+                    table_name,
+                    COPY_FORMAT.CSV,
+                    ["Datetime"] if overwrite else None,
+                )
+        if covered_ranges is not None and len(covered_ranges) > 0:
+            self.__update_coverage(
+                conn, ticker, vendor, exchange, interval, covered_ranges
             )
-        except:
-            self.edit_row(
-                table_name="symbol",
-                old_row_data=self.get_row(
-                    table_name="symbol",
-                    primary_key_values={
-                        "ticker": ticker,
-                        "vendor": vendor,
-                        "exchange": exchange,
-                        "interval": interval,
-                    },
+
+    def __update_rollup(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        data: pd.DataFrame,
+        symbol_row: Dict[str, str],
+        rollup_interval: int,
+        vendor_obj: APIManager,
+    ) -> None:
+        """
+        Recomputes the rollup_interval bars whose buckets contain a bar of data from every
+        stored bar of the finer series in those buckets, and overwrites them in the roll-up
+        series. Only buckets whose trading hours lie entirely within the finer series'
+        coverage are written, and within each covered range the roll-up is recorded as
+        covered from the first to the last of those buckets that hold finer bars. conn
+        must be in a transaction that has already stored data and its coverage.
+        """
+        ticker, vendor, exchange, interval = (
+            symbol_row["ticker"],
+            symbol_row["vendor"],
+            symbol_row["exchange"],
+            symbol_row["interval"],
+        )
+        # buckets and naive bounds are on the exchange's wall clock in both storage modes
+        buckets = self.__get_buckets(data.index, rollup_interval, exchange)
+        bucket_start = pd.Timestamp(buckets.min())
+        bucket_end = pd.Timestamp(buckets.max()) + pd.Timedelta(
+            milliseconds=rollup_interval
+        )
+
+        finer: pd.DataFrame = self.__read_prices(
+            conn=conn,
+            table_name=symbol_row["linked_table_name"],
+            ticker=ticker,
+            vendor=vendor,
+            exchange=exchange,
+            interval=interval,
+            start_datetime=bucket_start.to_pydatetime(),
+            end_datetime=(bucket_end - pd.Timedelta(microseconds=1)).to_pydatetime(),
+        )
+        if finer.empty:
+            return
+        finer = vendor_obj.process_OHLC_dataframe(
+            dataframe=finer,
+            datetime_index=True,
+            replace_close=False,
+            capital_col_names=True,
+        )
+        rollup = self.__resample_ohlcv(finer, rollup_interval, exchange).rename_axis(
+            "Datetime"
+        )
+
+        # a partial bucket would overwrite a complete vendor bar, and the finer series
+        # may be covered where it has no bars, e.g. before the vendor's intraday history.
+        # A bucket only needs the finer bars of its trading hours, the last h1 bucket
+        # (15:15) and the d1 bucket end at the session close on the NSE.
+        width = pd.Timedelta(milliseconds=rollup_interval)
+        starts = self.__to_exchange_clock(rollup.index, exchange)
+        days = starts.normalize()
+        session_start = days + pd.Timedelta(
+            f"{EXCHANGE_SESSION_START[EXCHANGE(exchange).name].value}:00"
+        )
+        session_end = days + pd.Timedelta(
+            f"{EXCHANGE_SESSION_END[EXCHANGE(exchange).name].value}:00"
+        )
+        first_bar = starts.where(starts >= session_start, session_start)
+        # coverage ends at the start of the last covered bar
+        last_bar = (starts + width).where(
+            starts + width <= session_end, session_end
+        ) - pd.Timedelta(milliseconds=interval)
+        complete = np.zeros(len(rollup), dtype=bool)
+        covered_ranges: List[Tuple[datetime, datetime]] = []
+        for covered_start, covered_end in self.__merge_ranges(
+            self.__read_coverage(conn, ticker, vendor, exchange, interval)
+        ):
+            in_range = (first_bar >= covered_start) & (last_bar <= covered_end)
+            if in_range.any():
+                complete |= in_range
+                covered_ranges.append(
+                    (
+                        starts[in_range].min().to_pydatetime(),
+                        (starts[in_range].max() + width).to_pydatetime(),
+                    )
+                )
+        if not complete.any():
+            return
+        rollup = rollup[complete]
+        rollup_row = {
+            **symbol_row,
+            "interval": rollup_interval,
+            "linked_table_name": self.__get_price_table_name(
+                ticker, vendor, exchange, rollup_interval
+            ),
+        }
+        self.__write_series(conn, rollup, rollup_row, covered_ranges, overwrite=True)
+
+    @staticmethod
+    def __merge_ranges(
+        ranges: List[Tuple[datetime, datetime]], tolerance: timedelta = timedelta(0)
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Merges ranges that overlap or are at most tolerance apart.
+        """
+        merged: List[Tuple[datetime, datetime]] = []
+        for start, end in sorted(ranges):
+            if len(merged) > 0 and start - merged[-1][1] <= tolerance:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def __get_missing_ranges(
+        coverage: List[Tuple[datetime, datetime]],
+        start_datetime: datetime,
+        end_datetime: datetime,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Returns the sub-ranges of start_datetime to end_datetime that are not covered, gaps that are
+        close together are merged so that they are fetched in a single vendor request.
+        """
+        gaps: List[Tuple[datetime, datetime]] = []
+        cursor = start_datetime
+        for covered_start, covered_end in SecuritiesMaster.__merge_ranges(coverage):
+            if covered_end < cursor:
+                continue
+            if covered_start > end_datetime:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if end_datetime > cursor:
+            gaps.append((cursor, end_datetime))
+        return SecuritiesMaster.__merge_ranges(
+            gaps, SecuritiesMaster.__gap_merge_tolerance
+        )
+
+    def __get_coverage(
+        self, table_name: str, ticker: str, vendor: str, exchange: str, interval: int
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Returns the time ranges stored for the series. Series cached before the Coverage table
+        existed are recorded as covered between their first and last bar.
+        """
+        params = {
+            "ticker": ticker,
+            "vendor": vendor,
+            "exchange": exchange,
+            "interval": interval,
+        }
+        with self.__engine.connect() as conn:
+            coverage = conn.execute(
+                sql.text(
+                    """
+                    SELECT start_datetime, end_datetime FROM Coverage
+                    WHERE ticker = :ticker AND vendor = :vendor AND exchange = :exchange AND interval = :interval
+                    ORDER BY start_datetime
+                    """
                 ),
-                new_row_data={
-                    "ticker": ticker,
-                    "vendor_ticker": vendor_obj.get_vendor_ticker(ticker, exchange),
-                    "exchange": exchange,
-                    "vendor": vendor,
-                    "instrument": INSTRUMENT(instrument).name,
-                    "name": ticker,
-                    "sector": vendor_obj.get_ticker_detail(ticker, exchange, "sector"),
-                    "interval": interval,
-                    "linked_table_name": table_name,
-                    "created_datetime": (datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-                    "last_updated_datetime": (
-                        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    ),
-                },
+                params,
+            ).fetchall()
+            if len(coverage) > 0:
+                return [(row[0], row[1]) for row in coverage]
+
+            # the cached link and reflection can be stale, e.g. once another instance moved
+            # the series into the consolidated table, so a failed read is retried on fresh ones
+            for retry in [False, True]:
+                linked_table_name = self.__get_symbols().get(
+                    (ticker, vendor, exchange, interval)
+                )
+                if linked_table_name is None:
+                    return []
+                try:
+                    first, last = self.__get_stored_range(
+                        conn, linked_table_name, params
+                    )
+                    break
+                except (exc.ProgrammingError, exc.NoSuchTableError):
+                    if retry:
+                        return []
+                    self.__schema_registry.refresh(linked_table_name)
+                    self.__metadata_cache.invalidate("symbol", "tables")
+            if first is None:
+                return []
+            conn.execute(
+                sql.text(
+                    """
+                    INSERT INTO Coverage (ticker, vendor, exchange, interval, start_datetime, end_datetime)
+                    VALUES (:ticker, :vendor, :exchange, :interval, :start_datetime, :end_datetime)
+                    ON CONFLICT DO NOTHING
+                    """
+                ),
+                {**params, "start_datetime": first, "end_datetime": last},
             )
+            return [(first, last)]
 
-    def __fill_missing_data(
+    def __get_stored_range(
         self,
-        dataframe: pd.DataFrame,
+        conn: sqlalchemy.engine.Connection,
+        linked_table_name: str,
+        params: Dict[str, Any],
+    ) -> Tuple[datetime, datetime]:
+        """
+        Returns the first and last bar stored for the series in params, on the exchange's
+        wall clock.
+        """
+        if linked_table_name == SecuritiesMaster.__consolidated_table_name:
+            return conn.execute(
+                sql.text(
+                    """
+                    SELECT MIN(p."Datetime"), MAX(p."Datetime") FROM Prices p
+                    JOIN Symbol s ON s.symbol_id = p.symbol_id
+                    WHERE s.ticker = :ticker AND s.vendor = :vendor
+                        AND s.exchange = :exchange AND s.interval = :interval
+                        AND p.interval = :interval
+                    """
+                ),
+                params,
+            ).first()
+        # naive columns hold the exchange's wall clock already
+        timezone_aware = getattr(
+            self.__get_table_object(linked_table_name, conn).c["Datetime"].type,
+            "timezone",
+            False,
+        )
+        column = (
+            f"\"Datetime\" AT TIME ZONE '{EXCHANGE_TIME_ZONE[EXCHANGE(params['exchange']).name].value}'"
+            if timezone_aware
+            else '"Datetime"'
+        )
+        return conn.execute(
+            sql.text(f'SELECT MIN({column}), MAX({column}) FROM "{linked_table_name}"')
+        ).first()
+
+    @staticmethod
+    def __read_coverage(
+        conn: sqlalchemy.engine.Connection,
         ticker: str,
+        vendor: str,
+        exchange: str,
         interval: int,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Returns the series' Coverage rows, including those written by conn's transaction.
+        """
+        coverage = conn.execute(
+            sql.text(
+                """
+                SELECT start_datetime, end_datetime FROM Coverage
+                WHERE ticker = :ticker AND vendor = :vendor AND exchange = :exchange AND interval = :interval
+                ORDER BY start_datetime
+                """
+            ),
+            {
+                "ticker": ticker,
+                "vendor": vendor,
+                "exchange": exchange,
+                "interval": interval,
+            },
+        ).fetchall()
+        return [(row[0], row[1]) for row in coverage]
+
+    @staticmethod
+    def __update_coverage(
+        conn: sqlalchemy.engine.Connection,
+        ticker: str,
+        vendor: str,
+        exchange: str,
+        interval: int,
+        covered_ranges: List[Tuple[datetime, datetime]],
+    ) -> None:
+        """
+        Merges covered_ranges into the series' Coverage rows, conn must be in a transaction.
+        """
+        params = {
+            "ticker": ticker,
+            "vendor": vendor,
+            "exchange": exchange,
+            "interval": interval,
+        }
+        coverage = conn.execute(
+            sql.text(
+                """
+                SELECT start_datetime, end_datetime FROM Coverage
+                WHERE ticker = :ticker AND vendor = :vendor AND exchange = :exchange AND interval = :interval
+                FOR UPDATE
+                """
+            ),
+            params,
+        ).fetchall()
+        merged = SecuritiesMaster.__merge_ranges(
+            [(row[0], row[1]) for row in coverage] + list(covered_ranges)
+        )
+        conn.execute(
+            sql.text(
+                """
+                DELETE FROM Coverage
+                WHERE ticker = :ticker AND vendor = :vendor AND exchange = :exchange AND interval = :interval
+                """
+            ),
+            params,
+        )
+        conn.execute(
+            sql.text(
+                """
+                INSERT INTO Coverage (ticker, vendor, exchange, interval, start_datetime, end_datetime)
+                VALUES (:ticker, :vendor, :exchange, :interval, :start_datetime, :end_datetime)
+                """
+            ),
+            [
+                {**params, "start_datetime": start, "end_datetime": end}
+                for start, end in merged
+            ],
+        )
+
+    def __read_prices(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        table_name: str,
+        ticker: str,
+        vendor: str,
+        exchange: str,
+        interval: int,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        read_mode: READ_MODE = READ_MODE.PANDAS,
+    ) -> pd.DataFrame:
+        params = {
+            "ticker": ticker,
+            "vendor": vendor,
+            "exchange": exchange,
+            "interval": interval,
+            "start_datetime": start_datetime,
+            "end_datetime": end_datetime,
+        }
+        if self.__storage == STORAGE.CONSOLIDATED:
+            columns = ", ".join(
+                f'p."{column}"' for column in SecuritiesMaster.__price_columns
+            )
+            query = f"""
+                SELECT p."Datetime", {columns} FROM Prices p
+                JOIN Symbol s ON s.symbol_id = p.symbol_id
+                WHERE
+                    s.ticker = %(ticker)s AND s.vendor = %(vendor)s
+                    AND s.exchange = %(exchange)s AND s.interval = %(interval)s
+                    AND p.interval = %(interval)s
+                    AND p."Datetime" >= %(start_datetime)s
+                    AND p."Datetime" <= %(end_datetime)s
+                ORDER BY p."Datetime"
+            """
+        else:
+            query = f"""
+                SELECT * FROM "{table_name}" 
+                WHERE 
+                    "Datetime" >= %(start_datetime)s 
+                    AND 
+                    "Datetime" <= %(end_datetime)s
+            """
+            try:
+                timezone_aware = getattr(
+                    self.__get_table_object(table_name, conn).c["Datetime"].type,
+                    "timezone",
+                    False,
+                )
+            except exc.NoSuchTableError:
+                # the query then fails with ProgrammingError, as a missing table does
+                timezone_aware = None
+            if timezone_aware:
+                # naive bounds are on the exchange's wall clock like the consolidated table's,
+                # not in the session's time zone
+                time_zone = EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value
+                for key in ["start_datetime", "end_datetime"]:
+                    if params[key].tzinfo is None:
+                        params[key] = pd.Timestamp(params[key]).tz_localize(time_zone)
+        if read_mode == READ_MODE.COPY:
+            columns: List[sqlalchemy.Column] = None
+            if self.__storage == STORAGE.CONSOLIDATED:
+                table = self.__get_table_object(
+                    SecuritiesMaster.__consolidated_table_name, conn
+                )
+                columns = [
+                    table.c[column]
+                    for column in ["Datetime"] + SecuritiesMaster.__price_columns
+                ]
+            elif timezone_aware is not None:
+                columns = list(self.__get_table_object(table_name, conn).c)
+            return self.__copy_read(conn, query, params, columns)
+        return pd.read_sql_query(sql=query, con=conn, params=params)
+
+    @staticmethod
+    def __copy_read(
+        conn: sqlalchemy.engine.Connection,
+        query: str,
+        params: Dict = None,
+        columns: List[sqlalchemy.sql.ColumnElement] = None,
+        parse_dates: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Runs the query through COPY (...) TO STDOUT into an in-memory buffer and parses it with
+        the C csv parser straight into typed NumPy columns. columns are the query's columns,
+        usually those of the reflected table, and give the same dtypes as pd.read_sql: floats
+        and numerics are float64, integers int64 (float64 with nulls), booleans bool (object
+        with nulls), timestamps datetime64 (in UTC when timezone aware) and dates and the other
+        types objects holding None for NULL. With parse_dates dates are datetime64, as
+        pd.read_sql_table returns them. Other types such as json are returned as their text.
+        """
+        cursor = conn.connection.cursor()
+        try:
+            select = cursor.mogrify(query, params).decode()
+            buffer = io.StringIO()
+            cursor.copy_expert(
+                f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '{SecuritiesMaster.__copy_null}')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+        buffer.seek(0)
+
+        types = {column.name: column.type for column in columns or []}
+        # Float is a Numeric, both are parsed as float64 like pd.read_sql's coerce_float
+        dtypes: Dict[str, str] = {
+            name: "float64" if isinstance(column_type, sqlalchemy.Numeric) else "object"
+            for name, column_type in types.items()
+        }
+        frame = pd.read_csv(
+            buffer,
+            dtype=dtypes,
+            na_values=[SecuritiesMaster.__copy_null],
+            keep_default_na=False,
+            engine="c",
+        )
+        for name in frame.columns:
+            column_type = types.get(name)
+            nulls = frame[name].isna()
+            if isinstance(column_type, sqlalchemy.Numeric):
+                continue
+            if isinstance(column_type, sqlalchemy.DateTime):
+                frame[name] = pd.to_datetime(
+                    frame[name],
+                    format="ISO8601",
+                    utc=bool(column_type.timezone),
+                )
+            elif isinstance(column_type, sqlalchemy.Date):
+                dates = pd.to_datetime(frame[name], format="ISO8601")
+                frame[name] = (
+                    dates
+                    if parse_dates
+                    else pd.Series(
+                        dates.dt.date, index=frame.index, dtype=object
+                    ).where(~nulls, None)
+                )
+            elif isinstance(column_type, sqlalchemy.Integer):
+                frame[name] = frame[name].astype("float64" if nulls.any() else "int64")
+            elif isinstance(column_type, sqlalchemy.Boolean):
+                values = frame[name].map({"t": True, "f": False})
+                frame[name] = (
+                    values.astype(bool)
+                    if not nulls.any()
+                    else values.where(~nulls, None)
+                )
+            else:
+                frame[name] = frame[name].astype(object).where(~nulls, None)
+        return frame
+
+    def __get_cached_tickers(
+        self, tickers: List[str], vendor: str, exchange: str, interval: int
+    ) -> List[str]:
+        """
+        Returns the tickers whose series for the vendor, exchange and interval is already stored.
+        """
+        if self.__storage == STORAGE.CONSOLIDATED:
+            symbols = self.__get_symbols()
+            return [
+                ticker
+                for ticker in tickers
+                if symbols.get((ticker, vendor, exchange, interval))
+                == SecuritiesMaster.__consolidated_table_name
+            ]
+
+        all_tables: List[str] = self.get_all_tables()
+        return [
+            ticker
+            for ticker in tickers
+            if self.__get_price_table_name(ticker, vendor, exchange, interval)
+            in all_tables
+        ]
+
+    def migrate_price_tables(self, drop_tables: bool = False) -> Dict[str, int]:
+        """
+        Moves every per series price table linked in the Symbol table into the consolidated
+        prices table and relinks its Symbol row. Source tables are dropped when drop_tables is True.
+        Returns the number of rows moved per table.
+        """
+        try:
+            self.__create_consolidated_tables()
+            moved_rows: Dict[str, int] = {}
+            all_tables: List[str] = self.get_all_tables()
+            symbols = self.get_table("symbol")
+            symbols = symbols[
+                symbols["linked_table_name"]
+                != SecuritiesMaster.__consolidated_table_name
+            ]
+            for symbol in symbols.to_dict(orient="records"):
+                table_name = symbol["linked_table_name"]
+                if table_name not in all_tables:
+                    continue
+                table = self.__get_table_object(table_name)
+                columns = [
+                    f'"{column}"'
+                    for column in self.__get_column_names(table)
+                    if column in SecuritiesMaster.__price_columns
+                ]
+                # timestamptz bars move to the exchange's wall clock, as in __write_series
+                datetime_column = (
+                    '("Datetime" AT TIME ZONE :time_zone)'
+                    if getattr(table.c["Datetime"].type, "timezone", False)
+                    else '"Datetime"'
+                )
+                params = {
+                    "symbol_id": int(symbol["symbol_id"]),
+                    "interval": int(symbol["interval"]),
+                    "time_zone": EXCHANGE_TIME_ZONE[
+                        EXCHANGE(symbol["exchange"]).name
+                    ].value,
+                }
+                with self.__engine.connect() as conn:
+                    first, last = conn.execute(
+                        sql.text(
+                            f'SELECT MIN({datetime_column}), MAX({datetime_column}) FROM "{table_name}"'
+                        ),
+                        params,
+                    ).first()
+                with self.__begin() as conn:
+                    if first is not None:
+                        self.__create_price_partitions(symbol["interval"], first, last)
+                        moved_rows[table_name] = conn.execute(
+                            sql.text(
+                                f"""
+                                INSERT INTO Prices (symbol_id, interval, "Datetime", {", ".join(columns)})
+                                SELECT :symbol_id, :interval, {datetime_column}, {", ".join(columns)} FROM "{table_name}"
+                                ON CONFLICT DO NOTHING
+                                """
+                            ),
+                            params,
+                        ).rowcount
+                    conn.execute(
+                        sql.text(
+                            """
+                            UPDATE Symbol SET linked_table_name = :linked_table_name, last_updated_datetime = :now
+                            WHERE symbol_id = :symbol_id
+                            """
+                        ),
+                        {
+                            "linked_table_name": SecuritiesMaster.__consolidated_table_name,
+                            "now": datetime.now(),
+                            "symbol_id": int(symbol["symbol_id"]),
+                        },
+                    )
+                    if drop_tables:
+                        conn.execute(sql.text(f'DROP TABLE "{table_name}"'))
+                if drop_tables:
+                    self.__schema_registry.refresh(table_name)
+                self.__invalidate_caches(table_name)
+                self.__metadata_cache.invalidate("symbol")
+            return moved_rows
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def __to_exchange_clock(index: pd.DatetimeIndex, exchange: str) -> pd.DatetimeIndex:
+        """
+        Returns index as naive wall clock timestamps in the exchange's time zone, naive
+        indexes are taken to be on that clock already.
+        """
+        if index.tz is None:
+            return index
+        return index.tz_convert(
+            EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value
+        ).tz_localize(None)
+
+    @staticmethod
+    def __to_column_clock(
+        index: pd.DatetimeIndex, timezone_aware: bool, exchange: str
+    ) -> pd.DatetimeIndex:
+        """
+        Returns index as it is stored in a "Datetime" column, naive columns hold the
+        exchange's wall clock and naive indexes are on that clock already.
+        """
+        if not timezone_aware:
+            return SecuritiesMaster.__to_exchange_clock(index, exchange)
+        if index.tz is None:
+            return index.tz_localize(EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value)
+        return index
+
+    @staticmethod
+    def __align_timezone(
+        index: pd.DatetimeIndex, like: pd.DatetimeIndex, exchange: str
+    ) -> pd.DatetimeIndex:
+        """
+        Returns index in the timezone of like, timezone aware vendor bars become the exchange's
+        wall clock when the stored bars (e.g. the consolidated table's) are naive, and naive
+        vendor bars are taken to be on that clock.
+        """
+        if index.tz is None and like.tz is None:
+            return index
+        if like.tz is None:
+            return SecuritiesMaster.__to_exchange_clock(index, exchange)
+        if index.tz is None:
+            return index.tz_localize(
+                EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value
+            ).tz_convert(like.tz)
+        return index.tz_convert(like.tz)
+
+    @staticmethod
+    def __clip_to_range(
+        data: pd.DataFrame,
         start_datetime: datetime,
         end_datetime: datetime,
+        exchange: str,
+    ) -> pd.DataFrame:
+        """
+        Returns the bars of a vendor response between start_datetime and end_datetime on
+        the exchange's wall clock, the requests are padded by a day as vendors work with dates.
+        """
+        if data.empty:
+            return data
+        start, end = SecuritiesMaster.__to_exchange_clock(
+            pd.DatetimeIndex([start_datetime, end_datetime]), exchange
+        )
+        index = SecuritiesMaster.__to_exchange_clock(
+            pd.DatetimeIndex(data.index), exchange
+        )
+        return data[(index >= start) & (index <= end)]
+
+    def __fill_missing_data(
+        self,
+        dataframe: pd.DataFrame,
+        gaps: List[Tuple[datetime, datetime]],
+        table_name: str,
+        ticker: str,
+        interval: int,
         vendor: str,
         vendor_obj: APIManager,
         exchange: str,
         instrument: str,
         cache_data: bool,
         progress: bool,
-    ) -> pd.DataFrame:
+    ) -> Tuple[pd.DataFrame, List[Tuple[datetime, datetime]]]:
         """
-        checks dataframe to ensure that all the data in the required date range is present.
-        checks to make sure that both the start date and the end date are within 5 days of specified start and end dates.
-        if missing, vendor object is used to download the data for the missing date range, if that fails or no data exists,
-        dataframe is returned as it is.
+        Downloads each of the missing sub-ranges in gaps from the vendor and merges them into dataframe.
+        The new bars are cached along with the ranges they cover, so that ranges without any bars
+        (holidays, delisted periods) are not requested again. Gaps whose request failed are not
+        recorded as covered, they are returned along with the merged dataframe.
         """
-        if type(dataframe.index[0]) != pd.Timestamp:
-            raise Exception(
-                f"Dataframe's index must be of type {type(pd.Timestamp(start_datetime))}, it is of type {type(dataframe.index[0])}"
-            )
+        new_bars: List[pd.DataFrame] = []
+        covered_gaps: List[Tuple[datetime, datetime]] = []
+        failed_gaps: List[Tuple[datetime, datetime]] = []
+        appended_data: pd.DataFrame = pd.DataFrame()
 
-        table_name: str = f"prices_{ticker.lower()}_{VENDOR(vendor).name.lower()}_{EXCHANGE(exchange).name.lower()}_{INTERVAL(interval).name.lower()}"
-        dataframe_start_datetime: datetime = dataframe.index[0].to_pydatetime()
-        dataframe_end_datetime: datetime = dataframe.index[-1].to_pydatetime()
-
-        data_appended: bool = False
-
-        if np.abs((dataframe_start_datetime - start_datetime).days) > 5:
+        for gap_start, gap_end in gaps:
+            # padded by a day as vendors work with dates and treat the end date as exclusive
             data = vendor_obj.get_data(
                 interval=interval,
                 exchange=exchange,
-                start_datetime=start_datetime - timedelta(days=1),
-                end_datetime=dataframe_start_datetime,
+                start_datetime=gap_start - timedelta(days=1),
+                end_datetime=gap_end + timedelta(days=1),
                 tickers=[ticker],
                 replace_close=False,
                 progress=False,
             )[ticker]
-            dataframe
-            index_name = dataframe.index.name
-            dataframe = pd.concat([dataframe, data])
-            dataframe = dataframe[~dataframe.index.duplicated(keep="first")]
-            dataframe.index.name = index_name
-            data_appended = True
-
-        if np.abs((dataframe_end_datetime - end_datetime).days) > 5:
-            data = vendor_obj.get_data(
-                interval=interval,
-                exchange=exchange,
-                start_datetime=dataframe_end_datetime - timedelta(days=1),
-                end_datetime=end_datetime,
-                tickers=[ticker],
+            if vendor_obj.is_failed_response(data):
+                failed_gaps.append((gap_start, gap_end))
+                continue
+            data = self.__clip_to_range(data, gap_start, gap_end, exchange)
+            covered_gaps.append((gap_start, gap_end))
+            if not data.empty:
+                new_bars.append(data)
+
+        if len(new_bars) > 0:
+            # only the bars that are not stored already are cached
+            appended_data = pd.concat(new_bars)
+            if not dataframe.empty:
+                appended_data.index = self.__align_timezone(
+                    appended_data.index, dataframe.index, exchange
+                )
+            appended_data = appended_data[
+                ~appended_data.index.duplicated(keep="first")
+                & ~appended_data.index.isin(dataframe.index)
+            ]
+            appended_data = vendor_obj.process_OHLC_dataframe(
+                dataframe=appended_data,
+                datetime_index=True,
                 replace_close=False,
-                progress=False,
-            )[ticker]
-            index_name = dataframe.index.name
-            dataframe = pd.concat([dataframe, data])
-            dataframe = dataframe[~dataframe.index.duplicated(keep="first")]
-            dataframe.index.name = index_name
-            data_appended = True
-
-        dataframe = vendor_obj.process_OHLC_dataframe(
-            dataframe=dataframe,
-            datetime_index=True,
-            replace_close=False,
-            capital_col_names=True,
-        )
+                capital_col_names=True,
+            )
+
+        if not appended_data.empty:
+            if dataframe.empty:
+                dataframe = appended_data.sort_index()
+            else:
+                index_name = dataframe.index.name
+                dataframe = pd.concat([dataframe, appended_data]).sort_index()
+                dataframe.index.name = index_name
 
-        if data_appended and cache_data:
+        if cache_data and len(covered_gaps) > 0:
             self.__cache_data_to_db(
-                data=dataframe,
+                data=appended_data,
                 table_name=table_name,
                 ticker=ticker,
                 vendor=vendor,
@@ -331,9 +1914,389 @@ class SecuritiesMaster:
                 exchange=exchange,
                 interval=interval,
                 instrument=instrument,
+                covered_ranges=covered_gaps,
             )
 
-        return dataframe
+        return dataframe, failed_gaps
+
+    @staticmethod
+    def __is_finer_interval(finer: int, interval: int) -> bool:
+        """
+        True when bars of the finer interval combine exactly into bars of interval,
+        weeks, months and years are built from daily or shorter bars.
+        """
+        if finer >= interval:
+            return False
+        if interval in SecuritiesMaster.__calendar_intervals:
+            return finer <= INTERVAL.d1.value
+        return interval % finer == 0
+
+    @staticmethod
+    def __get_buckets(
+        index: pd.DatetimeIndex, interval: int, exchange: str
+    ) -> np.ndarray:
+        """
+        Returns the start of each timestamp's bar as datetime64[ns] on the exchange's wall
+        clock, whichever storage mode the bars were read from. Intraday bars are aligned to
+        the exchange's session start like the vendors' bars (09:15, 10:15, ... for h1 on the
+        NSE), d1 bars start at midnight, w1 bars on Monday and mo1 / y1 bars on the first of
+        the month / year.
+        """
+        values = SecuritiesMaster.__to_exchange_clock(index, exchange).values
+        if interval == INTERVAL.w1.value:
+            days = values.astype("datetime64[D]").astype(np.int64)
+            # 1970-01-01 was a Thursday, the first Monday is day 4
+            mondays = (days - 4) // 7 * 7 + 4
+            return mondays.astype("datetime64[D]").astype("datetime64[ns]")
+        if interval == INTERVAL.mo1.value:
+            return values.astype("datetime64[M]").astype("datetime64[ns]")
+        if interval == INTERVAL.y1.value:
+            return values.astype("datetime64[Y]").astype("datetime64[ns]")
+        width = np.int64(interval) * 1_000_000
+        offset = np.int64(0)
+        if interval < INTERVAL.d1.value:
+            session_start = EXCHANGE_SESSION_START[EXCHANGE(exchange).name].value
+            offset = np.int64(pd.Timedelta(f"{session_start}:00").value) % width
+        nanoseconds = values.astype(np.int64)
+        return (nanoseconds - (nanoseconds - offset) % width).astype("datetime64[ns]")
+
+    @staticmethod
+    def __get_bucket_bounds(
+        start_datetime: datetime, end_datetime: datetime, interval: int, exchange: str
+    ) -> Tuple[datetime, datetime]:
+        """
+        Returns the start of start_datetime's bar and the end of end_datetime's bar, finer
+        bars read between the two make complete first and last bars.
+        """
+        first, last = SecuritiesMaster.__get_buckets(
+            pd.DatetimeIndex([start_datetime, end_datetime]), interval, exchange
+        )
+        if interval == INTERVAL.mo1.value:
+            last_end = pd.Timestamp(last) + pd.DateOffset(months=1)
+        elif interval == INTERVAL.y1.value:
+            last_end = pd.Timestamp(last) + pd.DateOffset(years=1)
+        else:
+            last_end = pd.Timestamp(last) + pd.Timedelta(milliseconds=interval)
+        return (
+            pd.Timestamp(first).to_pydatetime(),
+            (last_end - pd.Timedelta(microseconds=1)).to_pydatetime(),
+        )
+
+    @staticmethod
+    def __resample_ohlcv(
+        frame: pd.DataFrame, interval: int, exchange: str
+    ) -> pd.DataFrame:
+        """
+        Combines the frame's bars into bars of interval: first open, max high, min low,
+        last close and summed volume, indexed by the start of each bar. The bars are
+        split with one pass over the sorted buckets and reduced with ufunc.reduceat.
+        """
+        if frame.empty:
+            return frame.copy()
+        frame = frame.sort_index()
+        buckets = SecuritiesMaster.__get_buckets(frame.index, interval, exchange)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+
+        columns: Dict[str, np.ndarray] = {}
+        for column in frame.columns:
+            rule = SecuritiesMaster.__resample_rules.get(column, "last")
+            series = frame[column]
+            if rule == "first":
+                columns[column] = series.to_numpy()[starts]
+            elif rule == "last":
+                columns[column] = series.to_numpy()[ends]
+            elif (
+                rule == "sum"
+                and pd.api.types.is_integer_dtype(series.dtype)
+                and (not series.hasnans)
+            ):
+                columns[column] = np.add.reduceat(
+                    series.to_numpy(dtype=np.int64), starts
+                )
+            else:
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                if rule == "max":
+                    columns[column] = np.fmax.reduceat(values, starts)
+                elif rule == "min":
+                    columns[column] = np.fmin.reduceat(values, starts)
+                else:
+                    columns[column] = np.add.reduceat(np.nan_to_num(values), starts)
+
+        index = pd.DatetimeIndex(buckets[starts], name=frame.index.name)
+        # daily and longer bars are labelled with the exchange's date like the vendors' naive
+        # daily bars, intraday bars keep the frame's time zone
+        if frame.index.tz is not None and interval < INTERVAL.d1.value:
+            index = index.tz_localize(
+                EXCHANGE_TIME_ZONE[EXCHANGE(exchange).name].value
+            ).tz_convert(frame.index.tz)
+        return pd.DataFrame(columns, index=index)
+
+    def __get_resampled_prices(
+        self,
+        ticker: str,
+        vendor: str,
+        vendor_obj: APIManager,
+        exchange: str,
+        interval: int,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        read_mode: READ_MODE = READ_MODE.PANDAS,
+    ) -> Union[pd.DataFrame, None]:
+        """
+        Builds the interval's bars from the coarsest stored finer series that fully covers
+        the bars containing start_datetime to end_datetime, returns None when no such series
+        is stored.
+        """
+        # read over whole bars so that the first and last bars are not built from part of
+        # their finer bars
+        start_datetime, end_datetime = self.__get_bucket_bounds(
+            start_datetime, end_datetime, interval, exchange
+        )
+        # symbols are keyed by (ticker, vendor, exchange, interval)
+        finer_intervals = sorted(
+            (
+                symbol[3]
+                for symbol in self.__get_symbols()
+                if symbol[0:3] == (ticker, vendor, exchange)
+                and self.__is_finer_interval(symbol[3], interval)
+            ),
+            reverse=True,
+        )
+        for finer in finer_intervals:
+            table_name = self.__get_price_table_name(ticker, vendor, exchange, finer)
+            coverage = self.__get_coverage(table_name, ticker, vendor, exchange, finer)
+            if (
+                len(self.__get_missing_ranges(coverage, start_datetime, end_datetime))
+                > 0
+            ):
+                continue
+            with self.__engine.connect() as conn:
+                data: pd.DataFrame = self.__read_prices(
+                    conn=conn,
+                    table_name=table_name,
+                    ticker=ticker,
+                    vendor=vendor,
+                    exchange=exchange,
+                    interval=finer,
+                    start_datetime=start_datetime,
+                    end_datetime=end_datetime,
+                    read_mode=read_mode,
+                )
+            if data.empty:
+                continue
+            data = vendor_obj.process_OHLC_dataframe(
+                dataframe=data,
+                datetime_index=True,
+                replace_close=False,
+                capital_col_names=True,
+            )
+            # finer series usually keep a shorter history than the vendor's coarser bars,
+            # a range starting well before the first finer bar is left to the coarser series
+            first = self.__to_exchange_clock(data.index, exchange).min()
+            if first - start_datetime > SecuritiesMaster.__gap_merge_tolerance:
+                continue
+            return self.__resample_ohlcv(data, interval, exchange)
+        return None
+
+    def __get_ticker_prices(
+        self,
+        ticker: str,
+        interval: int,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        vendor: str,
+        vendor_obj: APIManager,
+        exchange: str,
+        instrument: str,
+        cache_data: bool,
+        progress: bool,
+        prefetched_data: pd.DataFrame = None,
+        read_mode: READ_MODE = READ_MODE.PANDAS,
+    ) -> pd.DataFrame:
+        """
+        Concurrent requests for the same series and range share a single __load_ticker_prices
+        call, so they read the database, download and cache the data once between them.
+        """
+        data, shared = self.__price_fetches.do(
+            (
+                ticker,
+                vendor,
+                exchange,
+                interval,
+                start_datetime,
+                end_datetime,
+                cache_data,
+            ),
+            self.__load_ticker_prices,
+            ticker=ticker,
+            interval=interval,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            vendor=vendor,
+            vendor_obj=vendor_obj,
+            exchange=exchange,
+            instrument=instrument,
+            cache_data=cache_data,
+            progress=progress,
+            prefetched_data=prefetched_data,
+            read_mode=read_mode,
+        )
+        # a shared frame is copied for every caller, the API modifies the frames it returns
+        return data.copy(deep=True) if shared else data
+
+    def __load_ticker_prices(
+        self,
+        ticker: str,
+        interval: int,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        vendor: str,
+        vendor_obj: APIManager,
+        exchange: str,
+        instrument: str,
+        cache_data: bool,
+        progress: bool,
+        prefetched_data: pd.DataFrame = None,
+        read_mode: READ_MODE = READ_MODE.PANDAS,
+    ) -> pd.DataFrame:
+        """
+        Loads a single ticker's data from the database, if not found or valid range
+        is not present, then gets it from the vendor.
+        prefetched_data is used in place of a vendor download when the ticker was
+        part of a batched download in get_prices.
+        """
+        table_name: str = self.__get_price_table_name(
+            ticker, vendor, exchange, interval
+        )
+        if self.__price_cache is not None:
+            data = self.__price_cache.get(
+                (ticker, vendor, exchange, interval), start_datetime, end_datetime
+            )
+            if data is not None:
+                return data
+
+        coverage = self.__get_coverage(table_name, ticker, vendor, exchange, interval)
+        gaps = self.__get_missing_ranges(coverage, start_datetime, end_datetime)
+        if len(gaps) > 0:
+            # a stored finer series may already cover the range, e.g. m1 bars for h1
+            resampled = self.__get_resampled_prices(
+                ticker=ticker,
+                vendor=vendor,
+                vendor_obj=vendor_obj,
+                exchange=exchange,
+                interval=interval,
+                start_datetime=start_datetime,
+                end_datetime=end_datetime,
+                read_mode=read_mode,
+            )
+            if resampled is not None:
+                if self.__price_cache is not None:
+                    self.__price_cache.put(
+                        (ticker, vendor, exchange, interval),
+                        resampled,
+                        start_datetime,
+                        end_datetime,
+                    )
+                return resampled
+        failed_gaps: List[Tuple[datetime, datetime]] = []
+        try:
+            # nothing in the requested range is stored, the database is not read at all
+            if gaps == [(start_datetime, end_datetime)]:
+                raise ValueError
+            with self.__engine.connect() as conn:
+                data: pd.DataFrame = self.__read_prices(
+                    conn=conn,
+                    table_name=table_name,
+                    ticker=ticker,
+                    vendor=vendor,
+                    exchange=exchange,
+                    interval=interval,
+                    start_datetime=start_datetime,
+                    end_datetime=end_datetime,
+                    read_mode=read_mode,
+                )
+            if data.empty:
+                data = data.set_index("Datetime")
+            else:
+                data = vendor_obj.process_OHLC_dataframe(
+                    dataframe=data,
+                    datetime_index=True,
+                    replace_close=False,
+                    capital_col_names=True,
+                ).sort_index(ascending=True)
+            if len(gaps) > 0:
+                data, failed_gaps = self.__fill_missing_data(
+                    dataframe=data,
+                    gaps=gaps,
+                    table_name=table_name,
+                    ticker=ticker,
+                    interval=interval,
+                    vendor=vendor,
+                    vendor_obj=vendor_obj,
+                    exchange=exchange,
+                    instrument=instrument,
+                    cache_data=cache_data,
+                    progress=progress,
+                )
+        except (ValueError, exc.ProgrammingError) as e:
+            # a failed batched download is retried on its own before giving up
+            if prefetched_data is None or vendor_obj.is_failed_response(
+                prefetched_data
+            ):
+                prefetched_data = vendor_obj.get_data(
+                    interval=interval,
+                    exchange=exchange,
+                    start_datetime=start_datetime,
+                    end_datetime=end_datetime + timedelta(days=1),
+                    tickers=[ticker],
+                    replace_close=False,
+                    progress=False,
+                )[ticker]
+                prefetched_data = self.__clip_to_range(
+                    prefetched_data, start_datetime, end_datetime, exchange
+                )
+            if vendor_obj.is_failed_response(prefetched_data):
+                raise Exception(
+                    f"{vendor} request for {ticker} failed: {prefetched_data.attrs['error']}"
+                )
+            data = vendor_obj.process_OHLC_dataframe(
+                dataframe=prefetched_data,
+                datetime_index=True,
+                replace_close=False,
+                capital_col_names=True,
+            ).sort_index(ascending=True)
+            if cache_data:
+                self.__cache_data_to_db(
+                    data=data,
+                    table_name=table_name,
+                    ticker=ticker,
+                    vendor=vendor,
+                    vendor_obj=vendor_obj,
+                    exchange=exchange,
+                    interval=interval,
+                    instrument=instrument,
+                    covered_ranges=[(start_datetime, end_datetime)],
+                )
+
+        if self.__price_cache is not None:
+            # gaps whose download failed stay uncached so that the next request retries them
+            covered_ranges: List[Tuple[datetime, datetime]] = []
+            covered_start = start_datetime
+            for failed_start, failed_end in failed_gaps:
+                if failed_start > covered_start:
+                    covered_ranges.append((covered_start, failed_start))
+                covered_start = max(covered_start, failed_end)
+            if end_datetime > covered_start or len(failed_gaps) == 0:
+                covered_ranges.append((covered_start, end_datetime))
+            for covered_start, covered_end in covered_ranges:
+                self.__price_cache.put(
+                    (ticker, vendor, exchange, interval),
+                    data,
+                    covered_start,
+                    covered_end,
+                )
+        return data
 
     def get_prices(
         self,
@@ -348,10 +2311,17 @@ class SecuritiesMaster:
         vendor_login_credentials: Dict[str, str] = {},
         cache_data=False,
         progress=False,
+        workers: int = 1,
+        read_mode: str = READ_MODE.PANDAS.value,
     ) -> Dict[str, pd.DataFrame]:
         """
         Publically available method that the user can call to obtain
         data for a list of tickers.
+        When workers > 1, tickers are processed concurrently by that many threads.
+        read_mode selects how stored prices are read, READ_MODE.COPY streams them
+        through COPY TO STDOUT instead of pd.read_sql_query.
+        A ticker that fails does not stop the others, it is returned as an
+        APIManager.failed_response carrying the error whatever the number of workers.
         """
         # Checking validity of inputs
         if tickers is None and index is None:
@@ -368,52 +2338,77 @@ class SecuritiesMaster:
             raise Exception(
                 f"start_datetime({start_datetime}) must be before end_datetime({end_datetime})"
             )
+        if workers < 1:
+            raise Exception(f"workers({workers}) must be at least 1")
         if end_datetime >= datetime.now():
             raise Exception(
                 f"end_datetime({end_datetime}) must be at or before current datetime{datetime.now()}"
             )
 
-        vendor_obj: APIManager = getattr(
-            importlib.import_module(
-                name=f"VendorsApiManagers.{VENDOR(vendor).name.lower()}"
-            ),  # module name
-            f"{VENDOR(vendor).name[0:1] + VENDOR(vendor).name[1:].lower()}Data",  # class name
-        )(vendor_login_credentials)
+        vendor_obj: APIManager = self.__vendor_registry.get_vendor(
+            vendor, vendor_login_credentials, self.__vendor_cache
+        )
 
         if index is not None and tickers is None:
-            exchange_obj: IndexLoader = getattr(
-                importlib.import_module(
-                    name=f"Exchanges.{EXCHANGE(exchange).name.lower()}_tickers"
-                ),  # module name
-                f"{EXCHANGE(exchange).name}Tickers",  # class name
-            )
-            tickers = list(exchange_obj.get_tickers(index=index).keys())
+            tickers = list(self.get_index_constituents(index, exchange).keys())
+
+        # tickers without a table are downloaded together so that an index universe
+        # costs a few batched vendor calls instead of one call per ticker
+        prefetched: Dict[str, pd.DataFrame] = {}
+        cached_tickers: List[str] = self.__get_cached_tickers(
+            tickers, vendor, exchange, interval
+        )
+        uncached_tickers: List[str] = [
+            ticker for ticker in tickers if ticker not in cached_tickers
+        ]
+        if len(uncached_tickers) > 1:
+            try:
+                # concurrent identical requests, e.g. for the same index, share one download,
+                # the shared frames are only read by __load_ticker_prices
+                prefetched, _ = self.__prefetches.do(
+                    (
+                        vendor_obj,
+                        exchange,
+                        interval,
+                        tuple(sorted(uncached_tickers)),
+                        start_datetime,
+                        end_datetime,
+                    ),
+                    vendor_obj.get_data,
+                    interval=interval,
+                    exchange=exchange,
+                    start_datetime=start_datetime,
+                    end_datetime=end_datetime + timedelta(days=1),
+                    tickers=uncached_tickers,
+                    replace_close=False,
+                    progress=progress,
+                )
+                prefetched = {
+                    ticker: self.__clip_to_range(
+                        frame, start_datetime, end_datetime, exchange
+                    )
+                    for ticker, frame in prefetched.items()
+                }
+            except Exception:
+                # every ticker is then downloaded on its own, so one bad ticker or an offline
+                # cache miss only fails that ticker
+                prefetched = {}
+        if cache_data and len(uncached_tickers) > 1:
+            # the Symbol rows written by the workers then find their sectors in the vendor's cache,
+            # a failure here is left to the worker of the ticker concerned
+            try:
+                self.__get_sectors(uncached_tickers, vendor, exchange, vendor_obj)
+            except Exception:
+                pass
 
         data_dict: Dict[str, pd.DataFrame] = {}
         # load data from the database, if not found or valid range is not present, then get them from the vendor
-        for ticker in tickers:
-            table_name: str = f"prices_{ticker.lower()}_{VENDOR(vendor).name.lower()}_{EXCHANGE(exchange).name.lower()}_{INTERVAL(interval).name.lower()}"
-            try:
-                data: pd.DataFrame = pd.read_sql_query(
-                    sql=f"""
-                        SELECT * FROM "{table_name}" 
-                        WHERE 
-                            "Datetime" >= '{start_datetime.strftime("%Y-%m-%d %H:%M:%S")}' 
-                            AND 
-                            "Datetime" <= '{end_datetime.strftime("%Y-%m-%d %H:%M:%S")}'
-                    """,
-                    con=self.__engine,
-                )
-                if data.empty:
-                    raise ValueError
-                else:
-                    data = self.__fill_missing_data(
-                        dataframe=vendor_obj.process_OHLC_dataframe(
-                            dataframe=data,
-                            datetime_index=True,
-                            replace_close=False,
-                            capital_col_names=True,
-                        ).sort_index(ascending=True),
+        if workers > 1 and len(tickers) > 1:
+            # every worker checks out its own connection from the engine's pool
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures: Dict[str, Future] = {
+                    ticker: executor.submit(
+                        self.__get_ticker_prices,
                         ticker=ticker,
                         interval=interval,
                         start_datetime=start_datetime,
@@ -424,34 +2419,34 @@ class SecuritiesMaster:
                         instrument=instrument,
                         cache_data=cache_data,
                         progress=progress,
+                        prefetched_data=prefetched.get(ticker),
+                        read_mode=READ_MODE(read_mode),
                     )
-            except (ValueError, exc.ProgrammingError) as e:
-                data = vendor_obj.process_OHLC_dataframe(
-                    dataframe=vendor_obj.get_data(
+                    for ticker in tickers
+                }
+                for ticker in tickers:
+                    try:
+                        data_dict[ticker] = futures[ticker].result()
+                    except Exception as e:
+                        data_dict[ticker] = APIManager.failed_response(str(e))
+        else:
+            for ticker in tickers:
+                try:
+                    data_dict[ticker] = self.__get_ticker_prices(
+                        ticker=ticker,
                         interval=interval,
-                        exchange=exchange,
                         start_datetime=start_datetime,
                         end_datetime=end_datetime,
-                        tickers=[ticker],
-                        replace_close=False,
-                        progress=False,
-                    )[ticker],
-                    datetime_index=True,
-                    replace_close=False,
-                    capital_col_names=True,
-                ).sort_index(ascending=True)
-                if cache_data:
-                    self.__cache_data_to_db(
-                        data=data,
-                        table_name=table_name,
-                        ticker=ticker,
                         vendor=vendor,
                         vendor_obj=vendor_obj,
                         exchange=exchange,
-                        interval=interval,
                         instrument=instrument,
+                        cache_data=cache_data,
+                        progress=progress,
+                        prefetched_data=prefetched.get(ticker),
+                        read_mode=READ_MODE(read_mode),
                     )
-
-            data_dict[ticker] = data
+                except Exception as e:
+                    data_dict[ticker] = APIManager.failed_response(str(e))
 
         return data_dict
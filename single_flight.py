@@ -0,0 +1,66 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, the first caller runs the function and
+    the others wait for it and receive its result or exception instead of running it too.
+    Nothing is kept once the call completes, later calls with the key run again.
+    """
+
+    __calls: Dict[Hashable, Dict[str, Any]]
+
+    def __init__(self) -> None:
+        self.__calls = {}
+        self.__lock = threading.Lock()
+        self.__executions = 0
+        self.__shared = 0
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Returns func(*args, **kwargs) and whether the result is shared with other callers,
+        in which case it must be copied before it is modified.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            if call is None:
+                call = {
+                    "done": threading.Event(),
+                    "result": None,
+                    "error": None,
+                    "waiters": 0,
+                }
+                self.__calls[key] = call
+                self.__executions += 1
+                leader = True
+            else:
+                call["waiters"] += 1
+                self.__shared += 1
+                leader = False
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+
+        try:
+            call["result"] = func(*args, **kwargs)
+        except Exception as e:
+            call["error"] = e
+            raise e
+        finally:
+            # no caller can join once the key is removed, so waiters is final
+            with self.__lock:
+                del self.__calls[key]
+            call["done"].set()
+        return call["result"], call["waiters"] > 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {
+                "executions": self.__executions,
+                "shared": self.__shared,
+                "in_flight": len(self.__calls),
+            }
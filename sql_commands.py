@@ -43,4 +43,78 @@ commands = {
                     REFERENCES DataVendor(name)
         );
     """,
+    "CreateCoverageTable": """
+        CREATE TABLE IF NOT EXISTS Coverage (
+            ticker VARCHAR(64) NOT NULL,
+            vendor VARCHAR(255) NOT NULL,
+            exchange VARCHAR(255) NOT NULL,
+            interval BIGINT NOT NULL,
+            start_datetime TIMESTAMP NOT NULL,
+            end_datetime TIMESTAMP NOT NULL,
+            PRIMARY KEY (ticker, vendor, exchange, interval, start_datetime),
+            CONSTRAINT symbol_frk
+                FOREIGN KEY(ticker, vendor, exchange, interval)
+                    REFERENCES Symbol(ticker, vendor, exchange, interval)
+                    ON DELETE CASCADE
+        );
+    """,
+    "CreateIndexConstituentTable": """
+        CREATE TABLE IF NOT EXISTS IndexConstituent (
+            exchange VARCHAR(255) NOT NULL,
+            index_name VARCHAR(64) NOT NULL,
+            as_of_date DATE NOT NULL,
+            ticker VARCHAR(64) NOT NULL,
+            industry VARCHAR(255) NULL,
+            created_datetime TIMESTAMP NOT NULL,
+            PRIMARY KEY (exchange, index_name, as_of_date, ticker),
+            CONSTRAINT exchange_frk
+                FOREIGN KEY(exchange)
+                    REFERENCES Exchange(name)
+        );
+    """,
+}
+
+consolidated_commands = {
+    "AddSymbolIdColumn": """
+        ALTER TABLE Symbol ADD COLUMN IF NOT EXISTS symbol_id BIGSERIAL UNIQUE;
+    """,
+    "CreatePricesTable": """
+        CREATE TABLE IF NOT EXISTS Prices (
+            symbol_id BIGINT NOT NULL,
+            interval BIGINT NOT NULL,
+            "Datetime" TIMESTAMP NOT NULL,
+            "Open" DOUBLE PRECISION NULL,
+            "High" DOUBLE PRECISION NULL,
+            "Low" DOUBLE PRECISION NULL,
+            "Close" DOUBLE PRECISION NULL,
+            "Adj Close" DOUBLE PRECISION NULL,
+            "Volume" DOUBLE PRECISION NULL,
+            PRIMARY KEY (symbol_id, interval, "Datetime"),
+            CONSTRAINT symbol_frk
+                FOREIGN KEY(symbol_id)
+                    REFERENCES Symbol(symbol_id)
+                    ON DELETE CASCADE
+        ) PARTITION BY LIST (interval);
+    """,
+    "CreatePricesDatetimeIndex": """
+        CREATE INDEX IF NOT EXISTS prices_datetime_idx ON Prices ("Datetime");
+    """,
+}
+
+partition_commands = {
+    "CreateIntervalPartition": """
+        CREATE TABLE IF NOT EXISTS "{partition_name}"
+            PARTITION OF Prices FOR VALUES IN ({interval})
+            PARTITION BY RANGE ("Datetime");
+    """,
+    "CreateRangePartition": """
+        CREATE TABLE IF NOT EXISTS "{partition_name}"
+            PARTITION OF "{parent_name}" FOR VALUES FROM ('{start}') TO ('{end}');
+    """,
+}
+
+price_table_commands = {
+    "CreateDatetimeKey": """
+        CREATE UNIQUE INDEX IF NOT EXISTS "{table_name}_datetime_key" ON "{table_name}" ("Datetime");
+    """,
 }
@@ -0,0 +1,40 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase took, either timed on its own with phase or as
+    the time since the timer was created with mark. Phases may complete after the server
+    started accepting requests, as the lazily built SecuritiesMaster does.
+    """
+
+    __started: float
+    __phases: Dict[str, float]
+
+    def __init__(self) -> None:
+        self.__started = time.perf_counter()
+        self.__phases = {}
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.__phases[name] = time.perf_counter() - start
+
+    def mark(self, name: str) -> None:
+        """
+        Records the seconds from the timer's creation until now as name.
+        """
+        with self.__lock:
+            self.__phases[name] = time.perf_counter() - self.__started
+
+    def get_phases(self) -> Dict[str, float]:
+        with self.__lock:
+            return dict(self.__phases)
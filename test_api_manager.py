@@ -0,0 +1,99 @@
+import secrets
+import tempfile
+import threading
+import unittest
+
+from typing import Dict, List
+from VendorsApiManagers.api_manager import APIManager
+from VendorsApiManagers.response_cache import ResponseCache
+from commons import EXCHANGE
+
+
+class FakeDetails(APIManager):
+    """
+    Serves the sector of every ticker and fails the tickers in failing, counting the
+    tickers it was asked for.
+    """
+
+    fetched: List[str] = []
+    failing: set = set()
+    lock = threading.Lock()
+
+    def get_data(self, *args, **kwargs):
+        return {}
+
+    @staticmethod
+    def get_vendor_ticker(ticker: str, exchange: str) -> str:
+        return ticker
+
+    def get_ticker_detail(self, ticker: str, exchange: str, detail: str) -> str:
+        return self.fetch_ticker_details(ticker, exchange, [detail])[detail]
+
+    def fetch_ticker_details(
+        self, ticker: str, exchange: str, details: List[str]
+    ) -> Dict[str, str]:
+        with FakeDetails.lock:
+            FakeDetails.fetched.append(ticker)
+        if ticker in FakeDetails.failing:
+            raise Exception("HTTP Error 404: Not Found")
+        return {detail: f"{detail} of {ticker}" for detail in details}
+
+
+class UncachedDetails(FakeDetails):
+    """
+    Keeps no details in process, so lookups go to the response cache.
+    """
+
+    _ticker_detail_ttl = 0
+
+
+class TickerDetailsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        FakeDetails.fetched, FakeDetails.failing = [], set()
+        # the in-process cache outlives the test, so every test asks for new tickers
+        self.tickers = [f"TEST{secrets.token_hex(4).upper()}" for _ in range(3)]
+
+    def get_sectors(self, vendor: APIManager) -> Dict[str, Dict[str, str]]:
+        return vendor.get_ticker_details(self.tickers, EXCHANGE.NSE.value, ["sector"])
+
+    def test_details_are_fetched_once(self) -> None:
+        vendor = FakeDetails({})
+        expected = {
+            ticker: {"sector": f"sector of {ticker}"} for ticker in self.tickers
+        }
+        self.assertEqual(self.get_sectors(vendor), expected)
+        self.assertEqual(self.get_sectors(FakeDetails({})), expected)
+        self.assertEqual(sorted(FakeDetails.fetched), sorted(self.tickers))
+
+    def test_failed_fetches_are_not_cached(self) -> None:
+        FakeDetails.failing = {self.tickers[0]}
+        vendor = FakeDetails({})
+        self.assertEqual(self.get_sectors(vendor)[self.tickers[0]], {"sector": None})
+        FakeDetails.failing = set()
+        self.assertEqual(
+            self.get_sectors(vendor)[self.tickers[0]],
+            {"sector": f"sector of {self.tickers[0]}"},
+        )
+        self.assertEqual(len(FakeDetails.fetched), 4)
+
+    def test_known_details_are_not_fetched(self) -> None:
+        FakeDetails.set_ticker_details(
+            EXCHANGE.NSE.value, {ticker: {"sector": "Banks"} for ticker in self.tickers}
+        )
+        self.assertEqual(
+            self.get_sectors(FakeDetails({})),
+            {ticker: {"sector": "Banks"} for ticker in self.tickers},
+        )
+        self.assertEqual(FakeDetails.fetched, [])
+
+    def test_details_are_read_from_the_response_cache(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        expected = self.get_sectors(UncachedDetails({}, ResponseCache(directory.name)))
+        offline = UncachedDetails({}, ResponseCache(directory.name, offline=True))
+        self.assertEqual(self.get_sectors(offline), expected)
+        self.assertEqual(len(FakeDetails.fetched), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
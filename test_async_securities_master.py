@@ -0,0 +1,182 @@
+import time
+import asyncio
+import threading
+import unittest
+
+from unittest import mock
+from typing import Any, Dict, Iterator, List
+from database import POOL_SETTINGS
+from async_securities_master import AsyncSecuritiesMaster
+
+
+class FakeSecuritiesMaster:
+    """
+    Stands in for SecuritiesMaster, get_prices blocks for delay seconds and records the
+    threads each call ran on.
+    """
+
+    def __init__(self, delay: float = 0, chunk_delay: float = 0) -> None:
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.threads: Dict[str, List[str]] = {}
+        self.closed = threading.Event()
+        self.lock = threading.Lock()
+
+    def record(self, method: str) -> None:
+        with self.lock:
+            self.threads.setdefault(method, []).append(threading.current_thread().name)
+
+    def get_all_tables(self) -> List[str]:
+        self.record("get_all_tables")
+        return ["symbol"]
+
+    def get_prices(self, **kwargs) -> Dict[str, Any]:
+        self.record("get_prices")
+        time.sleep(self.delay)
+        return {ticker: None for ticker in kwargs["tickers"]}
+
+    def stream_table(
+        self, table_name: str, chunk_size: int, **kwargs
+    ) -> Iterator[List[Dict[str, Any]]]:
+        self.record("stream_table")
+
+        def chunks() -> Iterator[List[Dict[str, Any]]]:
+            try:
+                for start in range(0, 5, chunk_size):
+                    self.record("next")
+                    time.sleep(self.chunk_delay)
+                    yield [
+                        {"row": row} for row in range(start, min(start + chunk_size, 5))
+                    ]
+            finally:
+                self.closed.set()
+
+        return chunks()
+
+
+class AsyncSecuritiesMasterTest(unittest.TestCase):
+    def get_prices(self, securities_master: AsyncSecuritiesMaster, ticker: str):
+        return securities_master.get_prices(
+            interval=1,
+            start_datetime=None,
+            end_datetime=None,
+            vendor="Yahoo",
+            exchange="NSE",
+            instrument="Stock",
+            tickers=[ticker],
+        )
+
+    def test_slow_downloads_do_not_block_database_calls(self) -> None:
+        fake = FakeSecuritiesMaster(delay=0.3)
+        securities_master = AsyncSecuritiesMaster(fake, db_workers=2, vendor_workers=1)
+        self.addCleanup(securities_master.shutdown)
+
+        async def run() -> float:
+            downloads = [
+                asyncio.create_task(self.get_prices(securities_master, ticker))
+                for ticker in ["TCS", "INFY"]
+            ]
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            self.assertEqual(await securities_master.get_all_tables(), ["symbol"])
+            waited = time.perf_counter() - start
+            self.assertEqual(
+                await asyncio.gather(*downloads), [{"TCS": None}, {"INFY": None}]
+            )
+            return waited
+
+        start = time.perf_counter()
+        self.assertLess(asyncio.run(run()), 0.1)
+        # one vendor worker runs the downloads one after the other
+        self.assertGreaterEqual(time.perf_counter() - start, 0.6)
+        self.assertTrue(
+            all(
+                name.startswith("securities-master-vendor")
+                for name in fake.threads["get_prices"]
+            )
+        )
+        self.assertTrue(
+            fake.threads["get_all_tables"][0].startswith("securities-master-db")
+        )
+
+    def test_streamed_chunks_are_read_on_the_database_executor(self) -> None:
+        fake = FakeSecuritiesMaster()
+        securities_master = AsyncSecuritiesMaster(fake)
+        self.addCleanup(securities_master.shutdown)
+
+        async def run() -> List[List[Dict[str, Any]]]:
+            chunks = await securities_master.stream_table("symbol", chunk_size=2)
+            return [chunk async for chunk in chunks]
+
+        chunks = asyncio.run(run())
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertTrue(fake.closed.is_set())
+        self.assertTrue(
+            all(
+                name.startswith("securities-master-db") for name in fake.threads["next"]
+            )
+        )
+
+    def test_abandoned_streams_are_closed(self) -> None:
+        fake = FakeSecuritiesMaster()
+        securities_master = AsyncSecuritiesMaster(fake)
+        self.addCleanup(securities_master.shutdown)
+
+        async def run() -> None:
+            chunks = await securities_master.stream_table("symbol", chunk_size=2)
+            async for _ in chunks:
+                break
+            await chunks.aclose()
+
+        asyncio.run(run())
+        self.assertTrue(fake.closed.is_set())
+        self.assertEqual(len(fake.threads["next"]), 1)
+
+    def test_cancelled_streams_are_closed_after_the_chunk_being_read(self) -> None:
+        fake = FakeSecuritiesMaster(chunk_delay=0.2)
+        securities_master = AsyncSecuritiesMaster(fake)
+        self.addCleanup(securities_master.shutdown)
+
+        async def run() -> None:
+            chunks = await securities_master.stream_table("symbol", chunk_size=2)
+
+            async def consume() -> None:
+                async for _ in chunks:
+                    pass
+
+            request = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            request.cancel()
+            # closing the generator while next() runs would raise ValueError instead
+            with self.assertRaises(asyncio.CancelledError):
+                await request
+
+        asyncio.run(run())
+        self.assertTrue(fake.closed.is_set())
+        self.assertEqual(len(fake.threads["next"]), 1)
+
+    def test_worker_counts_default_to_the_pool_settings(self) -> None:
+        fake = FakeSecuritiesMaster(delay=0.05)
+        with mock.patch.dict(POOL_SETTINGS, {"pool_size": 3, "max_overflow": 1}):
+            securities_master = AsyncSecuritiesMaster(fake)
+        self.addCleanup(securities_master.shutdown)
+        self.assertEqual(
+            securities_master._AsyncSecuritiesMaster__db_executor._max_workers, 4
+        )
+
+        async def run() -> None:
+            await asyncio.gather(
+                *[self.get_prices(securities_master, str(i)) for i in range(10)]
+            )
+
+        asyncio.run(run())
+        self.assertEqual(len(set(fake.threads["get_prices"])), 2)
+
+    def test_worker_counts_are_checked(self) -> None:
+        for kwargs in [{"db_workers": 0}, {"vendor_workers": 0}]:
+            with self.subTest(**kwargs), self.assertRaises(Exception):
+                AsyncSecuritiesMaster(FakeSecuritiesMaster(), **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sqlalchemy
+
+from sqlalchemy import exc, sql
+from database import DATABASE_URL, POOL_SETTINGS, engine, session_scope
+from connection_pool import InstrumentedQueuePool, create_pooled_engine, get_pool_stats
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py.
+    """
+
+    def setUp(self) -> None:
+        self.engine = create_pooled_engine(
+            DATABASE_URL, pool_size=1, max_overflow=0, pool_timeout=0.1
+        )
+        try:
+            self.engine.connect().close()
+        except exc.OperationalError as e:
+            raise unittest.SkipTest(f"database is not reachable: {e}")
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def test_checkouts_and_timeouts_are_counted(self) -> None:
+        with self.engine.connect() as conn:
+            conn.execute(sql.text("SELECT 1"))
+            stats = get_pool_stats(self.engine)
+            self.assertEqual(stats["checked_out"], 1)
+            self.assertEqual(stats["saturation"], 1.0)
+            with self.assertRaises(exc.TimeoutError):
+                self.engine.connect()
+        stats = get_pool_stats(self.engine)
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["peak_checked_out"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+
+    def test_shared_engine_uses_the_pool_settings(self) -> None:
+        self.assertIsInstance(engine.pool, InstrumentedQueuePool)
+        stats = get_pool_stats(engine)
+        self.assertEqual(stats["pool_size"], POOL_SETTINGS["pool_size"])
+        self.assertEqual(stats["max_overflow"], POOL_SETTINGS["max_overflow"])
+        self.assertEqual(engine.pool._recycle, POOL_SETTINGS["pool_recycle"])
+        self.assertEqual(engine.pool._pre_ping, POOL_SETTINGS["pool_pre_ping"])
+        self.assertEqual(engine.pool._timeout, POOL_SETTINGS["pool_timeout"])
+
+    def test_sessions_return_their_connection_to_the_pool(self) -> None:
+        checked_out = engine.pool.checkedout()
+        with self.assertRaises(sqlalchemy.exc.ProgrammingError):
+            with session_scope() as session:
+                session.execute(sql.text("SELECT 1"))
+                self.assertEqual(engine.pool.checkedout(), checked_out + 1)
+                session.execute(sql.text("SELECT * FROM no_such_table"))
+        self.assertEqual(engine.pool.checkedout(), checked_out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import asyncio
+import unittest
+import threading
+import subprocess
+
+from async_securities_master import AsyncSecuritiesMaster
+
+# run in a fresh interpreter, so nothing the other tests imported is loaded yet
+IMPORT_MAIN = """
+import sys
+import json
+import database
+from sqlalchemy import event
+
+statements = []
+event.listen(
+    database.engine,
+    "before_cursor_execute",
+    lambda conn, cursor, statement, *args: statements.append(statement),
+)
+import main
+
+print(json.dumps({
+    "modules": [
+        name
+        for name in ["pandas", "numpy", "pyarrow", "yfinance", "securities_master"]
+        if name in sys.modules
+    ],
+    "statements": statements,
+    "phases": sorted(main.startup_timer.get_phases()),
+}))
+"""
+
+
+class ColdStartTest(unittest.TestCase):
+    def test_importing_main_is_light(self) -> None:
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_MAIN],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report = json.loads(result.stdout.splitlines()[-1])
+        self.assertEqual(report["modules"], [])
+        # no schema checks, the schema is applied by migrations.py
+        self.assertEqual(report["statements"], [])
+        self.assertEqual(report["phases"], ["app", "imports"])
+
+    def test_securities_master_is_built_once_on_first_use(self) -> None:
+        builds = []
+
+        def build() -> object:
+            builds.append(threading.current_thread().name)
+            return object()
+
+        securities_master = AsyncSecuritiesMaster(build)
+        self.addCleanup(securities_master.shutdown)
+        self.assertEqual(builds, [])
+
+        async def run() -> None:
+            await asyncio.gather(*[securities_master.preload() for _ in range(3)])
+
+        asyncio.run(run())
+        self.assertIs(
+            securities_master.securities_master, securities_master.securities_master
+        )
+        self.assertEqual(len(builds), 1)
+        self.assertTrue(builds[0].startswith("securities-master-db"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import time
+import unittest
+
+from typing import List
+from metadata_cache import MetadataCache
+
+
+class MetadataCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loads: List[str] = []
+
+    def load(self) -> List[str]:
+        self.loads.append("vendors")
+        return ["Yahoo"]
+
+    def test_values_are_loaded_once_within_the_ttl(self) -> None:
+        cache = MetadataCache(60)
+        for _ in range(3):
+            self.assertEqual(cache.get("vendors", self.load), ["Yahoo"])
+        self.assertEqual(len(self.loads), 1)
+
+    def test_expired_values_are_reloaded(self) -> None:
+        cache = MetadataCache(0.05)
+        cache.get("vendors", self.load)
+        time.sleep(0.1)
+        cache.get("vendors", self.load)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_invalidated_values_are_reloaded(self) -> None:
+        cache = MetadataCache(60)
+        cache.get("vendors", self.load)
+        cache.get("exchanges", self.load)
+        cache.invalidate("vendors")
+        cache.get("vendors", self.load)
+        cache.get("exchanges", self.load)
+        self.assertEqual(len(self.loads), 3)
+        cache.clear()
+        cache.get("exchanges", self.load)
+        self.assertEqual(len(self.loads), 4)
+
+    def test_zero_ttl_disables_caching(self) -> None:
+        cache = MetadataCache(0)
+        cache.get("vendors", self.load)
+        cache.get("vendors", self.load)
+        self.assertEqual(len(self.loads), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
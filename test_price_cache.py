@@ -0,0 +1,122 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from price_cache import PriceCache
+from commons import VENDOR, EXCHANGE, INTERVAL
+
+KEY = ("TCS", VENDOR.YAHOO.value, EXCHANGE.NSE.value, INTERVAL.m1.value)
+
+
+def make_prices(index: pd.DatetimeIndex) -> pd.DataFrame:
+    close = np.arange(len(index), dtype=float)
+    return pd.DataFrame({"Close": close}, index=index.rename("Datetime"))
+
+
+class PriceCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = PriceCache(1 << 20)
+        self.session = self.make_session()
+
+    @staticmethod
+    def make_session() -> pd.DataFrame:
+        """
+        One session of m1 bars, as read back from a timestamptz column in UTC.
+        """
+        return make_prices(
+            pd.date_range(
+                "2024-03-04 09:15", "2024-03-04 15:30", freq="1min", tz="Asia/Kolkata"
+            ).tz_convert("UTC")
+        )
+
+    def test_naive_bounds_are_on_the_exchange_clock(self) -> None:
+        self.cache.put(
+            KEY,
+            self.session,
+            datetime(2024, 3, 4, 9, 15),
+            datetime(2024, 3, 4, 15, 30),
+        )
+        data = self.cache.get(
+            KEY, datetime(2024, 3, 4, 9, 15), datetime(2024, 3, 4, 10, 15)
+        )
+        self.assertEqual(len(data), 61)
+        self.assertEqual(data.index[0], pd.Timestamp("2024-03-04 09:15+05:30"))
+        self.assertEqual(data.index[-1], pd.Timestamp("2024-03-04 10:15+05:30"))
+
+    def test_naive_frames_are_sliced_as_they_are(self) -> None:
+        naive = self.session.set_axis(
+            self.session.index.tz_convert("Asia/Kolkata").tz_localize(None)
+        )
+        self.cache.put(
+            KEY, naive, datetime(2024, 3, 4, 9, 15), datetime(2024, 3, 4, 15, 30)
+        )
+        data = self.cache.get(
+            KEY, datetime(2024, 3, 4, 15, 0), datetime(2024, 3, 4, 15, 30)
+        )
+        self.assertEqual(len(data), 31)
+        self.assertEqual(data.index[0], pd.Timestamp("2024-03-04 15:00"))
+
+    def test_misses_ranges_that_are_not_covered(self) -> None:
+        self.cache.put(
+            KEY,
+            self.session.iloc[:61],
+            datetime(2024, 3, 4, 9, 15),
+            datetime(2024, 3, 4, 10, 15),
+        )
+        self.cache.put(
+            KEY,
+            self.session.iloc[-61:],
+            datetime(2024, 3, 4, 14, 30),
+            datetime(2024, 3, 4, 15, 30),
+        )
+        self.assertIsNone(
+            self.cache.get(
+                KEY, datetime(2024, 3, 4, 10, 0), datetime(2024, 3, 4, 14, 45)
+            )
+        )
+        self.assertEqual(
+            len(
+                self.cache.get(
+                    KEY, datetime(2024, 3, 4, 14, 30), datetime(2024, 3, 4, 15, 30)
+                )
+            ),
+            61,
+        )
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+
+    def test_overlapping_ranges_are_merged(self) -> None:
+        self.cache.put(
+            KEY,
+            self.session.iloc[:200],
+            datetime(2024, 3, 4, 9, 15),
+            datetime(2024, 3, 4, 12, 34),
+        )
+        self.cache.put(
+            KEY,
+            self.session.iloc[100:],
+            datetime(2024, 3, 4, 10, 55),
+            datetime(2024, 3, 4, 15, 30),
+        )
+        data = self.cache.get(
+            KEY, datetime(2024, 3, 4, 9, 15), datetime(2024, 3, 4, 15, 30)
+        )
+        self.assertEqual(len(data), len(self.session))
+        self.assertTrue(data.index.is_unique)
+
+    def test_evicts_least_recently_used_entries(self) -> None:
+        entry_bytes = int(self.session.memory_usage(index=True, deep=True).sum())
+        cache = PriceCache(entry_bytes * 2)
+        start, end = datetime(2024, 3, 4, 9, 15), datetime(2024, 3, 4, 15, 30)
+        keys = [(ticker,) + KEY[1:] for ticker in ["TCS", "INFY", "WIPRO"]]
+        for key in keys[:2]:
+            cache.put(key, self.make_session(), start, end)
+        cache.get(keys[0], start, end)
+        cache.put(keys[2], self.make_session(), start, end)
+        self.assertIsNone(cache.get(keys[1], start, end))
+        self.assertIsNotNone(cache.get(keys[0], start, end))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
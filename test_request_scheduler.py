@@ -0,0 +1,90 @@
+import time
+import threading
+import unittest
+
+from VendorsApiManagers.request_scheduler import RequestScheduler, RetryableError
+
+
+class RequestSchedulerTest(unittest.TestCase):
+    def test_requests_beyond_the_burst_are_paced(self) -> None:
+        scheduler = RequestScheduler(requests_per_second=20, burst=2)
+        start = time.monotonic()
+        for _ in range(6):
+            scheduler.call(lambda: None)
+        # 2 requests from the burst, the other 4 wait 1 / 20 seconds each
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+        stats = scheduler.get_stats()
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["throttled"], 4)
+
+    def test_cost_is_charged_per_vendor_request(self) -> None:
+        scheduler = RequestScheduler(requests_per_second=20, burst=5)
+        start = time.monotonic()
+        scheduler.call(lambda: None, cost=7)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_retryable_errors_are_retried_with_backoff(self) -> None:
+        scheduler = RequestScheduler(max_retries=2, base_delay=0.02)
+        attempts = []
+
+        def flaky() -> str:
+            attempts.append(time.monotonic())
+            if len(attempts) < 3:
+                raise RetryableError("HTTP Error 429: Too Many Requests")
+            return "ok"
+
+        self.assertEqual(scheduler.call(flaky), "ok")
+        # the second retry waits at least half of twice the base delay
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.01)
+        self.assertGreaterEqual(attempts[2] - attempts[1], 0.02)
+        stats = scheduler.get_stats()
+        self.assertEqual((stats["retries"], stats["successes"]), (2, 1))
+
+    def test_retry_after_and_the_retry_budget_are_respected(self) -> None:
+        scheduler = RequestScheduler(max_retries=1, base_delay=0.001)
+        attempts = []
+
+        def limited() -> None:
+            attempts.append(time.monotonic())
+            raise RetryableError("HTTP Error 429: Too Many Requests", retry_after=0.1)
+
+        with self.assertRaises(RetryableError):
+            scheduler.call(limited)
+        self.assertEqual(len(attempts), 2)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.1)
+        self.assertEqual(scheduler.get_stats()["failures"], 1)
+
+    def test_other_errors_are_not_retried(self) -> None:
+        scheduler = RequestScheduler()
+        attempts = []
+
+        def broken() -> None:
+            attempts.append(1)
+            raise ValueError("No data found for this date range")
+
+        with self.assertRaises(ValueError):
+            scheduler.call(broken)
+        self.assertEqual(len(attempts), 1)
+
+    def test_backoff_grows_up_to_the_max_delay(self) -> None:
+        scheduler = RequestScheduler(base_delay=1, max_delay=4)
+        for attempt, delay in [(0, 1), (1, 2), (2, 4), (5, 4)]:
+            backoff = scheduler.get_backoff(attempt)
+            self.assertGreaterEqual(backoff, delay / 2)
+            self.assertLessEqual(backoff, delay)
+
+    def test_in_flight_requests_are_bounded(self) -> None:
+        scheduler = RequestScheduler(requests_per_second=1000, max_in_flight=2)
+        threads = [
+            threading.Thread(target=scheduler.call, args=(time.sleep, 0.05))
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(scheduler.get_stats()["peak_in_flight"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
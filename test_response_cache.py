@@ -0,0 +1,110 @@
+import os
+import time
+import tempfile
+import unittest
+import pandas as pd
+
+from datetime import datetime, timedelta
+from VendorsApiManagers.response_cache import ResponseCache
+from commons import VENDOR, INTERVAL
+
+VENDOR_NAME = VENDOR.YAHOO.name
+OLD_RANGE = ("2024-03-01", "2024-03-08")
+
+
+def make_response() -> pd.DataFrame:
+    index = pd.date_range("2024-03-01", periods=3, name="Datetime")
+    return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_cache(self, **kwargs) -> ResponseCache:
+        return ResponseCache(self.directory.name, **kwargs)
+
+    def get(self, cache: ResponseCache, start_date: str, end_date: str):
+        return cache.get(VENDOR_NAME, "TCS", INTERVAL.d1.value, start_date, end_date)
+
+    def put(self, cache: ResponseCache, start_date: str, end_date: str) -> None:
+        cache.put(
+            VENDOR_NAME,
+            "TCS",
+            INTERVAL.d1.value,
+            start_date,
+            end_date,
+            make_response(),
+        )
+
+    def test_stored_responses_are_read_back(self) -> None:
+        cache = self.make_cache()
+        self.assertIsNone(self.get(cache, *OLD_RANGE))
+        self.put(cache, *OLD_RANGE)
+        pd.testing.assert_frame_equal(
+            self.get(cache, *OLD_RANGE), make_response(), check_freq=False
+        )
+        self.assertEqual(cache.get_stats(), {"hits": 1, "misses": 1})
+        # failed requests come back empty and are not stored
+        cache.put(VENDOR_NAME, "INFY", INTERVAL.d1.value, *OLD_RANGE, pd.DataFrame())
+        self.assertIsNone(cache.get(VENDOR_NAME, "INFY", INTERVAL.d1.value, *OLD_RANGE))
+
+    def test_only_recent_ranges_expire(self) -> None:
+        cache = self.make_cache(ttl=0.05)
+        recent_range = (
+            (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d"),
+            datetime.now().strftime("%Y-%m-%d"),
+        )
+        self.put(cache, *OLD_RANGE)
+        self.put(cache, *recent_range)
+        time.sleep(0.1)
+        self.assertIsNotNone(self.get(cache, *OLD_RANGE))
+        self.assertIsNone(self.get(cache, *recent_range))
+
+    def test_records_expire_after_the_ttl(self) -> None:
+        cache = self.make_cache(ttl=0.05)
+        loads = []
+
+        def load() -> dict:
+            loads.append(1)
+            return {"TCS": "Tata Consultancy Services"}
+
+        for _ in range(2):
+            self.assertEqual(
+                cache.load_record(VENDOR_NAME, "index_constituents", "NIFTY50", load),
+                {"TCS": "Tata Consultancy Services"},
+            )
+        self.assertEqual(len(loads), 1)
+        time.sleep(0.1)
+        cache.load_record(VENDOR_NAME, "index_constituents", "NIFTY50", load)
+        self.assertEqual(len(loads), 2)
+
+    def test_offline_mode_replays_without_expiry_and_raises_on_a_miss(self) -> None:
+        recent_range = (
+            (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d"),
+            datetime.now().strftime("%Y-%m-%d"),
+        )
+        self.put(self.make_cache(), *recent_range)
+        self.make_cache().put_record(VENDOR_NAME, "sector", "TCS", "Technology")
+        cache = self.make_cache(ttl=0, offline=True)
+        self.assertTrue(cache.offline)
+        self.assertIsNotNone(self.get(cache, *recent_range))
+        self.assertEqual(cache.get_record(VENDOR_NAME, "sector", "TCS"), "Technology")
+        with self.assertRaises(Exception):
+            self.get(cache, *OLD_RANGE)
+        with self.assertRaises(Exception):
+            cache.load_record(VENDOR_NAME, "sector", "INFY", self.fail)
+
+    def test_corrupt_files_are_misses(self) -> None:
+        cache = self.make_cache()
+        self.put(cache, *OLD_RANGE)
+        for root, _, files in os.walk(self.directory.name):
+            for file in files:
+                with open(os.path.join(root, file), "w") as corrupt:
+                    corrupt.write("not parquet")
+        self.assertIsNone(self.get(cache, *OLD_RANGE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import orjson
+import unittest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from response_formats import (
+    prices_to_frame,
+    get_errors,
+    encode_frame,
+    encode_prices_json,
+)
+from commons import RESPONSE_FORMAT
+
+
+def make_prices(index: pd.DatetimeIndex) -> pd.DataFrame:
+    close = np.arange(len(index), dtype=float)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close + 0.5},
+        index=index,
+    )
+
+
+class PricesToFrameTest(unittest.TestCase):
+    def setUp(self) -> None:
+        fetched = pd.date_range(
+            "2024-03-04 09:15", periods=3, freq="1min", tz="Asia/Kolkata"
+        )
+        self.fetched = make_prices(fetched.rename("Datetime"))
+        # stored tickers are read back from timestamptz columns in UTC as "datetime"
+        self.stored = make_prices(fetched.tz_convert("UTC").rename("datetime"))
+        # and from the consolidated table as naive exchange wall clock timestamps
+        self.consolidated = make_prices(fetched.tz_localize(None).rename("datetime"))
+        self.data = {
+            "INFY": self.fetched,
+            "TCS": self.stored,
+            "WIPRO": self.consolidated,
+        }
+
+    def test_mixed_tickers_share_one_datetime_column(self) -> None:
+        frame = prices_to_frame(self.data, "Asia/Kolkata")
+        self.assertEqual(
+            list(frame.columns), ["ticker", "Datetime", "Open", "High", "Low", "Close"]
+        )
+        self.assertEqual(str(frame["Datetime"].dt.tz), "Asia/Kolkata")
+        self.assertFalse(frame["Datetime"].isna().any())
+        for ticker in self.data:
+            rows = frame[frame["ticker"] == ticker]
+            self.assertTrue(
+                (rows["Datetime"].to_numpy() == self.fetched.index.to_numpy()).all()
+            )
+
+    def test_converts_to_the_requested_time_zone(self) -> None:
+        frame = prices_to_frame({"TCS": self.stored, "INFY": self.fetched}, "UTC")
+        self.assertEqual(str(frame["Datetime"].dt.tz), "UTC")
+        self.assertEqual(frame["Datetime"].iloc[0], pd.Timestamp("2024-03-04 03:45Z"))
+
+    def test_skips_empty_frames(self) -> None:
+        failed = pd.DataFrame()
+        failed.attrs["error"] = "429"
+        frame = prices_to_frame({"TCS": self.stored, "HDFC": failed}, "Asia/Kolkata")
+        self.assertEqual(set(frame["ticker"]), {"TCS"})
+        self.assertNotIn("index", frame.columns)
+        self.assertEqual(len(prices_to_frame({"HDFC": failed}).columns), 1)
+
+    def test_arrow_schema_has_one_timestamp_column(self) -> None:
+        content = encode_frame(
+            prices_to_frame(self.data, "Asia/Kolkata"), RESPONSE_FORMAT.ARROW
+        )
+        table = pa.ipc.open_stream(content).read_all()
+        self.assertEqual(table.schema.field("Datetime").type.tz, "Asia/Kolkata")
+        self.assertNotIn("datetime", table.schema.names)
+        self.assertEqual(table.num_rows, 9)
+
+
+class EncodePricesJsonTest(unittest.TestCase):
+    setUp = PricesToFrameTest.setUp
+
+    def test_mixed_tickers_share_one_datetime_key_and_clock(self) -> None:
+        payload = orjson.loads(encode_prices_json(self.data, "Asia/Kolkata"))
+        expected = (self.fetched.index.asi8 // 1_000_000).tolist()
+        self.assertEqual(expected[0], 1709523900000)
+        for ticker in self.data:
+            self.assertEqual(
+                list(payload[ticker].keys()),
+                ["Datetime", "Open", "High", "Low", "Close"],
+            )
+            self.assertEqual(payload[ticker]["Datetime"], expected)
+
+
+class FailedTickersTest(unittest.TestCase):
+    def setUp(self) -> None:
+        index = pd.date_range(
+            "2024-03-04 09:15", periods=3, freq="1min", tz="Asia/Kolkata"
+        )
+        failed = pd.DataFrame()
+        failed.attrs["error"] = "Yahoo Finance request for TCS failed: 429"
+        self.data = {"INFY": make_prices(index.rename("Datetime")), "TCS": failed}
+
+    def test_get_errors_returns_only_failed_tickers(self) -> None:
+        self.assertEqual(
+            get_errors(self.data), {"TCS": "Yahoo Finance request for TCS failed: 429"}
+        )
+
+    def test_binary_formats_carry_the_errors(self) -> None:
+        frame = prices_to_frame(self.data, "Asia/Kolkata")
+        errors = get_errors(self.data)
+        arrow = pa.ipc.open_stream(
+            encode_frame(frame, RESPONSE_FORMAT.ARROW, errors)
+        ).read_all()
+        parquet = pq.read_table(
+            pa.BufferReader(encode_frame(frame, RESPONSE_FORMAT.PARQUET, errors))
+        )
+        for table in [arrow, parquet]:
+            self.assertEqual(orjson.loads(table.schema.metadata[b"errors"]), errors)
+            self.assertEqual(table.num_rows, 3)
+
+    def test_columns_layout_carries_the_errors(self) -> None:
+        payload = orjson.loads(encode_prices_json(self.data))
+        self.assertEqual(payload["TCS"], {"error": self.data["TCS"].attrs["error"]})
+        self.assertEqual(len(payload["INFY"]["Close"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
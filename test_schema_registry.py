@@ -0,0 +1,65 @@
+import secrets
+import unittest
+import sqlalchemy
+
+from sqlalchemy import exc, sql
+from schema_registry import SchemaRegistry
+from test_securities_master import connect
+
+
+class SchemaRegistryTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, the tables the tests create are dropped
+    afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+
+    def setUp(self) -> None:
+        self.registry = SchemaRegistry(self.engine)
+        self.table_name = f"test_schema_{secrets.token_hex(4)}"
+
+    def tearDown(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(sql.text(f'DROP TABLE IF EXISTS "{self.table_name}"'))
+
+    def create_table(self, conn: sqlalchemy.engine.Connection, columns: str) -> None:
+        conn.execute(sql.text(f'CREATE TABLE "{self.table_name}" ({columns})'))
+
+    def test_tables_are_reflected_once(self) -> None:
+        with self.engine.begin() as conn:
+            self.create_table(conn, "id INTEGER PRIMARY KEY")
+        table = self.registry.get_table(self.table_name)
+        self.assertIs(self.registry.get_table(self.table_name), table)
+        self.assertEqual(self.registry.get_primary_key(self.table_name), ["id"])
+        with self.engine.begin() as conn:
+            conn.execute(sql.text(f'ALTER TABLE "{self.table_name}" ADD name TEXT'))
+        self.assertEqual(self.registry.get_column_names(self.table_name), ["id"])
+        self.registry.refresh(self.table_name)
+        self.assertEqual(
+            self.registry.get_column_names(self.table_name), ["id", "name"]
+        )
+
+    def test_reflections_in_a_rolled_back_transaction_are_not_kept(self) -> None:
+        with self.assertRaises(ZeroDivisionError):
+            with self.engine.begin() as conn:
+                self.create_table(conn, "id INTEGER PRIMARY KEY")
+                table = self.registry.get_table(self.table_name, conn)
+                self.assertEqual(table.c.keys(), ["id"])
+                1 / 0
+        with self.assertRaises(exc.NoSuchTableError):
+            self.registry.get_table(self.table_name)
+
+    def test_reflections_in_a_transaction_are_cached_after_commit(self) -> None:
+        with self.engine.begin() as conn:
+            self.create_table(conn, "id INTEGER PRIMARY KEY")
+            in_transaction = self.registry.get_table(self.table_name, conn)
+        table = self.registry.get_table(self.table_name)
+        self.assertIsNot(table, in_transaction)
+        self.assertIs(self.registry.get_table(self.table_name), table)
+
+
+if __name__ == "__main__":
+    unittest.main()
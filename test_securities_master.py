@@ -0,0 +1,1143 @@
+import time
+import secrets
+import unittest
+import threading
+import sqlalchemy
+import numpy as np
+import pandas as pd
+
+from sqlalchemy import sql
+from datetime import datetime
+from typing import Dict, List
+from credentials import psql_credentials
+from connection_pool import create_pooled_engine
+from securities_master import SecuritiesMaster
+from vendor_registry import VendorRegistry
+from Exchanges.index_loader import IndexLoader
+from VendorsApiManagers.api_manager import APIManager
+from commons import (
+    INTERVAL,
+    VENDOR,
+    EXCHANGE,
+    INSTRUMENT,
+    COPY_FORMAT,
+    STORAGE,
+    READ_MODE,
+)
+
+
+def make_bars(index: pd.DatetimeIndex) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Open": 1.0,
+            "High": 2.0,
+            "Low": 0.5,
+            "Close": 1.5,
+            "Adj Close": 1.5,
+            "Volume": 100.0,
+        },
+        index=index.rename("Datetime"),
+    )
+
+
+def connect(**kwargs) -> sqlalchemy.engine.Engine:
+    """
+    Returns an engine for the database in credentials.py, the tests are skipped when it
+    is not reachable. The vendor and exchange rows the tests use are added when missing.
+    kwargs are passed to create_pooled_engine.
+    """
+    url = f'postgresql+psycopg2://{psql_credentials["username"]}:{psql_credentials["password"]}@{psql_credentials["host"]}:{psql_credentials["port"]}/securities_master'
+    engine = create_pooled_engine(url, **kwargs)
+    try:
+        SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=engine,
+        )
+    except sqlalchemy.exc.OperationalError as e:
+        raise unittest.SkipTest(f"database is not reachable: {e}")
+    with engine.begin() as conn:
+        for table, name in [("DataVendor", VENDOR.YAHOO), ("Exchange", EXCHANGE.NSE)]:
+            columns = "name, created_datetime, last_updated_datetime"
+            values = ":name, now(), now()"
+            if table == "Exchange":
+                columns, values = f"{columns}, abbreviation", f"{values}, :name"
+            conn.execute(
+                sql.text(
+                    f"INSERT INTO {table} ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING"
+                ),
+                {"name": name.value},
+            )
+    return engine
+
+
+class FakeData(APIManager):
+    """
+    Serves daily bars for every day from start_datetime's date up to end_datetime's date,
+    which is excluded like the vendors do, fails the tickers in failing and raises for any
+    request including a ticker in raising.
+    """
+
+    calls: List[List[str]] = []
+    failing: set = set()
+    raising: set = set()
+    delay: float = 0
+
+    def get_data(
+        self,
+        interval: int,
+        exchange: str,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        tickers: List[str] = None,
+        index: str = None,
+        replace_close=False,
+        progress=False,
+    ) -> Dict[str, pd.DataFrame]:
+        FakeData.calls.append(list(tickers))
+        time.sleep(FakeData.delay)
+        if len(FakeData.raising.intersection(tickers)) > 0:
+            raise Exception(f"{sorted(FakeData.raising)} not in the response cache")
+        days = pd.date_range(
+            start_datetime.date(), end_datetime.date(), freq="D", inclusive="left"
+        )
+        return {
+            ticker: (
+                APIManager.failed_response("HTTP Error 429: Too Many Requests")
+                if ticker in FakeData.failing
+                else make_bars(days)
+            )
+            for ticker in tickers
+        }
+
+    @staticmethod
+    def get_vendor_ticker(ticker: str, exchange: str) -> str:
+        return ticker
+
+    def get_ticker_detail(self, ticker: str, exchange: str, detail: str) -> str:
+        return None
+
+    def fetch_ticker_details(
+        self, ticker: str, exchange: str, details: List[str]
+    ) -> Dict[str, str]:
+        return {detail: None for detail in details}
+
+
+class FakeTickers(IndexLoader):
+    """
+    Serves tickers as every index's current list and records the indexes downloaded.
+    """
+
+    calls: List[str] = []
+    tickers: Dict[str, str] = {}
+
+    @staticmethod
+    def get_url_dict() -> Dict[str, str]:
+        return {}
+
+    @staticmethod
+    def get_tickers(index: str) -> Dict[str, str]:
+        FakeTickers.calls.append(index)
+        return dict(FakeTickers.tickers)
+
+    @property
+    def abbreviation(self) -> str:
+        return "NSE"
+
+
+class AlignTimezoneTest(unittest.TestCase):
+    def test_naive_vendor_bars_are_on_the_exchange_clock(self) -> None:
+        align_timezone = SecuritiesMaster._SecuritiesMaster__align_timezone
+        stored = pd.DatetimeIndex(["2024-03-04 03:45"], tz="UTC")
+        vendor = pd.DatetimeIndex(["2024-03-04 09:15"])
+        self.assertEqual(
+            list(align_timezone(vendor, stored, EXCHANGE.NSE.value)), list(stored)
+        )
+        self.assertEqual(
+            list(align_timezone(stored, vendor, EXCHANGE.NSE.value)), list(vendor)
+        )
+
+
+class ResampleTest(unittest.TestCase):
+    def test_daily_bars_are_on_the_exchange_clock(self) -> None:
+        # one NSE session of m1 bars read back from a timestamptz column
+        session = make_bars(
+            pd.date_range(
+                "2024-03-04 09:15", "2024-03-04 15:29", freq="1min", tz="Asia/Kolkata"
+            ).tz_convert("UTC")
+        )
+        for interval in [INTERVAL.d1, INTERVAL.w1, INTERVAL.mo1]:
+            bars = SecuritiesMaster._SecuritiesMaster__resample_ohlcv(
+                session, interval.value, EXCHANGE.NSE.value
+            )
+            self.assertIsNone(bars.index.tz)
+            self.assertEqual(len(bars), 1)
+            self.assertEqual(bars["Volume"].iloc[0], 100.0 * len(session))
+        bars = SecuritiesMaster._SecuritiesMaster__resample_ohlcv(
+            session, INTERVAL.d1.value, EXCHANGE.NSE.value
+        )
+        self.assertEqual(bars.index[0], pd.Timestamp("2024-03-04"))
+        bars = SecuritiesMaster._SecuritiesMaster__resample_ohlcv(
+            session, INTERVAL.h1.value, EXCHANGE.NSE.value
+        )
+        self.assertEqual(str(bars.index.tz), "UTC")
+        self.assertEqual(bars.index[0], pd.Timestamp("2024-03-04 09:15+05:30"))
+
+    def test_bucket_bounds_cover_whole_bars(self) -> None:
+        get_bucket_bounds = SecuritiesMaster._SecuritiesMaster__get_bucket_bounds
+        start, end = datetime(2024, 2, 14, 10, 0), datetime(2024, 3, 5, 11, 0)
+        self.assertEqual(
+            get_bucket_bounds(start, end, INTERVAL.d1.value, EXCHANGE.NSE.value),
+            (datetime(2024, 2, 14), datetime(2024, 3, 5, 23, 59, 59, 999999)),
+        )
+        self.assertEqual(
+            get_bucket_bounds(start, end, INTERVAL.w1.value, EXCHANGE.NSE.value),
+            (datetime(2024, 2, 12), datetime(2024, 3, 10, 23, 59, 59, 999999)),
+        )
+        self.assertEqual(
+            get_bucket_bounds(start, end, INTERVAL.mo1.value, EXCHANGE.NSE.value),
+            (datetime(2024, 2, 1), datetime(2024, 3, 31, 23, 59, 59, 999999)),
+        )
+        self.assertEqual(
+            get_bucket_bounds(start, end, INTERVAL.h1.value, EXCHANGE.NSE.value),
+            (datetime(2024, 2, 14, 9, 15), datetime(2024, 3, 5, 11, 14, 59, 999999)),
+        )
+
+
+class GetPricesTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, the series the tests cache are dropped
+    afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+
+    def setUp(self) -> None:
+        self.registry = VendorRegistry(load_entry_points=False)
+        self.registry.register_vendor(VENDOR.YAHOO.value, FakeData)
+        self.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=self.engine,
+            price_cache_bytes=1 << 20,
+            vendor_registry=self.registry,
+            create_schema=False,
+        )
+        FakeData.calls, FakeData.failing, FakeData.raising = [], set(), set()
+        FakeData.delay = 0
+        self.tickers = [f"TEST{secrets.token_hex(4).upper()}" for _ in range(3)]
+
+    def tearDown(self) -> None:
+        with self.engine.begin() as conn:
+            for ticker in self.tickers:
+                conn.execute(
+                    sql.text("DELETE FROM Symbol WHERE ticker = :ticker"),
+                    {"ticker": ticker},
+                )
+                conn.execute(
+                    sql.text(
+                        f'DROP TABLE IF EXISTS "prices_{ticker.lower()}_yahoo_nse_d1"'
+                    )
+                )
+
+    def get_prices(
+        self,
+        tickers: List[str],
+        start: datetime,
+        end: datetime,
+        cache_data: bool = True,
+        **kwargs,
+    ) -> Dict[str, pd.DataFrame]:
+        return self.dm.get_prices(
+            interval=INTERVAL.d1.value,
+            start_datetime=start,
+            end_datetime=end,
+            vendor=VENDOR.YAHOO.value,
+            exchange=EXCHANGE.NSE.value,
+            instrument=INSTRUMENT.STOCK.value,
+            tickers=tickers,
+            cache_data=cache_data,
+            **kwargs,
+        )
+
+    def test_padded_downloads_are_clipped_to_the_range(self) -> None:
+        ticker = self.tickers[0]
+        end = datetime(2024, 3, 15, 12, 0)
+        # the first fetch downloads the range, the second only the gap before it
+        for start in [datetime(2024, 3, 11, 12, 0), datetime(2024, 3, 4, 12, 0)]:
+            fetched = self.get_prices([ticker], start, end)[ticker]
+            calls = len(FakeData.calls)
+            # read back by an instance without the in-memory price cache
+            stored = SecuritiesMaster(
+                psql_credentials["host"],
+                psql_credentials["port"],
+                psql_credentials["username"],
+                psql_credentials["password"],
+                engine=self.engine,
+                vendor_registry=self.registry,
+                create_schema=False,
+            ).get_prices(
+                interval=INTERVAL.d1.value,
+                start_datetime=start,
+                end_datetime=end,
+                vendor=VENDOR.YAHOO.value,
+                exchange=EXCHANGE.NSE.value,
+                instrument=INSTRUMENT.STOCK.value,
+                tickers=[ticker],
+            )[
+                ticker
+            ]
+            self.assertEqual(len(FakeData.calls), calls)
+            self.assertEqual(list(fetched.index), list(stored.index))
+            self.assertEqual(
+                fetched.index.min(), pd.Timestamp(start.date()) + pd.Timedelta(days=1)
+            )
+            self.assertEqual(fetched.index.max(), pd.Timestamp(end.date()))
+
+    def test_writes_of_a_series_wait_for_its_lock(self) -> None:
+        ticker = self.tickers[0]
+        series = "|".join(
+            [ticker, VENDOR.YAHOO.value, EXCHANGE.NSE.value, str(INTERVAL.d1.value)]
+        )
+        table_name = f"prices_{ticker.lower()}_yahoo_nse_d1"
+        writer = threading.Thread(
+            target=self.get_prices,
+            args=([ticker], datetime(2024, 3, 1), datetime(2024, 3, 8)),
+        )
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text("SELECT pg_advisory_xact_lock(hashtext(:series))"),
+                {"series": series},
+            )
+            writer.start()
+            writer.join(1)
+            self.assertTrue(writer.is_alive())
+            # not even the series' table is created before the lock is released
+            self.assertIsNone(
+                conn.execute(
+                    sql.text("SELECT to_regclass(:table_name)"),
+                    {"table_name": f'"{table_name}"'},
+                ).scalar()
+            )
+        writer.join(10)
+        self.assertFalse(writer.is_alive())
+        with self.engine.connect() as conn:
+            self.assertEqual(
+                conn.execute(sql.text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar(),
+                8,
+            )
+
+    def test_failed_batch_download_only_fails_its_bad_tickers(self) -> None:
+        good, bad = self.tickers[0], self.tickers[1]
+        FakeData.raising = {bad}
+        for workers in [1, 2]:
+            data = self.get_prices(
+                [good, bad],
+                datetime(2024, 3, 1),
+                datetime(2024, 3, 29),
+                cache_data=False,
+                workers=workers,
+            )
+            self.assertEqual(len(data[good]), 29)
+            self.assertTrue(APIManager.is_failed_response(data[bad]))
+
+    def test_concurrent_identical_requests_share_the_batched_download(self) -> None:
+        FakeData.delay = 0.5
+        threads = [
+            threading.Thread(
+                target=self.get_prices,
+                args=(self.tickers, datetime(2024, 3, 1), datetime(2024, 3, 29)),
+                kwargs={"cache_data": False},
+            )
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(FakeData.calls), 1)
+        stats = self.dm.get_price_fetch_stats()
+        self.assertEqual(stats["batch_executions"], 1)
+        self.assertEqual(stats["batch_shared"], 2)
+
+    def test_legacy_coverage_is_on_the_exchange_clock(self) -> None:
+        ticker = self.tickers[0]
+        table_name = f"prices_{ticker.lower()}_yahoo_nse_d1"
+        # a series cached before the Coverage table existed, in a timestamptz column
+        make_bars(
+            pd.date_range(
+                "2024-03-04 09:15", periods=3, freq="1D", tz="Asia/Kolkata"
+            ).tz_convert("UTC")
+        ).to_sql(table_name, self.engine, index=True)
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text(
+                    """
+                    INSERT INTO Symbol (ticker, vendor_ticker, exchange, vendor, instrument, interval,
+                        linked_table_name, created_datetime, last_updated_datetime)
+                    VALUES (:ticker, :ticker, :exchange, :vendor, 'STOCK', :interval, :table_name, now(), now())
+                    """
+                ),
+                {
+                    "ticker": ticker,
+                    "exchange": EXCHANGE.NSE.value,
+                    "vendor": VENDOR.YAHOO.value,
+                    "interval": INTERVAL.d1.value,
+                    "table_name": table_name,
+                },
+            )
+        coverage = self.dm._SecuritiesMaster__get_coverage(
+            table_name,
+            ticker,
+            VENDOR.YAHOO.value,
+            EXCHANGE.NSE.value,
+            INTERVAL.d1.value,
+        )
+        self.assertEqual(
+            coverage, [(datetime(2024, 3, 4, 9, 15), datetime(2024, 3, 6, 9, 15))]
+        )
+
+    def cache_legacy_series(self, ticker: str, days: pd.DatetimeIndex) -> str:
+        """
+        Stores days' bars as a series cached in its own table, in a timestamptz column,
+        and returns the table's name.
+        """
+        table_name = f"prices_{ticker.lower()}_yahoo_nse_d1"
+        make_bars(days.tz_convert("UTC")).to_sql(table_name, self.engine, index=True)
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text(
+                    """
+                    INSERT INTO Symbol (ticker, vendor_ticker, exchange, vendor, instrument, interval,
+                        linked_table_name, created_datetime, last_updated_datetime)
+                    VALUES (:ticker, :ticker, :exchange, :vendor, 'STOCK', :interval, :table_name, now(), now())
+                    """
+                ),
+                {
+                    "ticker": ticker,
+                    "exchange": EXCHANGE.NSE.value,
+                    "vendor": VENDOR.YAHOO.value,
+                    "interval": INTERVAL.d1.value,
+                    "table_name": table_name,
+                },
+            )
+        return table_name
+
+    def make_consolidated_master(self) -> SecuritiesMaster:
+        return SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=self.engine,
+            vendor_registry=self.registry,
+            storage=STORAGE.CONSOLIDATED.value,
+        )
+
+    def test_migrated_series_is_served_from_the_prices_table(self) -> None:
+        ticker = self.tickers[0]
+        days = pd.date_range("2024-03-04", "2024-03-08", freq="D", tz="Asia/Kolkata")
+        table_name = self.cache_legacy_series(ticker, days)
+        dm = self.make_consolidated_master()
+        moved_rows = dm.migrate_price_tables(drop_tables=True)
+        self.assertEqual(moved_rows[table_name], len(days))
+        with self.engine.connect() as conn:
+            self.assertIsNone(
+                conn.execute(
+                    sql.text("SELECT to_regclass(:table_name)"),
+                    {"table_name": f'"{table_name}"'},
+                ).scalar()
+            )
+            # the bars are kept on the exchange's wall clock
+            stored = conn.execute(
+                sql.text(
+                    """
+                    SELECT p."Datetime" FROM Prices p JOIN Symbol s ON s.symbol_id = p.symbol_id
+                    WHERE s.ticker = :ticker ORDER BY p."Datetime"
+                    """
+                ),
+                {"ticker": ticker},
+            ).fetchall()
+        self.assertEqual(
+            [row[0] for row in stored], list(days.tz_localize(None).to_pydatetime())
+        )
+        for read_mode in [READ_MODE.PANDAS, READ_MODE.COPY]:
+            data = dm.get_prices(
+                interval=INTERVAL.d1.value,
+                start_datetime=datetime(2024, 3, 4),
+                end_datetime=datetime(2024, 3, 8),
+                vendor=VENDOR.YAHOO.value,
+                exchange=EXCHANGE.NSE.value,
+                instrument=INSTRUMENT.STOCK.value,
+                tickers=[ticker],
+                read_mode=read_mode.value,
+            )[ticker]
+            self.assertEqual(FakeData.calls, [])
+            self.assertEqual(list(data.index), list(days.tz_localize(None)))
+
+    def test_stale_reflections_do_not_hide_a_migrated_series(self) -> None:
+        ticker = self.tickers[0]
+        days = pd.date_range("2024-03-04", "2024-03-08", freq="D", tz="Asia/Kolkata")
+        table_name = self.cache_legacy_series(ticker, days)
+        # an instance that reflected the series' table and read its Symbol row before
+        # another one migrated it
+        dm = self.make_consolidated_master()
+        dm.get_table_columns(table_name)
+        dm._SecuritiesMaster__get_symbols()
+        self.make_consolidated_master().migrate_price_tables(drop_tables=True)
+        data = dm.get_prices(
+            interval=INTERVAL.d1.value,
+            start_datetime=datetime(2024, 3, 4),
+            end_datetime=datetime(2024, 3, 8),
+            vendor=VENDOR.YAHOO.value,
+            exchange=EXCHANGE.NSE.value,
+            instrument=INSTRUMENT.STOCK.value,
+            tickers=[ticker],
+        )[ticker]
+        self.assertEqual(FakeData.calls, [])
+        self.assertEqual(list(data.index), list(days.tz_localize(None)))
+
+    def test_topping_up_a_series_only_appends_new_bars(self) -> None:
+        ticker = self.tickers[0]
+        table_name = f"prices_{ticker.lower()}_yahoo_nse_d1"
+        self.get_prices([ticker], datetime(2024, 3, 1), datetime(2024, 3, 8))
+        # a stored bar the vendor would serve differently survives the top up
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text(
+                    f'UPDATE "{table_name}" SET "Close" = 42 WHERE "Datetime" = (SELECT MIN("Datetime") FROM "{table_name}")'
+                )
+            )
+        self.get_prices([ticker], datetime(2024, 3, 1), datetime(2024, 3, 15))
+        with self.engine.connect() as conn:
+            self.assertEqual(
+                conn.execute(
+                    sql.text(
+                        f'SELECT COUNT(*), COUNT(*) FILTER (WHERE "Close" = 42) FROM "{table_name}"'
+                    )
+                ).first(),
+                (15, 1),
+            )
+            self.assertEqual(
+                conn.execute(
+                    sql.text("SELECT COUNT(*) FROM Symbol WHERE ticker = :ticker"),
+                    {"ticker": ticker},
+                ).scalar(),
+                1,
+            )
+
+    def test_copy_reads_match_pandas_reads(self) -> None:
+        ticker = self.tickers[0]
+        start, end = datetime(2024, 3, 1), datetime(2024, 3, 8)
+        self.get_prices([ticker], start, end)
+        calls = len(FakeData.calls)
+        # read back by instances without the in-memory price cache
+        expected, copied = [
+            SecuritiesMaster(
+                psql_credentials["host"],
+                psql_credentials["port"],
+                psql_credentials["username"],
+                psql_credentials["password"],
+                engine=self.engine,
+                vendor_registry=self.registry,
+                create_schema=False,
+            ).get_prices(
+                interval=INTERVAL.d1.value,
+                start_datetime=start,
+                end_datetime=end,
+                vendor=VENDOR.YAHOO.value,
+                exchange=EXCHANGE.NSE.value,
+                instrument=INSTRUMENT.STOCK.value,
+                tickers=[ticker],
+                read_mode=read_mode.value,
+            )[
+                ticker
+            ]
+            for read_mode in [READ_MODE.PANDAS, READ_MODE.COPY]
+        ]
+        self.assertEqual(len(FakeData.calls), calls)
+        pd.testing.assert_frame_equal(copied, expected)
+
+    def test_failed_gaps_are_not_cached_in_memory(self) -> None:
+        ticker = self.tickers[0]
+        self.get_prices([ticker], datetime(2024, 3, 1), datetime(2024, 3, 29))
+        FakeData.failing = {ticker}
+        start, end = datetime(2024, 2, 1), datetime(2024, 3, 29)
+        data = self.get_prices([ticker], start, end)[ticker]
+        self.assertEqual(data.index.min(), pd.Timestamp("2024-03-01"))
+        calls = len(FakeData.calls)
+        self.get_prices([ticker], start, end)
+        self.assertEqual(len(FakeData.calls), calls + 1)
+
+
+class GetTableTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, the table the tests page through is dropped
+    afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+
+    def setUp(self) -> None:
+        self.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=self.engine,
+            create_schema=False,
+        )
+        self.table_name = f"test_paging_{secrets.token_hex(4)}"
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text(
+                    f"""
+                    CREATE TABLE "{self.table_name}" (
+                        ticker TEXT, "Datetime" TIMESTAMP, "Close" DOUBLE PRECISION, sector TEXT,
+                        PRIMARY KEY (ticker, "Datetime")
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                sql.text(
+                    f"""
+                    INSERT INTO "{self.table_name}" VALUES
+                        ('TCS', '2024-03-05', 3, 'IT'), ('INFY', '2024-03-05', 2, 'IT'),
+                        ('TCS', '2024-03-04', 1, 'IT'), ('SBIN', '2024-03-04', 4, 'Banks'),
+                        ('INFY', '2024-03-04', 5, 'IT')
+                    """
+                )
+            )
+        self.keys = [
+            ("INFY", pd.Timestamp("2024-03-04")),
+            ("INFY", pd.Timestamp("2024-03-05")),
+            ("SBIN", pd.Timestamp("2024-03-04")),
+            ("TCS", pd.Timestamp("2024-03-04")),
+            ("TCS", pd.Timestamp("2024-03-05")),
+        ]
+
+    def tearDown(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(sql.text(f'DROP TABLE IF EXISTS "{self.table_name}"'))
+
+    def page(self, **kwargs) -> List[tuple]:
+        """
+        Returns the keys of every row, read limit rows at a time.
+        """
+        keys, after = [], None
+        while True:
+            page = self.dm.get_table(self.table_name, after=after, **kwargs)
+            page_keys = list(zip(page["ticker"], page["Datetime"]))
+            keys += page_keys
+            if len(page) < kwargs["limit"]:
+                return keys
+            after = list(page_keys[-1])
+
+    def test_pages_follow_the_key_order(self) -> None:
+        self.assertEqual(self.dm.get_table_key(self.table_name), ["ticker", "Datetime"])
+        self.assertEqual(self.page(limit=2), self.keys)
+        self.assertEqual(self.page(limit=2, descending=True), self.keys[::-1])
+
+    def test_projection_and_filters_keep_the_key(self) -> None:
+        page = self.dm.get_table(
+            self.table_name,
+            columns=["Close"],
+            filters={"sector": "IT"},
+            start_datetime=datetime(2024, 3, 5),
+            limit=10,
+        )
+        self.assertEqual(list(page.columns), ["Close", "ticker", "Datetime"])
+        self.assertEqual(list(page["Close"]), [2.0, 3.0])
+
+    def test_unknown_columns_are_rejected(self) -> None:
+        for kwargs in [{"columns": ["Open"]}, {"filters": {"Open": 1}}]:
+            with self.subTest(**kwargs), self.assertRaises(Exception):
+                self.dm.get_table(self.table_name, **kwargs)
+
+
+class CopyReadTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, the table the tests read is dropped afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+
+    def setUp(self) -> None:
+        self.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=self.engine,
+            create_schema=False,
+        )
+        self.table_name = f"test_copy_read_{secrets.token_hex(4)}"
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text(
+                    f"""
+                    CREATE TABLE "{self.table_name}" (
+                        id INTEGER PRIMARY KEY, day DATE, price NUMERIC(10, 2), name TEXT,
+                        listed BOOLEAN, "Datetime" TIMESTAMP, updated TIMESTAMPTZ,
+                        "Close" DOUBLE PRECISION, volume BIGINT
+                    )
+                    """
+                )
+            )
+            conn.execute(
+                sql.text(
+                    f"""
+                    INSERT INTO "{self.table_name}" VALUES
+                        (1, '2024-03-04', 1.25, '', true, '2024-03-04 09:15',
+                            '2024-03-04 09:15+05:30', 1.5, 10),
+                        (2, '2024-03-05', 2.5, 'N', false, '2024-03-05 09:15',
+                            '2024-03-05 09:15+05:30', 2.5, 20),
+                        (3, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
+                    """
+                )
+            )
+
+    def tearDown(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(sql.text(f'DROP TABLE IF EXISTS "{self.table_name}"'))
+
+    def assert_same_reads(self, **kwargs) -> None:
+        expected = self.dm.get_table(self.table_name, **kwargs)
+        copied = self.dm.get_table(
+            self.table_name, read_mode=READ_MODE.COPY.value, **kwargs
+        )
+        pd.testing.assert_frame_equal(copied, expected)
+        # None and NaN, dates and timestamps, which assert_frame_equal does not tell apart
+        self.assertEqual(repr(copied.to_dict("list")), repr(expected.to_dict("list")))
+
+    def test_whole_table_matches_read_sql_table(self) -> None:
+        self.assert_same_reads()
+
+    def test_selected_rows_match_read_sql(self) -> None:
+        # dates stay datetime.date objects and empty strings are not nulls
+        self.assert_same_reads(limit=10)
+        # without nulls integers and booleans keep their own dtypes
+        self.assert_same_reads(filters={"listed": True}, limit=10)
+        self.assert_same_reads(columns=["name", "volume"], after=[1], limit=10)
+
+
+class StreamTableTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+
+    def setUp(self) -> None:
+        self.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=self.engine,
+            create_schema=False,
+        )
+
+    def test_arguments_are_checked_before_the_first_chunk(self) -> None:
+        for kwargs in [
+            {"limit": 0},
+            {"after": [VENDOR.YAHOO.value, 1]},
+            {"chunk_size": 0},
+        ]:
+            with self.subTest(**kwargs), self.assertRaises(Exception):
+                self.dm.stream_table("datavendor", **kwargs)
+
+    def test_streams_the_selected_rows(self) -> None:
+        chunks = self.dm.stream_table(
+            "datavendor", chunk_size=1, filters={"name": VENDOR.YAHOO.value}
+        )
+        rows = [row for chunk in chunks for row in chunk]
+        self.assertEqual([row["name"] for row in rows], [VENDOR.YAHOO.value])
+
+
+class WriteSeriesClockTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, every test runs in a transaction that is
+    rolled back.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+        cls.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=cls.engine,
+            create_schema=False,
+        )
+
+    def setUp(self) -> None:
+        self.conn = self.engine.connect()
+        self.transaction = self.conn.begin()
+        ticker = f"TEST{secrets.token_hex(4).upper()}"
+        self.table_name = f"prices_{ticker.lower()}_yahoo_nse_d1"
+        self.symbol_row = {
+            "ticker": ticker,
+            "vendor_ticker": f"{ticker}.NS",
+            "exchange": EXCHANGE.NSE.value,
+            "vendor": VENDOR.YAHOO.value,
+            "instrument": INSTRUMENT.STOCK.name,
+            "name": ticker,
+            "sector": None,
+            "interval": INTERVAL.d1.value,
+            "linked_table_name": self.table_name,
+            "created_datetime": datetime.now(),
+            "last_updated_datetime": datetime.now(),
+        }
+        # the NSE's 2024-03-04 bar as the vendor returns it and as a roll-up of UTC m1 bars
+        self.vendor_bar = make_bars(pd.DatetimeIndex(["2024-03-04 00:00"]))
+        self.rollup_bar = make_bars(pd.DatetimeIndex(["2024-03-03 18:30"], tz="UTC"))
+
+    def tearDown(self) -> None:
+        self.transaction.rollback()
+        self.conn.close()
+
+    def write(self, data: pd.DataFrame, overwrite: bool) -> None:
+        self.dm._SecuritiesMaster__write_series(
+            self.conn, data, self.symbol_row, overwrite=overwrite
+        )
+
+    def stored_keys(self) -> pd.DatetimeIndex:
+        keys = self.conn.execute(
+            sql.text(
+                f'SELECT "Datetime" AT TIME ZONE \'Asia/Kolkata\' FROM "{self.table_name}"'
+                if self.timezone_aware()
+                else f'SELECT "Datetime" FROM "{self.table_name}"'
+            )
+        ).fetchall()
+        return pd.DatetimeIndex([row[0] for row in keys])
+
+    def timezone_aware(self) -> bool:
+        return (
+            self.conn.execute(
+                sql.text(
+                    "SELECT data_type FROM information_schema.columns WHERE table_name = :table_name AND column_name = 'Datetime'"
+                ),
+                {"table_name": self.table_name},
+            ).scalar()
+            == "timestamp with time zone"
+        )
+
+    def test_rollup_overwrites_the_vendor_bar_in_a_naive_table(self) -> None:
+        self.write(self.vendor_bar, overwrite=False)
+        self.write(self.rollup_bar, overwrite=True)
+        self.assertFalse(self.timezone_aware())
+        self.assertEqual(list(self.stored_keys()), [pd.Timestamp("2024-03-04 00:00")])
+
+    def test_vendor_bar_matches_the_rollup_in_an_aware_table(self) -> None:
+        self.write(self.rollup_bar, overwrite=True)
+        self.write(self.vendor_bar, overwrite=False)
+        self.assertTrue(self.timezone_aware())
+        self.assertEqual(list(self.stored_keys()), [pd.Timestamp("2024-03-04 00:00")])
+
+
+class RollupTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, every test runs in a transaction that is
+    rolled back.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+        cls.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=cls.engine,
+            create_schema=False,
+        )
+
+    def setUp(self) -> None:
+        self.conn = self.engine.connect()
+        self.transaction = self.conn.begin()
+        self.ticker = f"TEST{secrets.token_hex(4).upper()}"
+        self.symbol_row = {
+            "ticker": self.ticker,
+            "vendor_ticker": f"{self.ticker}.NS",
+            "exchange": EXCHANGE.NSE.value,
+            "vendor": VENDOR.YAHOO.value,
+            "instrument": INSTRUMENT.STOCK.name,
+            "name": self.ticker,
+            "sector": None,
+            "interval": INTERVAL.m1.value,
+            "linked_table_name": self.table_name(INTERVAL.m1.value),
+            "created_datetime": datetime.now(),
+            "last_updated_datetime": datetime.now(),
+        }
+
+    def tearDown(self) -> None:
+        self.transaction.rollback()
+        self.conn.close()
+
+    def table_name(self, interval: int) -> str:
+        return SecuritiesMaster._SecuritiesMaster__get_price_table_name(
+            self.ticker, VENDOR.YAHOO.value, EXCHANGE.NSE.value, interval
+        )
+
+    def read(self, interval: int) -> pd.DataFrame:
+        return self.dm._SecuritiesMaster__read_prices(
+            conn=self.conn,
+            table_name=self.table_name(interval),
+            ticker=self.ticker,
+            vendor=VENDOR.YAHOO.value,
+            exchange=EXCHANGE.NSE.value,
+            interval=interval,
+            start_datetime=datetime(2024, 3, 4),
+            end_datetime=datetime(2024, 3, 5),
+        )
+
+    def test_the_session_close_completes_the_last_buckets(self) -> None:
+        # the NSE's 2024-03-04 session as the vendor returns it, 09:15 to 15:29
+        bars = make_bars(
+            pd.date_range(
+                "2024-03-04 09:15", "2024-03-04 15:29", freq="1min", tz="Asia/Kolkata"
+            )
+        )
+        self.dm._SecuritiesMaster__write_series(
+            self.conn,
+            bars,
+            self.symbol_row,
+            [(datetime(2024, 3, 4, 9, 15), datetime(2024, 3, 4, 15, 29))],
+        )
+        for rollup_interval in [INTERVAL.h1.value, INTERVAL.d1.value]:
+            self.dm._SecuritiesMaster__update_rollup(
+                self.conn, bars, self.symbol_row, rollup_interval, FakeData({})
+            )
+
+        hourly = self.read(INTERVAL.h1.value)
+        self.assertEqual(len(hourly), 7)
+        last = hourly.iloc[-1]
+        self.assertEqual(
+            pd.Timestamp(last["Datetime"]).tz_convert("Asia/Kolkata"),
+            pd.Timestamp("2024-03-04 15:15", tz="Asia/Kolkata"),
+        )
+        self.assertEqual(last["Volume"], 1500)
+        daily = self.read(INTERVAL.d1.value)
+        self.assertEqual(len(daily), 1)
+        self.assertEqual(daily.iloc[0]["Volume"], 37500)
+
+
+class IndexConstituentTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, the lists the tests store are deleted
+    afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.engine = connect()
+
+    def setUp(self) -> None:
+        self.registry = VendorRegistry(load_entry_points=False)
+        self.registry.register_index_loader(EXCHANGE.NSE.value, FakeTickers)
+        self.dm = self.make_master()
+        FakeTickers.calls, FakeTickers.tickers = [], {"TCS": "IT", "INFY": "IT"}
+        self.index = f"TEST{secrets.token_hex(4).upper()}"
+
+    def tearDown(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text("DELETE FROM IndexConstituent WHERE index_name = :index"),
+                {"index": self.index},
+            )
+
+    def make_master(self) -> SecuritiesMaster:
+        return SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=self.engine,
+            vendor_registry=self.registry,
+            create_schema=False,
+        )
+
+    def store(self, as_of_date: datetime, tickers: Dict[str, str]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                sql.text(
+                    """
+                    INSERT INTO IndexConstituent (exchange, index_name, as_of_date, ticker, industry, created_datetime)
+                    VALUES (:exchange, :index_name, :as_of_date, :ticker, :industry, :created_datetime)
+                    """
+                ),
+                [
+                    {
+                        "exchange": EXCHANGE.NSE.value,
+                        "index_name": self.index,
+                        "as_of_date": as_of_date.date(),
+                        "ticker": ticker,
+                        "industry": industry,
+                        "created_datetime": as_of_date,
+                    }
+                    for ticker, industry in tickers.items()
+                ],
+            )
+
+    def get(self, as_of_date: datetime = None, **kwargs) -> Dict[str, str]:
+        return self.dm.get_index_constituents(
+            self.index, EXCHANGE.NSE.value, as_of_date, **kwargs
+        )
+
+    def test_as_of_lookups_return_the_last_list_stored_before(self) -> None:
+        self.store(datetime(2024, 1, 1), {"TCS": "IT", "SBIN": "Banks"})
+        self.store(datetime(2024, 6, 3), {"TCS": "IT", "INFY": "IT"})
+        self.assertEqual(self.get(datetime(2024, 3, 1)), {"TCS": "IT", "SBIN": "Banks"})
+        self.assertEqual(self.get(datetime(2024, 6, 3)), {"TCS": "IT", "INFY": "IT"})
+        self.assertEqual(self.get(datetime(2025, 1, 1)), {"TCS": "IT", "INFY": "IT"})
+        with self.assertRaises(Exception):
+            self.get(datetime(2023, 12, 29))
+        # past lists are never downloaded
+        self.assertEqual(FakeTickers.calls, [])
+
+    def test_the_latest_list_is_downloaded_once_per_ttl(self) -> None:
+        self.store(datetime(2024, 1, 1), {"SBIN": "Banks"})
+        self.assertEqual(self.get(), {"TCS": "IT", "INFY": "IT"})
+        self.assertEqual(self.get(), {"TCS": "IT", "INFY": "IT"})
+        # the downloaded list is stored for today, other processes read it
+        self.assertEqual(
+            self.make_master().get_index_constituents(self.index, EXCHANGE.NSE.value),
+            {"TCS": "IT", "INFY": "IT"},
+        )
+        self.assertEqual(self.get(datetime.now()), {"TCS": "IT", "INFY": "IT"})
+        self.assertEqual(FakeTickers.calls, [self.index])
+
+        FakeTickers.tickers = {"TCS": "IT"}
+        self.assertEqual(self.get(refresh=True), {"TCS": "IT"})
+        self.assertEqual(self.get(), {"TCS": "IT"})
+        self.assertEqual(self.get(datetime.now()), {"TCS": "IT"})
+        self.assertEqual(FakeTickers.calls, [self.index, self.index])
+        self.assertEqual(self.get(datetime(2024, 3, 1)), {"SBIN": "Banks"})
+
+
+class CopyBinaryTest(unittest.TestCase):
+    def test_rows_are_encoded_as_fixed_width_fields(self) -> None:
+        table = sqlalchemy.Table(
+            "prices",
+            sqlalchemy.MetaData(),
+            sqlalchemy.Column("Datetime", sqlalchemy.DateTime(timezone=True)),
+            sqlalchemy.Column("Close", sqlalchemy.Float),
+            sqlalchemy.Column("Volume", sqlalchemy.Integer),
+        )
+        frame = pd.DataFrame(
+            {
+                # 2000-01-01 00:00 UTC, PostgreSQL's epoch, in the session's time zone
+                "Datetime": pd.DatetimeIndex(["2000-01-01 05:30"]),
+                "Close": [1.5],
+                "Volume": [100],
+            }
+        )
+        encoded = SecuritiesMaster._SecuritiesMaster__to_copy_binary(
+            frame, table, "Asia/Kolkata"
+        )
+        self.assertEqual(encoded[:11], b"PGCOPY\n\xff\r\n\x00")
+        row = np.frombuffer(
+            encoded[19:-2],
+            dtype=[
+                ("field_count", ">i2"),
+                ("length_0", ">i4"),
+                ("value_0", ">i8"),
+                ("length_1", ">i4"),
+                ("value_1", ">f8"),
+                ("length_2", ">i4"),
+                ("value_2", ">i4"),
+            ],
+        )[0]
+        self.assertEqual(
+            [row[field] for field in row.dtype.names], [3, 8, 0, 8, 1.5, 4, 100]
+        )
+        self.assertEqual(encoded[-2:], b"\xff\xff")
+
+
+class BulkLoadPricesTest(unittest.TestCase):
+    """
+    Needs the database in credentials.py, the tables the tests create are dropped
+    afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # naive timestamps read as UTC and in the session's time zone only differ off UTC
+        cls.engine = connect(connect_args={"options": "-c TimeZone=Asia/Kolkata"})
+        cls.dm = SecuritiesMaster(
+            psql_credentials["host"],
+            psql_credentials["port"],
+            psql_credentials["username"],
+            psql_credentials["password"],
+            engine=cls.engine,
+            create_schema=False,
+        )
+
+    def setUp(self) -> None:
+        self.table_names: List[str] = []
+        self.bars = make_bars(
+            pd.date_range("2024-03-04 09:15", periods=3, freq="1min")
+        )[["Close", "Volume"]]
+
+    def tearDown(self) -> None:
+        with self.engine.begin() as conn:
+            for table_name in self.table_names:
+                conn.execute(sql.text(f'DROP TABLE IF EXISTS "{table_name}"'))
+
+    def create_table(self, columns: str) -> str:
+        table_name = f"test_bulk_{secrets.token_hex(4)}"
+        self.table_names.append(table_name)
+        with self.engine.begin() as conn:
+            conn.execute(sql.text(f'CREATE TABLE "{table_name}" ({columns})'))
+        return table_name
+
+    def read(self, table_name: str) -> pd.DataFrame:
+        with self.engine.connect() as conn:
+            return pd.read_sql_query(
+                f'SELECT * FROM "{table_name}" ORDER BY "Datetime"', conn
+            )
+
+    def test_keyless_table_is_keyed_on_datetime(self) -> None:
+        table_name = self.create_table(
+            '"Datetime" timestamp, "Close" double precision, "Volume" double precision'
+        )
+        self.assertEqual(self.dm.bulk_load_prices(self.bars, table_name)["rows"], 3)
+        self.assertEqual(self.dm.bulk_load_prices(self.bars, table_name)["rows"], 0)
+        self.assertEqual(len(self.read(table_name)), 3)
+
+    def test_keyless_table_without_datetime_is_rejected(self) -> None:
+        table_name = self.create_table('"Close" double precision')
+        with self.assertRaises(Exception):
+            self.dm.bulk_load_prices(
+                self.bars[["Close"]].reset_index(drop=True), table_name
+            )
+
+    def test_binary_and_csv_read_naive_timestamps_alike(self) -> None:
+        columns = '"Datetime" timestamptz PRIMARY KEY, "Close" double precision, "Volume" double precision'
+        loaded = []
+        for copy_format in COPY_FORMAT:
+            table_name = self.create_table(columns)
+            self.dm.bulk_load_prices(self.bars, table_name, copy_format.value)
+            loaded.append(self.read(table_name))
+        pd.testing.assert_frame_equal(loaded[0], loaded[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
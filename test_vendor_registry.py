@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from vendor_registry import VendorRegistry
+from commons import VENDOR, EXCHANGE
+from Exchanges.index_loader import IndexLoader
+from VendorsApiManagers.yahoo import YahooData
+from VendorsApiManagers.response_cache import ResponseCache
+
+
+class VendorRegistryTest(unittest.TestCase):
+    def test_built_in_implementations_are_found_by_name(self) -> None:
+        registry = VendorRegistry(load_entry_points=False)
+        self.assertIs(registry.get_vendor_class(VENDOR.YAHOO.value), YahooData)
+        self.assertTrue(
+            issubclass(registry.get_index_loader(EXCHANGE.NSE.value), IndexLoader)
+        )
+        with self.assertRaises(Exception):
+            registry.get_vendor_class("Unknown Vendor")
+        with self.assertRaises(Exception):
+            registry.register_vendor("Unknown Vendor", dict)
+
+    def test_instances_are_reused_per_credentials_and_cache(self) -> None:
+        registry = VendorRegistry(load_entry_points=False)
+        vendor = registry.get_vendor(VENDOR.YAHOO.value, {"key": "a"})
+        self.assertIs(registry.get_vendor(VENDOR.YAHOO.value, {"key": "a"}), vendor)
+        self.assertIsNot(registry.get_vendor(VENDOR.YAHOO.value, {"key": "b"}), vendor)
+        with tempfile.TemporaryDirectory() as directory:
+            cached = registry.get_vendor(
+                VENDOR.YAHOO.value, {"key": "a"}, ResponseCache(directory)
+            )
+        self.assertIsNot(cached, vendor)
+        # replacing the class drops its instances
+        registry.register_vendor(VENDOR.YAHOO.value, YahooData)
+        self.assertIsNot(registry.get_vendor(VENDOR.YAHOO.value, {"key": "a"}), vendor)
+
+    def test_entry_points_add_and_replace_implementations(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # an installed plugin package, its module and its dist-info entry points
+        module_name = "registry_test_plugin"
+        with open(os.path.join(directory.name, f"{module_name}.py"), "w") as file:
+            file.write(
+                textwrap.dedent(
+                    """
+                    from VendorsApiManagers.yahoo import YahooData
+                    from Exchanges.nse_tickers import NSETickers
+
+                    class PluginData(YahooData):
+                        pass
+
+                    class PluginTickers(NSETickers):
+                        pass
+                    """
+                )
+            )
+        dist_info = os.path.join(directory.name, "registry_test_plugin-1.0.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w") as file:
+            file.write(
+                "Metadata-Version: 2.1\nName: registry-test-plugin\nVersion: 1.0\n"
+            )
+        with open(os.path.join(dist_info, "entry_points.txt"), "w") as file:
+            file.write(
+                textwrap.dedent(
+                    f"""
+                    [securities_master.vendors]
+                    YAHOO = {module_name}:PluginData
+                    Plugin Vendor = {module_name}:PluginData
+
+                    [securities_master.index_loaders]
+                    NSE = {module_name}:PluginTickers
+                    """
+                )
+            )
+        sys.path.insert(0, directory.name)
+        self.addCleanup(sys.path.remove, directory.name)
+        self.addCleanup(sys.modules.pop, module_name, None)
+
+        registry = VendorRegistry()
+        self.assertEqual(
+            registry.get_vendor_class(VENDOR.YAHOO.value).__name__, "PluginData"
+        )
+        self.assertEqual(
+            registry.get_vendor_class("Plugin Vendor").__name__, "PluginData"
+        )
+        self.assertEqual(
+            registry.get_index_loader(EXCHANGE.NSE.value).__name__, "PluginTickers"
+        )
+        self.assertIs(
+            VendorRegistry(load_entry_points=False).get_vendor_class(
+                VENDOR.YAHOO.value
+            ),
+            YahooData,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+import pandas as pd
+import yfinance as yf
+
+from datetime import datetime
+from unittest import mock
+from VendorsApiManagers.api_manager import APIManager
+from VendorsApiManagers.yahoo import YahooData
+from VendorsApiManagers.response_cache import ResponseCache
+from commons import INTERVAL, EXCHANGE
+
+
+class YahooErrorsTest(unittest.TestCase):
+    def download(self, tickers: list, **kwargs) -> pd.DataFrame:
+        """
+        Stands in for yf.download, which reports a failed ticker in yf.shared._ERRORS
+        and leaves it out of the returned frame.
+        """
+        self.calls.append(list(tickers))
+        yf.shared._ERRORS = {
+            ticker: self.errors[ticker] for ticker in tickers if ticker in self.errors
+        }
+        index = pd.date_range("2024-03-01", periods=2, name="Date")
+        return pd.concat(
+            {
+                ticker: pd.DataFrame({"Open": [1.0, 2.0], "Close": [1.5, 2.5]}, index)
+                for ticker in tickers
+                if ticker not in self.errors
+            },
+            axis=1,
+        )
+
+    def setUp(self) -> None:
+        self.calls = []
+        self.errors = {}
+
+    def get_data(self, tickers: list, response_cache: ResponseCache = None) -> dict:
+        with mock.patch.object(yf, "download", self.download):
+            return YahooData({}, response_cache).get_data(
+                interval=INTERVAL.d1.value,
+                start_datetime=datetime(2024, 3, 1),
+                end_datetime=datetime(2024, 3, 3),
+                exchange=EXCHANGE.NSE.value,
+                tickers=tickers,
+            )
+
+    def test_reported_errors_are_failed_responses(self) -> None:
+        # what history() reports when Yahoo's response could not be read
+        self.errors = {
+            "TCS.NS": "No data found for this date range, symbol may be delisted",
+            "HDFC.NS": "No timezone found, symbol may be delisted",
+        }
+        data = self.get_data(["TCS", "INFY", "HDFC"])
+        self.assertTrue(APIManager.is_failed_response(data["TCS"]))
+        self.assertTrue(APIManager.is_failed_response(data["HDFC"]))
+        self.assertFalse(APIManager.is_failed_response(data["INFY"]))
+        self.assertEqual(len(data["INFY"]), 2)
+        # errors that are not known to be transient are not retried
+        self.assertEqual(len(self.calls), 1)
+
+    def test_cached_responses_are_replayed_offline(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.errors = {"HDFC.NS": "No timezone found, symbol may be delisted"}
+        online = self.get_data(
+            ["TCS", "HDFC"], response_cache=ResponseCache(directory.name)
+        )
+        offline = self.get_data(
+            ["TCS"], response_cache=ResponseCache(directory.name, offline=True)
+        )
+        self.assertEqual(len(self.calls), 1)
+        pd.testing.assert_frame_equal(offline["TCS"], online["TCS"], check_freq=False)
+        # failed tickers were not stored, so there is nothing to replay
+        with self.assertRaises(Exception):
+            self.get_data(
+                ["HDFC"], response_cache=ResponseCache(directory.name, offline=True)
+            )
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import importlib
+import threading
+
+from typing import Dict, List, Tuple, Type, Union
+from importlib.metadata import entry_points
+from commons import VENDOR, EXCHANGE
+from Exchanges.index_loader import IndexLoader
+from VendorsApiManagers.api_manager import APIManager
+from VendorsApiManagers.response_cache import ResponseCache
+
+
+class VendorRegistry:
+    """
+    Maps vendor names to their APIManager class and exchange names to their IndexLoader
+    class, both resolved once when the registry is created.
+    Built in implementations are found by the module naming convention
+    (VendorsApiManagers.yahoo.YahooData, Exchanges.nse_tickers.NSETickers), other packages
+    can add or replace them through the securities_master.vendors and
+    securities_master.index_loaders entry point groups, named after the VENDOR or EXCHANGE
+    member. Vendor instances are created once per set of login credentials and response
+    cache and reused.
+    """
+
+    __vendor_group = "securities_master.vendors"
+    __index_loader_group = "securities_master.index_loaders"
+
+    __vendors: Dict[str, Type[APIManager]]
+    __index_loaders: Dict[str, Type[IndexLoader]]
+    __instances: Dict[
+        Tuple[str, Tuple[Tuple[str, str], ...], Union[ResponseCache, None]], APIManager
+    ]
+
+    def __init__(self, load_entry_points: bool = True) -> None:
+        self.__vendors = {}
+        self.__index_loaders = {}
+        self.__instances = {}
+        self.__lock = threading.Lock()
+        for vendor in VENDOR:
+            vendor_class = VendorRegistry.__import_class(
+                f"VendorsApiManagers.{vendor.name.lower()}",
+                f"{vendor.name[0:1] + vendor.name[1:].lower()}Data",
+            )
+            if vendor_class is not None:
+                self.register_vendor(vendor.value, vendor_class)
+        for exchange in EXCHANGE:
+            loader_class = VendorRegistry.__import_class(
+                f"Exchanges.{exchange.name.lower()}_tickers",
+                f"{exchange.name}Tickers",
+            )
+            if loader_class is not None:
+                self.register_index_loader(exchange.value, loader_class)
+        if load_entry_points:
+            self.__load_entry_points()
+
+    @staticmethod
+    def __import_class(module_name: str, class_name: str) -> Union[type, None]:
+        try:
+            return getattr(importlib.import_module(module_name), class_name)
+        except ModuleNotFoundError as e:
+            # a vendor without an implementation, errors inside the module are raised
+            if e.name != module_name:
+                raise e
+            return None
+        except AttributeError:
+            return None
+
+    @staticmethod
+    def __get_entry_points(group: str) -> list:
+        points = entry_points()
+        # the selection API is only available from Python 3.10
+        if hasattr(points, "select"):
+            return list(points.select(group=group))
+        return list(points.get(group, []))
+
+    def __load_entry_points(self) -> None:
+        for point in VendorRegistry.__get_entry_points(VendorRegistry.__vendor_group):
+            vendor = (
+                VENDOR[point.name].value
+                if point.name in VENDOR.__members__
+                else point.name
+            )
+            self.register_vendor(vendor, point.load())
+        for point in VendorRegistry.__get_entry_points(
+            VendorRegistry.__index_loader_group
+        ):
+            exchange = (
+                EXCHANGE[point.name].value
+                if point.name in EXCHANGE.__members__
+                else point.name
+            )
+            self.register_index_loader(exchange, point.load())
+
+    def register_vendor(self, vendor: str, vendor_class: Type[APIManager]) -> None:
+        if not issubclass(vendor_class, APIManager):
+            raise Exception(f"{vendor_class} is not an APIManager")
+        with self.__lock:
+            self.__vendors[vendor] = vendor_class
+            # instances of a replaced class are not handed out any more
+            self.__instances = {
+                key: instance
+                for key, instance in self.__instances.items()
+                if key[0] != vendor
+            }
+
+    def register_index_loader(
+        self, exchange: str, loader_class: Type[IndexLoader]
+    ) -> None:
+        if not issubclass(loader_class, IndexLoader):
+            raise Exception(f"{loader_class} is not an IndexLoader")
+        with self.__lock:
+            self.__index_loaders[exchange] = loader_class
+
+    def get_vendors(self) -> List[str]:
+        with self.__lock:
+            return list(self.__vendors.keys())
+
+    def get_exchanges(self) -> List[str]:
+        with self.__lock:
+            return list(self.__index_loaders.keys())
+
+    def get_vendor_class(self, vendor: str) -> Type[APIManager]:
+        with self.__lock:
+            if vendor not in self.__vendors:
+                raise Exception(f"No APIManager registered for '{vendor}'")
+            return self.__vendors[vendor]
+
+    def get_vendor(
+        self,
+        vendor: str,
+        login_credentials: Dict[str, str] = None,
+        response_cache: Union[ResponseCache, None] = None,
+    ) -> APIManager:
+        """
+        Returns the long lived instance of vendor for login_credentials and response_cache,
+        creating it on first use.
+        """
+        credentials = {} if login_credentials is None else login_credentials
+        key = (
+            vendor,
+            tuple(sorted((str(k), str(v)) for k, v in credentials.items())),
+            response_cache,
+        )
+        vendor_class = self.get_vendor_class(vendor)
+        with self.__lock:
+            if key not in self.__instances:
+                instance = vendor_class(credentials)
+                instance.set_response_cache(response_cache)
+                self.__instances[key] = instance
+            return self.__instances[key]
+
+    def get_index_loader(self, exchange: str) -> Type[IndexLoader]:
+        with self.__lock:
+            if exchange not in self.__index_loaders:
+                raise Exception(f"No IndexLoader registered for '{exchange}'")
+            return self.__index_loaders[exchange]
+
+
+_default_registry: Union[VendorRegistry, None] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_vendor_registry() -> VendorRegistry:
+    """
+    Returns the process wide registry, created on first use so that vendor modules can import
+    this module without a cycle.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = VendorRegistry()
+        return _default_registry